@@ -0,0 +1,104 @@
+"""
+Keeps the data derived from enrollments -- the Course enrollment counters
+(lms/counters.py) and the entitlement index (lms/entitlements.py) -- in step
+with every way a user gains or loses a course: direct enrollment, batch
+membership, and batch course assignment through either BatchCourse or
+Batch.courses. Called from lms/signals.py and from bulk paths that bypass
+model signals.
+"""
+import threading
+
+from . import counters, entitlements
+from .counters import BatchUser, BatchCourseLink, batch_course_ids
+from .models import BatchCourse
+
+_state = threading.local()
+
+
+def _deleting_batches():
+    if not hasattr(_state, 'deleting_batches'):
+        _state.deleting_batches = set()
+    return _state.deleting_batches
+
+
+def batch_member_ids(batch_id):
+    return list(BatchUser.objects.filter(batch_id=batch_id).values_list('user_id', flat=True))
+
+
+def _group_by_course(pairs):
+    by_course = {}
+    for user_id, course_id in pairs:
+        by_course.setdefault(course_id, []).append(user_id)
+    return by_course
+
+
+def _group_by_user_set(by_course):
+    # Courses enrolled by the same set of users share one set-based update,
+    # so a users x courses bulk enrollment touches the index once.
+    groups = {}
+    for course_id, user_ids in by_course.items():
+        groups.setdefault(frozenset(user_ids), []).append(course_id)
+    return groups.items()
+
+
+def direct_enrolled(pairs):
+    by_course = _group_by_course(pairs)
+    counters.bump_direct({course_id: len(users) for course_id, users in by_course.items()})
+    for user_ids, course_ids in _group_by_user_set(by_course):
+        entitlements.set_direct(user_ids, course_ids, True)
+
+
+def direct_unenrolled(pairs):
+    by_course = _group_by_course(pairs)
+    counters.bump_direct({course_id: -len(users) for course_id, users in by_course.items()})
+    for user_ids, course_ids in _group_by_user_set(by_course):
+        entitlements.set_direct(user_ids, course_ids, False)
+
+
+def batch_members_changed(batch_id, user_ids, delta):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    course_ids = batch_course_ids(batch_id)
+    counters.bump_batch(course_ids, delta * len(user_ids))
+    entitlements.change_batch_grants(user_ids, course_ids, delta)
+
+
+def batch_course_changed(batch_id, course_id, delta, source):
+    """
+    ``source`` is ``'batch_course'`` or ``'batch_courses'`` (the M2M). A
+    course assigned through both only grants access once, so a change on
+    one side is ignored while the other still holds.
+    """
+    if batch_id in _deleting_batches():
+        return
+    if source == 'batch_course':
+        still_assigned = BatchCourseLink.objects.filter(batch_id=batch_id, course_id=course_id).exists()
+    else:
+        still_assigned = BatchCourse.objects.filter(batch_id=batch_id, course_id=course_id).exists()
+    if still_assigned:
+        return
+
+    user_ids = batch_member_ids(batch_id)
+    counters.bump_batch([course_id], delta * len(user_ids))
+    entitlements.change_batch_grants(user_ids, [course_id], delta)
+
+
+def batch_deleting(batch_id):
+    """
+    Release everything a batch grants before its rows cascade away. The
+    through-table rows are fast-deleted without signals, so per-row handlers
+    cannot be relied on here.
+    """
+    batch_members_changed(batch_id, batch_member_ids(batch_id), -1)
+    _deleting_batches().add(batch_id)
+
+
+def batch_deleted(batch_id):
+    _deleting_batches().discard(batch_id)
+
+
+def user_deleting(user_id):
+    # Memberships are fast-deleted; entitlement rows cascade on their own.
+    for batch_id in BatchUser.objects.filter(user_id=user_id).values_list('batch_id', flat=True):
+        counters.bump_batch(batch_course_ids(batch_id), -1)
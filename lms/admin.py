@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, UserCourse, UserProfile
+from .models import Course, MediaUploadJob, UserCourse, UserProfile
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
@@ -15,3 +15,8 @@ class UserCourseAdmin(admin.ModelAdmin):
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user']
+
+@admin.register(MediaUploadJob)
+class MediaUploadJobAdmin(admin.ModelAdmin):
+    list_display = ['course', 'field', 'status', 'attempts', 'bytes_uploaded', 'size', 'available_at']
+    list_filter = ['status', 'field']
@@ -7,6 +7,7 @@ class LmsConfig(AppConfig):
 
     def ready(self):
         import lms.signals  # ✅ Must be imported so the signal runs
+        import lms.metrics  # ✅ Installs the query timer on new DB connections
 
 
     
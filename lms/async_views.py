@@ -0,0 +1,171 @@
+"""
+Native async versions of the hot read endpoints, served under ASGI instead
+of their DRF counterparts (see ``ASYNC_READ_VIEWS`` in settings). DRF views
+are synchronous, so under ASGI every request would hop to a worker thread;
+these use Django's async ORM and keep one process able to hold many slow
+client connections.
+
+They authenticate with the stateless ClaimsJWTAuthentication, which never
+touches the database, and return byte-for-byte the same JSON as the
+synchronous views.
+"""
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from .authentication import ClaimsJWTAuthentication
+from .conditional import alist_etag, course_validators, not_modified, set_validators
+from .cache import acatalog_cache_key, aget_cached_catalog, aset_cached_catalog
+from .enrollment import accessible_courses
+from .filters import filter_courses
+from .metrics import serializing
+from .models import Course, Batch, OrganizationProfile
+from .pagination import CourseKeysetPagination
+from .renderers import FastJSONRenderer
+from .permissions import ORGANIZATION_CLAIM
+from .serializers import CourseSerializer, MyCourseSerializer
+from .views import prepare_course_list
+
+
+def json_response(data, status=200, headers=None):
+    with serializing():
+        body = FastJSONRenderer().render(data)
+    return HttpResponse(
+        body, status=status,
+        content_type='application/json', headers=headers,
+    )
+
+
+def authenticate(request):
+    """Return ``(drf_request, None)`` or ``(None, error_response)``."""
+    authenticator = ClaimsJWTAuthentication()
+    try:
+        result = authenticator.authenticate(request)
+    except exceptions.AuthenticationFailed as exc:
+        response = error_response(exc)
+        response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+        return None, response
+    if result is None:
+        return None, json_response(
+            {'detail': 'Authentication credentials were not provided.'}, 401,
+            {'WWW-Authenticate': authenticator.authenticate_header(request)},
+        )
+    drf_request = Request(request)
+    drf_request.user, drf_request.auth = result
+    return drf_request, None
+
+
+def error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+    return json_response(detail, exc.status_code)
+
+
+async def serialize_course_list(request, courses, serializer_class=CourseSerializer, paginator=None, **kwargs):
+    if paginator is not None:
+        page = await paginator.apaginate_queryset(courses, request)
+        return paginator.get_paginated_response(serializer_class(page, many=True, **kwargs).data).data
+
+    rows = [course async for course in courses]
+    return serializer_class(rows, many=True, **kwargs).data
+
+
+# ✅ Course List (async)
+async def course_list(request):
+    if request.method != 'GET':
+        return json_response({'detail': f'Method "{request.method}" not allowed.'}, 405)
+    drf_request, error = authenticate(request)
+    if error:
+        return error
+
+    try:
+        cache_key = await acatalog_cache_key(drf_request)
+        entry = await aget_cached_catalog(cache_key)
+        if entry is None:
+            courses = filter_courses(Course.objects.all(), drf_request.query_params)
+            etag = await alist_etag(courses)
+        else:
+            etag = entry['etag']
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if entry is None:
+            courses, fields, paginator = prepare_course_list(drf_request, courses)
+            data = await serialize_course_list(drf_request, courses, fields=fields, paginator=paginator)
+            await aset_cached_catalog(cache_key, {'etag': etag, 'data': data})
+        else:
+            data = entry['data']
+    except exceptions.APIException as exc:
+        return error_response(exc)
+    return set_validators(json_response(data), etag)
+
+
+# ✅ Course Detail (async)
+async def course_detail(request, pk):
+    if request.method != 'GET':
+        return json_response({'detail': f'Method "{request.method}" not allowed.'}, 405)
+    drf_request, error = authenticate(request)
+    if error:
+        return error
+
+    try:
+        course = await Course.objects.aget(pk=pk)
+    except Course.DoesNotExist:
+        return json_response({'detail': 'No Course matches the given query.'}, 404)
+    etag, last_modified = course_validators(course)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        # The context DRF's get_serializer() passes, for absolute file URLs.
+        response = json_response(CourseSerializer(course, context={'request': drf_request}).data)
+    return set_validators(response, etag, last_modified)
+
+
+# ✅ Student - View Assigned Courses (async)
+async def my_assigned_courses(request):
+    if request.method != 'GET':
+        return json_response({'detail': f'Method "{request.method}" not allowed.'}, 405)
+    drf_request, error = authenticate(request)
+    if error:
+        return error
+
+    courses = accessible_courses(drf_request.user.id)
+    paginator = CourseKeysetPagination()
+    try:
+        if paginator.is_requested(drf_request):
+            # The next cursor reads the ordering columns; a deferred one
+            # would be a synchronous query inside the event loop.
+            ordering = paginator.orderings[paginator.get_ordering(drf_request)]
+            courses = courses.only(*MyCourseSerializer.MODEL_COLUMNS, *ordering)
+            data = await serialize_course_list(drf_request, courses, MyCourseSerializer, paginator=paginator)
+        else:
+            courses = courses.only(*MyCourseSerializer.MODEL_COLUMNS).order_by('id')
+            data = await serialize_course_list(drf_request, courses, MyCourseSerializer)
+    except exceptions.APIException as exc:
+        return error_response(exc)
+    return json_response(data)
+
+
+# ✅ List Batches for Organization (async)
+async def list_batches_for_org(request):
+    if request.method != 'GET':
+        return json_response({'detail': f'Method "{request.method}" not allowed.'}, 405)
+    drf_request, error = authenticate(request)
+    if error:
+        return error
+
+    token = drf_request.auth
+    if ORGANIZATION_CLAIM in token:
+        organization_id = token[ORGANIZATION_CLAIM]
+    else:
+        organization_id = await OrganizationProfile.objects.filter(
+            user_id=drf_request.user.id
+        ).values_list('id', flat=True).afirst()
+    if not organization_id:
+        return json_response({"error": "Organization not found."}, 404)
+
+    data = [
+        {"id": batch_id, "name": name}
+        async for batch_id, name in Batch.objects.filter(organization_id=organization_id).values_list('id', 'name')
+    ]
+    return json_response(data)
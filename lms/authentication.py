@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built from verified token claims: id, username, is_superuser and
+    role are read straight from the token. Any other attribute (email,
+    date_joined, ...) loads the real ``User`` row on first access, so the
+    database is only hit by views that actually need it.
+    """
+
+    @cached_property
+    def id(self):
+        # Simple JWT serializes the user id claim as a string.
+        user_id = self.token[api_settings.USER_ID_CLAIM]
+        return int(user_id) if isinstance(user_id, str) and user_id.isdigit() else user_id
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def db_user(self):
+        try:
+            return User.objects.get(pk=self.id)
+        except User.DoesNotExist:
+            # The token outlived its user.
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+    def __getattr__(self, attr):
+        if attr.startswith('_') or attr in ('token', 'db_user'):
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.db_user, attr)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Opt-in authentication for hot read-only endpoints: validates the access
+    token like ``JWTAuthentication`` but skips the ``auth_user`` lookup.
+
+    Deactivating a user does not revoke access until their token expires,
+    so only use this on views that serve non-sensitive reads.
+    """
+
+    def get_user(self, validated_token):
+        super().get_user(validated_token)
+        return ClaimsUser(validated_token)
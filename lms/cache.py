@@ -0,0 +1,151 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .filters import get_course_filters
+
+GENERATION_KEY = 'lms:catalog:generation'
+HITS_KEY = 'lms:catalog:hits'
+MISSES_KEY = 'lms:catalog:misses'
+PAGINATION_PARAMS = ('cursor', 'page_size', 'ordering')
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_catalog_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _incr(cache, key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key missing or evicted; add() keeps concurrent first writers from
+        # clobbering each other, then retry the atomic increment.
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+async def _aincr(cache, key):
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        if await cache.aadd(key, 1, timeout=None):
+            return 1
+        return await cache.aincr(key)
+
+
+def get_catalog_generation():
+    cache = get_catalog_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+async def aget_catalog_generation():
+    cache = get_catalog_cache()
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, 1, timeout=None)
+        generation = await cache.aget(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_catalog_generation():
+    """Invalidate every cached catalog response by moving to a new generation."""
+    return _incr(get_catalog_cache(), GENERATION_KEY)
+
+
+def catalog_cache_key(request):
+    """Cache key for ``request``'s filter set in the current generation."""
+    return entry_key(get_catalog_generation(), filter_digest(request))
+
+
+async def acatalog_cache_key(request):
+    return entry_key(await aget_catalog_generation(), filter_digest(request))
+
+
+def entry_key(generation, digest):
+    # Entries are {'etag', 'data'} dicts; 'entry' keeps them
+    # apart from bare response bodies cached by older deployments.
+    return f'lms:catalog:entry:v{generation}:{digest}'
+
+
+def filter_digest(request):
+    """
+    Hash the normalized filter set of ``request``.
+
+    Filter values are de-duplicated and sorted so ``?level=A&level=B`` and
+    ``?level=B&level=A&level=A`` share an entry.
+    """
+    params = request.query_params
+    normalized = {
+        field: sorted(set(values))
+        for field, values in get_course_filters(params).items()
+    }
+    if params.get('view'):
+        normalized['_view'] = params.get('view')
+    fields = sorted({
+        name.strip()
+        for value in params.getlist('fields')
+        for name in value.split(',')
+        if name.strip()
+    })
+    if fields:
+        normalized['_fields'] = fields
+    paging = {name: params.get(name) for name in PAGINATION_PARAMS if name in params}
+    if paging:
+        # Paginated responses carry absolute "next" links.
+        normalized['_page'] = paging
+        normalized['_host'] = request.get_host()
+
+    return hashlib.sha1(
+        json.dumps(normalized, sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
+
+
+def get_cached_catalog(key):
+    cache = get_catalog_cache()
+    data = cache.get(key)
+    _incr(cache, MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+async def aget_cached_catalog(key):
+    cache = get_catalog_cache()
+    data = await cache.aget(key)
+    await _aincr(cache, MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def set_cached_catalog(key, data):
+    get_catalog_cache().set(key, data, get_catalog_timeout())
+
+
+async def aset_cached_catalog(key, data):
+    await get_catalog_cache().aset(key, data, get_catalog_timeout())
+
+
+def get_catalog_cache_stats():
+    cache = get_catalog_cache()
+    values = cache.get_many([HITS_KEY, MISSES_KEY, GENERATION_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+        'generation': values.get(GENERATION_KEY, 1),
+    }
+
+
+def reset_catalog_cache_stats():
+    get_catalog_cache().delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,55 @@
+"""
+ETag / Last-Modified validators for the course endpoints.
+
+A course list is versioned by an ETag built from ``(row count,
+max(updated_at))`` of its filtered set, which costs one aggregate query and no
+row fetches. Lists get no Last-Modified: deleting a course doesn't move
+max(updated_at), so If-Modified-Since alone would get a false 304. A single
+course is versioned by its own ``updated_at`` and gets both validators. They
+are checked against If-None-Match / If-Modified-Since before anything is
+serialized.
+"""
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_validators(tag, last_modified):
+    """Return ``(etag, last_modified_timestamp)``."""
+    if last_modified is None:
+        return quote_etag(f'{tag}-0'), None
+    stamp = last_modified.timestamp()
+    return quote_etag(f'{tag}-{stamp:.6f}'), int(stamp)
+
+
+def list_aggregates():
+    return {'count': Count('pk'), 'last_modified': Max('updated_at')}
+
+
+def list_etag(courses):
+    stats = courses.order_by().aggregate(**list_aggregates())
+    return make_validators(f"n{stats['count']}", stats['last_modified'])[0]
+
+
+async def alist_etag(courses):
+    stats = await courses.order_by().aaggregate(**list_aggregates())
+    return make_validators(f"n{stats['count']}", stats['last_modified'])[0]
+
+
+def course_validators(course):
+    return make_validators(f'c{course.pk}', course.updated_at)
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 (or 412) response when the client's copy is current, else ``None``."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
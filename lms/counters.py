@@ -0,0 +1,110 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .cache import bump_catalog_generation
+from .models import Course, UserCourse, Batch, BatchCourse
+
+BatchUser = Batch.users.through
+BatchCourseLink = Batch.courses.through
+
+
+def counters_changed():
+    # QuerySet.update() sends no post_save, so the catalog cache (and with it
+    # the list ETag) has to be invalidated here.
+    transaction.on_commit(bump_catalog_generation)
+
+
+def bump_direct(course_deltas):
+    """Apply ``{course_id: delta}`` to the direct enrollment counters."""
+    # One UPDATE per distinct delta, so a users x courses bulk enrollment
+    # costs a single statement.
+    by_delta = {}
+    for course_id, delta in course_deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(course_id)
+    for delta, course_ids in by_delta.items():
+        Course.objects.filter(pk__in=course_ids).update(
+            direct_enrollments=F('direct_enrollments') + delta,
+            students=F('students') + delta,
+            updated_at=timezone.now(),
+        )
+    if by_delta:
+        counters_changed()
+
+
+def bump_batch(course_ids, delta):
+    """Add ``delta`` batch seats to every course in ``course_ids``."""
+    if delta and course_ids:
+        Course.objects.filter(pk__in=list(course_ids)).update(
+            batch_enrollments=F('batch_enrollments') + delta,
+            students=F('students') + delta,
+            updated_at=timezone.now(),
+        )
+        counters_changed()
+
+
+def batch_course_ids(batch_id):
+    """Courses a batch grants, through either BatchCourse or Batch.courses."""
+    ids = set(BatchCourse.objects.filter(batch_id=batch_id).values_list('course_id', flat=True))
+    ids.update(BatchCourseLink.objects.filter(batch_id=batch_id).values_list('course_id', flat=True))
+    return ids
+
+
+def compute_enrollment_counts(course_ids):
+    """Recount ``(direct, batch)`` enrollments for ``course_ids`` from the enrollment tables."""
+    course_ids = list(course_ids)
+    direct = Counter(dict(
+        UserCourse.objects.filter(course_id__in=course_ids)
+        .values_list('course_id')
+        .annotate(total=Count('id'))
+        .values_list('course_id', 'total')
+    ))
+
+    pairs = set(BatchCourse.objects.filter(course_id__in=course_ids).values_list('batch_id', 'course_id'))
+    pairs.update(BatchCourseLink.objects.filter(course_id__in=course_ids).values_list('batch_id', 'course_id'))
+    batch_ids = {batch_id for batch_id, _ in pairs}
+    members = dict(
+        BatchUser.objects.filter(batch_id__in=batch_ids)
+        .values_list('batch_id')
+        .annotate(total=Count('id'))
+        .values_list('batch_id', 'total')
+    )
+    batch = Counter()
+    for batch_id, course_id in pairs:
+        batch[course_id] += members.get(batch_id, 0)
+
+    return {course_id: (direct[course_id], batch[course_id]) for course_id in course_ids}
+
+
+def reconcile_enrollment_counts(chunk_size=500):
+    """Rewrite drifted counters, ``chunk_size`` courses at a time. Returns (checked, repaired)."""
+    checked = repaired = 0
+    last_id = 0
+    while True:
+        # Lock the chunk so concurrent F() increments wait for the rewrite
+        # instead of being overwritten by it.
+        with transaction.atomic():
+            rows = list(
+                Course.objects.select_for_update().filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', 'direct_enrollments', 'batch_enrollments', 'students')[:chunk_size]
+            )
+            if not rows:
+                if repaired:
+                    counters_changed()
+                return checked, repaired
+            last_id = rows[-1][0]
+            counts = compute_enrollment_counts(row[0] for row in rows)
+            for course_id, direct, batch, students in rows:
+                checked += 1
+                actual_direct, actual_batch = counts[course_id]
+                if (direct, batch, students) != (actual_direct, actual_batch, actual_direct + actual_batch):
+                    Course.objects.filter(pk=course_id).update(
+                        direct_enrollments=actual_direct,
+                        batch_enrollments=actual_batch,
+                        students=actual_direct + actual_batch,
+                        updated_at=timezone.now(),
+                    )
+                    repaired += 1
@@ -0,0 +1,167 @@
+"""
+Seeded synthetic datasets for benchmarks (``manage.py generate_dataset`` and
+``manage.py bench_endpoints``).
+
+Rows are written with bulk_create, so no signals fire. The derived state,
+meaning enrollment counters, the entitlement index and the catalog cache
+generation, is rebuilt at the end. Every user shares one password hash
+(DATASET_PASSWORD), so generation time isn't spent hashing.
+"""
+import random
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import NotSupportedError, connection
+
+from .cache import bump_catalog_generation
+from .counters import BatchCourseLink, BatchUser, reconcile_enrollment_counts
+from .entitlements import rebuild_entitlements
+from .models import Batch, BatchCourse, Course, OrganizationProfile, UserCourse, UserProfile
+
+DATASET_PASSWORD = 'bench-pass-123'
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+
+TOPICS = [
+    'Selenium', 'Playwright', 'Postman', 'REST APIs', 'Appium', 'Django', 'Spring Boot',
+    'React', 'Node.js', 'MongoDB', 'Figma', 'Cypress', 'JMeter', 'Pytest', 'Kotlin',
+]
+FORMATS = ['Fundamentals', 'Bootcamp', 'Masterclass', 'Crash Course', 'in Practice', 'for Teams']
+FIRST_NAMES = ['asha', 'ravi', 'meena', 'arjun', 'divya', 'kiran', 'neha', 'vikram', 'sneha', 'rahul']
+
+
+def scale_config(rows):
+    """
+    Dataset sizes for a scale of ``rows``: roughly that many UserCourse rows,
+    with the other tables sized in proportion.
+    """
+    students = max(20, rows // 4)
+    return {
+        'organizations': max(2, rows // 2_000),
+        'batches_per_organization': 10,
+        'students': students,
+        'courses': max(20, rows // 50),
+        'enrollments_per_student': 4,
+        'courses_per_batch': 5,
+    }
+
+
+def parse_scale(value):
+    """``'10k'`` or ``'2500'`` -> rows."""
+    return SCALES.get(value.lower()) or int(value)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_insert(model, objects, batch_size):
+    created = []
+    for chunk in chunked(objects, batch_size):
+        created.extend(model.objects.bulk_create(chunk, batch_size=batch_size))
+    return created
+
+
+def make_course(rng, index, created_by=None, organization=None):
+    category = rng.choice(Course.CATEGORY_CHOICES)[0]
+    paid = rng.random() < 0.7
+    price = rng.choice([299, 499, 999, 1499, 2999]) if paid else 0
+    title = f'{rng.choice(TOPICS)} {rng.choice(FORMATS)} #{index}'
+    return Course(
+        title=title,
+        category=category,
+        level=rng.choice(Course.LEVEL_CHOICES)[0],
+        price_type='Paid' if paid else 'Free',
+        price=price,
+        old_price=price * 2 if paid and rng.random() < 0.5 else None,
+        rating=round(rng.uniform(3.0, 5.0), 1),
+        instructor=rng.choice(Course.INSTRUCTOR_CHOICES)[0],
+        description=f'{title}: hands-on {category.lower()} with projects and assessments.',
+        created_by=created_by,
+        organization=organization,
+    )
+
+
+def generate_dataset(seed=0, prefix='synth', organizations=2, batches_per_organization=10, students=250,
+                     courses=20, enrollments_per_student=4, courses_per_batch=5, batch_size=2_000):
+    """Write one seeded dataset and return the row counts per table."""
+    if not connection.features.can_return_rows_from_bulk_insert:
+        raise NotSupportedError(
+            'Dataset generation needs a database that returns primary keys from bulk inserts '
+            '(SQLite, PostgreSQL, MariaDB 10.5+).'
+        )
+    rng = random.Random(seed)
+    password = make_password(DATASET_PASSWORD)
+
+    admin = User.objects.create_superuser(f'{prefix}-admin', f'{prefix}-admin@example.com', DATASET_PASSWORD)
+    org_users = bulk_insert(User, (
+        User(username=f'{prefix}-org-{i}', email=f'{prefix}-org-{i}@example.com', password=password)
+        for i in range(organizations)
+    ), batch_size)
+    student_users = bulk_insert(User, (
+        User(
+            username=f'{prefix}-{rng.choice(FIRST_NAMES)}-{i}', email=f'{prefix}-student-{i}@example.com',
+            password=password,
+        )
+        for i in range(students)
+    ), batch_size)
+    bulk_insert(UserProfile, (
+        UserProfile(user=user, role='organization', phone=f'90000{i:05d}') for i, user in enumerate(org_users)
+    ), batch_size)
+    bulk_insert(UserProfile, (
+        UserProfile(user=user, role='student', phone=f'80000{i:05d}') for i, user in enumerate(student_users)
+    ), batch_size)
+    profiles = bulk_insert(OrganizationProfile, (
+        OrganizationProfile(user=user, organization_name=f'{prefix.title()} Org {i}') for i, user in enumerate(org_users)
+    ), batch_size)
+    # Courses are authored by the admin or one of the organizations, so
+    # created_by has the spread the admin and org views filter on.
+    authors = [(admin, None)] + list(zip(org_users, profiles))
+    course_rows = bulk_insert(Course, (
+        make_course(rng, i, *rng.choice(authors)) for i in range(courses)
+    ), batch_size)
+    course_ids = [course.pk for course in course_rows]
+
+    batches = bulk_insert(Batch, (
+        Batch(name=f'{profile.organization_name} Batch {n}', organization=profile)
+        for profile in profiles
+        for n in range(batches_per_organization)
+    ), batch_size)
+    per_batch = min(courses_per_batch, len(course_ids))
+    # Half of each batch's courses go through BatchCourse, half through Batch.courses.
+    batch_courses, batch_links = [], []
+    for batch in batches:
+        chosen = rng.sample(course_ids, per_batch)
+        split = (per_batch + 1) // 2
+        batch_courses += [BatchCourse(batch=batch, course_id=course_id) for course_id in chosen[:split]]
+        batch_links += [BatchCourseLink(batch_id=batch.pk, course_id=course_id) for course_id in chosen[split:]]
+    bulk_insert(BatchCourse, batch_courses, batch_size)
+    bulk_insert(BatchCourseLink, batch_links, batch_size)
+    bulk_insert(BatchUser, (
+        BatchUser(batch_id=rng.choice(batches).pk, user_id=user.pk) for user in student_users
+    ), batch_size)
+
+    per_student = min(enrollments_per_student, len(course_ids))
+    bulk_insert(UserCourse, (
+        UserCourse(user=user, course_id=course_id)
+        for user in student_users
+        for course_id in rng.sample(course_ids, per_student)
+    ), batch_size)
+
+    reconcile_enrollment_counts()
+    rebuild_entitlements(user.pk for user in student_users)
+    bump_catalog_generation()
+
+    return {
+        'admin': admin.username,
+        'courses': len(course_rows),
+        'organizations': len(profiles),
+        'students': len(student_users),
+        'batches': len(batches),
+        'batch_courses': len(batch_courses),
+        'batch_course_links': len(batch_links),
+        'batch_members': len(student_users),
+        'enrollments': len(student_users) * per_student,
+    }
@@ -0,0 +1,119 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+
+from . import access
+from .models import Course, UserCourse, Batch, BatchCourse
+
+BULK_BATCH_SIZE = 1000
+
+
+def chunked(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def get_in_chunk_size():
+    # Stay under the backend's bound-parameter limit (999 on old SQLite).
+    limit = connection.features.max_query_params or 10000
+    return min(limit - 10, 10000) if limit > 20 else limit
+
+
+def existing_ids(model, ids):
+    found = set()
+    for chunk in chunked(ids, get_in_chunk_size()):
+        found.update(model.objects.filter(id__in=chunk).values_list('id', flat=True))
+    return found
+
+
+def existing_enrollments(user_ids, course_ids):
+    course_ids = list(course_ids)
+    found = set()
+    # Course ids are usually the short side, so chunk over users and keep
+    # the course list whole.
+    chunk_size = max(get_in_chunk_size() - len(course_ids), 1)
+    for chunk in chunked(user_ids, chunk_size):
+        found.update(
+            UserCourse.objects.filter(user_id__in=chunk, course_id__in=course_ids)
+            .values_list('user_id', 'course_id')
+        )
+    return found
+
+
+def bulk_enroll(pairs):
+    """
+    Enroll every ``(user_id, course_id)`` pair in a constant number of
+    set-based queries and return one result dict per input pair, in order.
+    """
+    pairs = [(int(user_id), int(course_id)) for user_id, course_id in pairs]
+    user_ids = {user_id for user_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+
+    known_users = existing_ids(User, user_ids)
+    known_courses = existing_ids(Course, course_ids)
+    enrolled = existing_enrollments(user_ids & known_users, course_ids & known_courses)
+
+    results = []
+    to_create = []
+    created_results = {}
+    for user_id, course_id in pairs:
+        if user_id not in known_users:
+            result = 'unknown_user'
+        elif course_id not in known_courses:
+            result = 'unknown_course'
+        elif (user_id, course_id) in enrolled:
+            result = 'already_enrolled'
+        elif (user_id, course_id) in created_results:
+            result = 'duplicate'
+        else:
+            result = 'created'
+            to_create.append(UserCourse(user_id=user_id, course_id=course_id))
+        results.append({'user': user_id, 'course': course_id, 'result': result})
+        if result == 'created':
+            created_results[(user_id, course_id)] = results[-1]
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                UserCourse.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        except IntegrityError:
+            # Another request enrolled some of these pairs after they were
+            # checked; insert one at a time so only the rows really written
+            # count as created.
+            to_create = [item for item in to_create if insert_enrollment(item)]
+            for item in set(created_results) - {(item.user_id, item.course_id) for item in to_create}:
+                created_results[item]['result'] = 'already_enrolled'
+        # bulk_create skips post_save, so update the derived data here.
+        access.direct_enrolled([(item.user_id, item.course_id) for item in to_create])
+
+    return results
+
+
+def insert_enrollment(enrollment):
+    """Insert ``enrollment`` unless the pair already exists; return whether it was inserted."""
+    try:
+        with transaction.atomic():
+            UserCourse.objects.bulk_create([enrollment])
+    except IntegrityError:
+        if UserCourse.objects.filter(user_id=enrollment.user_id, course_id=enrollment.course_id).exists():
+            return False
+        raise
+    return True
+
+
+def accessible_courses(user_id):
+    """
+    Courses ``user_id`` can access, directly or through any of their batches.
+
+    Built as one statement of ``id IN (subquery)`` predicates, so the union
+    is de-duplicated by the database without joining the enrollment tables
+    against each other.
+    """
+    batch_ids = Batch.users.through.objects.filter(user_id=user_id).values('batch_id')
+    direct = UserCourse.objects.filter(user_id=user_id).values('course_id')
+    via_batch_course = BatchCourse.objects.filter(batch_id__in=batch_ids).values('course_id')
+    via_batch_courses = Batch.courses.through.objects.filter(batch_id__in=batch_ids).values('course_id')
+    return Course.objects.filter(
+        Q(id__in=direct) | Q(id__in=via_batch_course) | Q(id__in=via_batch_courses)
+    )
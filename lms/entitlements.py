@@ -0,0 +1,112 @@
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .counters import BatchUser, BatchCourseLink
+from .models import CourseEntitlement, UserCourse, BatchCourse
+
+ENTITLEMENT_BATCH_SIZE = 1000
+
+
+def has_course_access(user_id, course_id):
+    """A single probe of the (user, course) unique index."""
+    return CourseEntitlement.objects.filter(user_id=user_id, course_id=course_id).exists()
+
+
+def _ensure_rows(user_ids, course_ids, **defaults):
+    CourseEntitlement.objects.bulk_create(
+        [
+            CourseEntitlement(user_id=user_id, course_id=course_id, **defaults)
+            for user_id in user_ids
+            for course_id in course_ids
+        ],
+        batch_size=ENTITLEMENT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _prune(user_ids, course_ids):
+    CourseEntitlement.objects.filter(
+        user_id__in=user_ids, course_id__in=course_ids, direct=False, batch_grants=0
+    ).delete()
+
+
+def set_direct(user_ids, course_ids, direct):
+    """Mark the ``user_ids`` x ``course_ids`` entitlements as (not) directly enrolled."""
+    user_ids, course_ids = list(user_ids), list(course_ids)
+    if not user_ids or not course_ids:
+        return
+    if direct:
+        _ensure_rows(user_ids, course_ids, direct=True)
+    CourseEntitlement.objects.filter(
+        user_id__in=user_ids, course_id__in=course_ids, direct=not direct
+    ).update(direct=direct)
+    if not direct:
+        _prune(user_ids, course_ids)
+
+
+def change_batch_grants(user_ids, course_ids, delta):
+    """Add ``delta`` batch grants to every ``user_ids`` x ``course_ids`` entitlement."""
+    user_ids, course_ids = list(user_ids), list(course_ids)
+    if not delta or not user_ids or not course_ids:
+        return
+    if delta > 0:
+        _ensure_rows(user_ids, course_ids)
+    if delta > 0:
+        batch_grants = F('batch_grants') + delta
+    else:
+        # Clamped at 0: the column is unsigned, and a row can be short of
+        # grants if it was written before a membership was tracked.
+        batch_grants = Case(When(batch_grants__gt=-delta, then=F('batch_grants') + delta), default=Value(0))
+    CourseEntitlement.objects.filter(user_id__in=user_ids, course_id__in=course_ids).update(
+        batch_grants=batch_grants
+    )
+    if delta < 0:
+        _prune(user_ids, course_ids)
+
+
+def compute_entitlements(user_ids):
+    """Return ``{(user_id, course_id): (direct, batch_grants)}`` from the enrollment tables."""
+    user_ids = list(user_ids)
+    direct = set(UserCourse.objects.filter(user_id__in=user_ids).values_list('user_id', 'course_id'))
+
+    memberships = list(BatchUser.objects.filter(user_id__in=user_ids).values_list('user_id', 'batch_id'))
+    batch_ids = {batch_id for _, batch_id in memberships}
+    courses_by_batch = {}
+    for model in (BatchCourse, BatchCourseLink):
+        for batch_id, course_id in model.objects.filter(batch_id__in=batch_ids).values_list('batch_id', 'course_id'):
+            courses_by_batch.setdefault(batch_id, set()).add(course_id)
+
+    grants = Counter()
+    for user_id, batch_id in memberships:
+        for course_id in courses_by_batch.get(batch_id, ()):
+            grants[(user_id, course_id)] += 1
+
+    return {
+        key: (key in direct, grants[key])
+        for key in direct | set(grants)
+    }
+
+
+def rebuild_entitlements(user_ids, chunk_size=500):
+    """Regenerate the entitlement rows of ``user_ids``, ``chunk_size`` users per transaction."""
+    written = 0
+    user_ids = iter(user_ids)
+    while True:
+        chunk = list(islice(user_ids, chunk_size))
+        if not chunk:
+            break
+        rows = compute_entitlements(chunk)
+        with transaction.atomic():
+            CourseEntitlement.objects.filter(user_id__in=chunk).delete()
+            CourseEntitlement.objects.bulk_create(
+                [
+                    CourseEntitlement(user_id=user_id, course_id=course_id, direct=is_direct, batch_grants=batch_grants)
+                    for (user_id, course_id), (is_direct, batch_grants) in rows.items()
+                ],
+                batch_size=ENTITLEMENT_BATCH_SIZE,
+            )
+        written += len(rows)
+    return written
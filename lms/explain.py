@@ -0,0 +1,65 @@
+"""
+Query plan helpers for ``manage.py index_advisor``.
+
+``explain()`` runs the backend's EXPLAIN for one statement and returns a
+:class:`Plan`: readable plan lines plus the tables the plan reads in full.
+A full scan only matters when the statement filters (has a WHERE clause);
+listing a whole table is supposed to read all of it.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.db import NotSupportedError, connection as default_connection
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+# Schema introspection reads the system catalog; that is never worth indexing.
+CATALOG_PREFIXES = ('sqlite_', 'information_schema', 'pg_')
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(?P<table>\S+)(?: AS \S+)?$')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (?P<table>\S+)')
+
+
+@dataclass
+class Plan:
+    sql: str
+    lines: list = field(default_factory=list)
+    full_scans: list = field(default_factory=list)
+
+    @property
+    def filters(self):
+        return ' WHERE ' in self.sql.upper()
+
+    @property
+    def flagged(self):
+        return self.filters and any(not table.lower().startswith(CATALOG_PREFIXES) for table in self.full_scans)
+
+
+def is_explainable(sql):
+    return sql.lstrip().upper().startswith(EXPLAINABLE)
+
+
+def explain(sql, params=None, connection=None):
+    connection = connection or default_connection
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            lines = [row[-1] for row in cursor.fetchall()]
+            scans = [m['table'] for m in map(SQLITE_FULL_SCAN.match, lines) if m]
+        elif vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            lines = [
+                f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}"
+                + (f" ({row['Extra']})" if row.get('Extra') else '')
+                for row in rows
+            ]
+            scans = [row['table'] for row in rows if row['type'] == 'ALL']
+        elif vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}', params)
+            lines = [row[0] for row in cursor.fetchall()]
+            scans = [m['table'] for line in lines for m in [POSTGRES_FULL_SCAN.search(line)] if m]
+        else:
+            raise NotSupportedError(f'No EXPLAIN support for {vendor}.')
+    return Plan(sql=sql, lines=lines, full_scans=scans)
@@ -0,0 +1,83 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from .serializers import UserCourseDetailSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+DEFAULT_THUMBNAIL = "/default-thumbnail.jpg"
+
+ASSIGNMENT_COLUMNS = [
+    'id', 'username', 'email', 'course_id', 'course_title',
+    'enrolled_at', 'category', 'level', 'price', 'instructor', 'thumbnail_url',
+]
+ASSIGNMENT_VALUES = [
+    'id', 'user__username', 'user__email', 'course_id', 'course__title',
+    'enrolled_at', 'course__category', 'course__level', 'course__price',
+    'course__instructor', 'course__thumbnail',
+]
+
+
+def iter_in_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Walk ``queryset`` in primary-key order, ``chunk_size`` rows per query.
+
+    Each chunk is fetched with ``WHERE id > last_id LIMIT n``, so only one
+    chunk is ever held in memory, regardless of whether the database driver
+    buffers full result sets client-side.
+    """
+    last_id = None
+    queryset = queryset.order_by('id')
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def iter_assignment_rows(queryset):
+    """Yield assignment dicts matching ``UserCourseDetailSerializer`` output."""
+    fields = UserCourseDetailSerializer().fields
+    enrolled_at = fields['enrolled_at']
+    price = fields['price']
+
+    rows = iter_in_chunks(queryset.values_list(*ASSIGNMENT_VALUES))
+    for row in rows:
+        item = dict(zip(ASSIGNMENT_COLUMNS, row))
+        item['enrolled_at'] = enrolled_at.to_representation(item['enrolled_at'])
+        item['price'] = price.to_representation(item['price']) if item['price'] is not None else None
+        thumbnail = item['thumbnail_url']
+        item['thumbnail_url'] = thumbnail.url if thumbnail else DEFAULT_THUMBNAIL
+        yield item
+
+
+class Echo:
+    """File-like object whose write() hands back the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([row[column] for column in columns])
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def streaming_export_response(queryset, export_format, filename):
+    rows = iter_assignment_rows(queryset)
+    if export_format == 'csv':
+        response = StreamingHttpResponse(stream_csv(rows, ASSIGNMENT_COLUMNS), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    else:
+        response = StreamingHttpResponse(stream_ndjson(rows), content_type='application/x-ndjson')
+    return response
@@ -0,0 +1,17 @@
+COURSE_FILTER_FIELDS = ('category', 'level', 'price_type', 'instructor')
+
+
+def get_course_filters(query_params):
+    """Return the multi-value course filters present in ``query_params``."""
+    filters = {}
+    for field in COURSE_FILTER_FIELDS:
+        values = query_params.getlist(field)
+        if values:
+            filters[field] = values
+    return filters
+
+
+def filter_courses(queryset, query_params):
+    for field, values in get_course_filters(query_params).items():
+        queryset = queryset.filter(**{f'{field}__in': values})
+    return queryset
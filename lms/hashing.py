@@ -0,0 +1,34 @@
+"""
+Password hashing spread over a process pool (used by lms/student_import.py).
+
+Pool workers are spawned and unpickle what they run from this module before
+Django is set up, so it must not import models.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+
+
+def setup_worker():
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """``make_password`` for each password, spread over ``workers`` processes."""
+    if workers is None:
+        workers = settings.STUDENT_IMPORT_WORKERS or os.cpu_count() or 1
+    # Hash with the parent's default algorithm even if the workers' settings differ.
+    hash_one = partial(make_password, salt=None, hasher=get_hasher('default').algorithm)
+    workers = min(workers, len(passwords))
+    if workers <= 1:
+        return [hash_one(password) for password in passwords]
+    # Spawned, not forked: forking a threaded server process can deadlock, and
+    # the workers must not share its database connections.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=setup_worker) as pool:
+        return list(pool.map(hash_one, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
@@ -0,0 +1,81 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from lms.models import Course, UserProfile
+from lms.serializers import CustomTokenObtainPairSerializer
+from lms.views import CourseListAPIView, CourseDetailAPIView, my_assigned_courses
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare stateless token-user authentication with the default JWTAuthentication on read endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0.0,
+            help="Simulated network round-trip added to every query.",
+        )
+
+    def handle(self, *args, **options):
+        self.latency = options['db_latency_ms'] / 1000
+        count = options['requests']
+        try:
+            with transaction.atomic():
+                self.run(count)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count):
+        user = User.objects.create_user('bench-auth', 'bench-auth@example.com', 'unused')
+        UserProfile.objects.create(user=user, role='student')
+        course = Course.objects.create(
+            title='Bench auth course', category='Manual Testing', level='Beginner',
+            price_type='Free', price=0, instructor='Mani', description='Benchmark course',
+        )
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+
+        factory = RequestFactory()
+        header = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        endpoints = [
+            ('/courses/', lambda: factory.get('/api/courses/', **header), CourseListAPIView, {}),
+            ('/courses/<pk>/', lambda: factory.get(f'/api/courses/{course.pk}/', **header), CourseDetailAPIView, {'pk': course.pk}),
+        ]
+
+        for name, make_request, view_class, kwargs in endpoints:
+            stateless = view_class.as_view()
+            stateful = view_class.as_view(authentication_classes=[JWTAuthentication])
+            for label, view in (('jwt', stateful), ('stateless', stateless)):
+                self.report(name, label, count, lambda: view(make_request(), **kwargs))
+
+        stateless = my_assigned_courses
+        stateful = my_assigned_courses.cls.as_view(authentication_classes=[JWTAuthentication])
+        for label, view in (('jwt', stateful), ('stateless', stateless)):
+            self.report('/my-courses/', label, count, lambda: view(factory.get('/api/my-courses/', **header)))
+
+    def simulate_latency(self, execute, sql, params, many, context):
+        if self.latency:
+            time.sleep(self.latency)
+        return execute(sql, params, many, context)
+
+    def report(self, name, label, count, call):
+        with connection.execute_wrapper(self.simulate_latency), CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for _ in range(count):
+                response = call()
+                assert response.status_code == 200, response.status_code
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{name:16} {label:10} {count / elapsed:9.1f} req/s  "
+            f"{elapsed / count * 1000:7.3f} ms/req  {len(captured.captured_queries) / count:.2f} queries/req"
+        )
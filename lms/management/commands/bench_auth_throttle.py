@@ -0,0 +1,151 @@
+import itertools
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from lms.datasets import DATASET_PASSWORD
+
+PREFIX = 'bench-throttle-'
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test login under a credential-stuffing attack: legitimate users log in from their own "
+        "IPs while attacker threads hammer a few accounts from a few IPs. Runs a baseline, the attack "
+        "with throttling off and the attack with throttling on, and reports legitimate throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=20, help="Measured seconds per phase.")
+        parser.add_argument('--warmup', type=float, default=20, help=(
+            "Unmeasured seconds before each phase, long enough for the attackers to spend the buckets' "
+            "initial burst so the numbers show the steady state."
+        ))
+        parser.add_argument('--legit', type=int, default=2, help="Threads of legitimate traffic.")
+        parser.add_argument('--legit-users', type=int, default=200)
+        parser.add_argument('--attackers', type=int, default=8, help="Attacker threads.")
+        parser.add_argument('--attack-ips', type=int, default=4)
+        parser.add_argument('--victims', type=int, default=2, help="Accounts the attackers target.")
+        parser.add_argument('--allow-non-sqlite', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['allow_non_sqlite']:
+            raise CommandError(
+                f"The default database is {connection.vendor}; point it at a scratch SQLite file "
+                "(or pass --allow-non-sqlite)."
+            )
+        # Threads use their own connections, so the users are committed and
+        # deleted afterwards rather than rolled back.
+        password = make_password(DATASET_PASSWORD)
+        users = User.objects.bulk_create(
+            User(username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com', password=password)
+            for i in range(options['legit_users'] + options['victims'])
+        )
+        emails = [user.email for user in users]
+        self.legit_emails, self.victims = emails[options['victims']:], emails[:options['victims']]
+        unthrottled = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {name: None for name in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']},
+        }
+        # 401s and 429s are the point here; keep the request log quiet.
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            phases = [('baseline (no attack)', False, None), ('attack, throttling off', True, unthrottled),
+                      ('attack, throttling on', True, None)]
+            results = {}
+            for label, attack, rest_framework in phases:
+                caches[settings.THROTTLE_CACHE_ALIAS].clear()
+                self.stderr.write(f"{label}...")
+                if rest_framework is None:
+                    results[label] = self.run_phase(attack, options)
+                else:
+                    with override_settings(REST_FRAMEWORK=rest_framework):
+                        results[label] = self.run_phase(attack, options)
+        finally:
+            request_logger.setLevel(level)
+            User.objects.filter(username__startswith=PREFIX).delete()
+            caches[settings.THROTTLE_CACHE_ALIAS].clear()
+
+        for label, result in results.items():
+            self.stdout.write(f"{label:<24} {json.dumps(result)}")
+
+    def run_phase(self, attack, options):
+        url = reverse('token_obtain_pair')
+        measure_from = time.monotonic() + options['warmup']
+        deadline = measure_from + options['duration']
+        legit_counter = itertools.count()
+        lock = threading.Lock()
+        samples = {'legit': [], 'attack': []}
+
+        def record(kind, status, elapsed):
+            if time.monotonic() - elapsed < measure_from:
+                return
+            with lock:
+                samples[kind].append((status, elapsed))
+
+        def legit():
+            client = Client(HTTP_HOST='localhost')
+            while time.monotonic() < deadline:
+                with lock:
+                    i = next(legit_counter) % len(self.legit_emails)
+                started = time.perf_counter()
+                response = client.post(
+                    url, {'email': self.legit_emails[i], 'password': DATASET_PASSWORD},
+                    content_type='application/json', REMOTE_ADDR=f'10.1.{i // 256}.{i % 256}',
+                )
+                record('legit', response.status_code, time.perf_counter() - started)
+            connections.close_all()
+
+        def attacker(seed):
+            client = Client(HTTP_HOST='localhost')
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = client.post(
+                    url, {'email': rng.choice(self.victims), 'password': 'wrong-password'},
+                    content_type='application/json',
+                    REMOTE_ADDR=f'203.0.113.{rng.randrange(options["attack_ips"])}',
+                )
+                record('attack', response.status_code, time.perf_counter() - started)
+            connections.close_all()
+
+        threads = [threading.Thread(target=legit) for _ in range(options['legit'])]
+        if attack:
+            threads += [threading.Thread(target=attacker, args=(n,)) for n in range(options['attackers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = options['duration']
+
+        legit_ok = [latency for status, latency in samples['legit'] if status == 200]
+        attack_statuses = [status for status, _ in samples['attack']]
+        return {
+            'legit_logins_per_s': round(len(legit_ok) / elapsed, 2),
+            'legit_p50_ms': round(statistics.median(legit_ok) * 1000, 1) if legit_ok else None,
+            'legit_p95_ms': round(percentile(legit_ok, 0.95) * 1000, 1) if legit_ok else None,
+            'legit_refused': sum(status != 200 for status, _ in samples['legit']),
+            'attack_requests_per_s': round(len(attack_statuses) / elapsed, 2),
+            'attack_throttled': sum(status == 429 for status in attack_statuses),
+            'attack_hashed': sum(status != 429 for status in attack_statuses),
+        }
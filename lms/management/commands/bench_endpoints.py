@@ -0,0 +1,298 @@
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from lms.datasets import DATASET_PASSWORD, generate_dataset, parse_scale, scale_config
+from lms.models import BatchCourse, Course, UserCourse
+from lms.serializers import CustomTokenObtainPairSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str = 'get'
+    role: str = None
+    kwargs: Callable = None
+    data: Callable = None
+    query: dict = field(default_factory=dict)
+    content_type: str = 'application/json'
+
+
+def course_fields(ctx):
+    return {
+        'title': 'Benchmark course', 'category': 'Manual Testing', 'level': 'Beginner',
+        'price_type': 'Free', 'price': '0', 'instructor': 'Mani', 'description': 'Benchmark course',
+    }
+
+
+def new_user(ctx):
+    return {'username': 'bench-new-user', 'email': 'bench-new-user@example.com', 'password': 'bench-pass-123'}
+
+
+def student_csv(batch_id, rows):
+    lines = ['username,email,password,batch'] + [
+        f'bench-import-{i},bench-import-{i}@example.com,bench-pass-{i},{batch_id}' for i in range(rows)
+    ]
+    return '\n'.join(lines).encode()
+
+
+# Mutating requests run inside a savepoint that is rolled back, so every
+# repetition sees the same data.
+ENDPOINTS = [
+    Endpoint('register', 'post', data=lambda ctx: {**new_user(ctx), 'phone': '9000000000'}),
+    Endpoint('token_obtain_pair', 'post', data=lambda ctx: {'email': ctx['student'].email, 'password': DATASET_PASSWORD}),
+    Endpoint('token_refresh', 'post', data=lambda ctx: {'refresh': str(RefreshToken.for_user(ctx['student']))}),
+    Endpoint('reset-password', 'post', role='student', data=lambda ctx: {'email': ctx['student'].email, 'password': 'bench-reset-1'}),
+    Endpoint('user-profile', role='student'),
+    Endpoint('my-assigned-courses', role='student'),
+    Endpoint('course-list', role='student'),
+    Endpoint('course-search', role='student', query={'q': 'selenium'}),
+    Endpoint('course-detail', role='student', kwargs=lambda ctx: {'pk': ctx['course'].pk}),
+    Endpoint('course-enrollment-stats', role='student', kwargs=lambda ctx: {'pk': ctx['course'].pk}),
+    Endpoint('course-access', role='student', kwargs=lambda ctx: {'pk': ctx['course'].pk}),
+    Endpoint('admin-create-user', 'post', role='admin', data=new_user),
+    Endpoint('admin-create-organization', 'post', role='admin', data=lambda ctx: {
+        **new_user(ctx), 'phone': '9000000000', 'organization_name': 'Bench Org',
+    }),
+    Endpoint('admin-add-course', 'post', role='admin', data=course_fields, content_type='multipart'),
+    Endpoint('admin-assign-course', 'post', role='admin', data=lambda ctx: {
+        'user': ctx['student'].pk, 'course': ctx['unenrolled_course'].pk,
+    }),
+    Endpoint('admin-bulk-assign-courses', 'post', role='admin', data=lambda ctx: {
+        'users': ctx['student_ids'][:20], 'courses': ctx['course_ids'][:5],
+    }),
+    Endpoint('admin-view-courses', role='admin'),
+    Endpoint('admin-list-assignments', role='admin'),
+    Endpoint('delete-user', 'delete', role='admin', kwargs=lambda ctx: {'user_id': ctx['student'].pk}),
+    Endpoint('catalog-cache-stats', role='admin'),
+    Endpoint('list-users', role='admin'),
+    Endpoint('non-admin-users', role='admin'),
+    Endpoint('org-create-user', 'post', role='organization', data=new_user),
+    Endpoint('import-students', 'post', role='organization', content_type='multipart', data=lambda ctx: {
+        'file': SimpleUploadedFile('students.csv', student_csv(ctx['batch'].pk, 5), content_type='text/csv'),
+    }),
+    Endpoint('org-add-course', 'post', role='organization', data=course_fields, content_type='multipart'),
+    Endpoint('batches-with-users', role='organization'),
+    Endpoint('org-view-courses', role='organization'),
+    Endpoint('batches-with-courses', role='organization'),
+    Endpoint('organization-profile', role='organization'),
+    Endpoint('create-batch', 'post', role='organization', data=lambda ctx: {'name': 'Bench batch'}),
+    Endpoint('list-batches', role='organization'),
+    Endpoint('assign-user-to-batch', 'post', role='organization', kwargs=lambda ctx: {'batch_id': ctx['batch'].pk},
+             data=lambda ctx: {'user_id': ctx['outsider'].pk}),
+    Endpoint('import-batch-roster', 'post', role='organization', kwargs=lambda ctx: {'batch_id': ctx['batch'].pk},
+             data=lambda ctx: {'users': ctx['student_ids'][:100]}),
+    Endpoint('assign-course-to-batch', 'post', role='organization', kwargs=lambda ctx: {'batch_id': ctx['batch'].pk},
+             data=lambda ctx: {'course_id': ctx['unassigned_course'].pk}),
+    Endpoint('list-batch-courses', role='organization', kwargs=lambda ctx: {'batch_id': ctx['batch'].pk}),
+    Endpoint('view-users-in-batch', role='organization', kwargs=lambda ctx: {'batch_id': ctx['batch'].pk}),
+    Endpoint('remove_course_by_name', 'delete', role='organization', data=lambda ctx: {
+        'batch_id': ctx['batch'].pk, 'course_title': ctx['batch_course'].title,
+    }),
+    Endpoint('list-all-batch-courses', role='organization'),
+    Endpoint('remove-user-from-batch', 'delete', role='organization', kwargs=lambda ctx: {
+        'batch_id': ctx['batch'].pk, 'username': ctx['member'].username,
+    }),
+]
+
+
+def lms_url_names():
+    resolver = get_resolver()
+    for pattern in resolver.url_patterns:
+        if getattr(pattern, 'urlconf_name', None) is not None and getattr(pattern.urlconf_module, '__name__', '') == 'lms.urls':
+            return [p.name for p in pattern.url_patterns if isinstance(p, URLPattern) and p.name]
+    return []
+
+
+def build_context():
+    admin = User.objects.get(username='bench-admin')
+    batch_course = BatchCourse.objects.select_related('batch__organization__user', 'course').filter(
+        batch__users__isnull=False,
+    ).order_by('id').first()
+    batch = batch_course.batch
+    member = batch.users.order_by('id').first()
+    student = User.objects.filter(username__startswith='bench-', enrollments__isnull=False).order_by('id').first()
+    enrolled = UserCourse.objects.filter(user=student).values('course_id')
+    assigned = BatchCourse.objects.filter(batch=batch).values('course_id')
+    students = User.objects.filter(userprofile__role='student', username__startswith='bench-')
+    ctx = {
+        'admin': admin,
+        'organization': batch.organization.user,
+        'student': student,
+        'batch': batch,
+        'batch_course': batch_course.course,
+        'member': member,
+        'outsider': students.exclude(batches=batch).order_by('id').first(),
+        'course': Course.objects.order_by('id').first(),
+        'unenrolled_course': Course.objects.exclude(id__in=enrolled).order_by('id').first(),
+        'unassigned_course': Course.objects.exclude(id__in=assigned).exclude(batches=batch).order_by('id').first(),
+        'student_ids': list(students.order_by('id').values_list('id', flat=True)[:100]),
+        'course_ids': list(Course.objects.order_by('id').values_list('id', flat=True)[:5]),
+    }
+    ctx['tokens'] = {
+        role: str(CustomTokenObtainPairSerializer.get_token(ctx[role]).access_token)
+        for role in ('admin', 'organization', 'student')
+    }
+    return ctx
+
+
+def endpoint_client(endpoint, ctx):
+    url = reverse(endpoint.name, kwargs=endpoint.kwargs(ctx) if endpoint.kwargs else None)
+    headers = {'HTTP_HOST': 'localhost'}
+    if endpoint.role:
+        headers['HTTP_AUTHORIZATION'] = f"Bearer {ctx['tokens'][endpoint.role]}"
+    return url, Client(**headers)
+
+
+def send_request(client, endpoint, url, ctx):
+    method = getattr(client, endpoint.method)
+    if endpoint.method == 'get':
+        return method(url, endpoint.query)
+    data = endpoint.data(ctx) if endpoint.data else {}
+    if endpoint.content_type == 'multipart':
+        return method(url, data)
+    return method(url, json.dumps(data), content_type=endpoint.content_type)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every endpoint in lms/urls.py against generated datasets at several scales and "
+        "write a JSON report (timings and query counts) that can be diffed between releases. "
+        "Run it against a scratch SQLite database; each scale is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1k,10k,100k', help="Comma-separated: 1k, 10k, 100k or row counts.")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--allow-non-sqlite', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['allow_non_sqlite']:
+            raise CommandError(
+                f"The default database is {connection.vendor}; point it at a scratch SQLite file "
+                "(or pass --allow-non-sqlite)."
+            )
+        covered = {endpoint.name for endpoint in ENDPOINTS}
+        uncovered = sorted(set(lms_url_names()) - covered)
+        if uncovered:
+            self.stderr.write(f"No benchmark spec for: {', '.join(uncovered)}")
+
+        report = {
+            'meta': self.metadata(options),
+            'uncovered': uncovered,
+            'scales': {},
+        }
+        # 4xx responses are expected for some specs; keep the request log quiet.
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            for scale in options['scales'].split(','):
+                rows = parse_scale(scale.strip())
+                self.stderr.write(f"Scale {scale.strip()} ({rows} rows)...")
+                report['scales'][scale.strip()] = self.run_scale(rows, options)
+        finally:
+            request_logger.setLevel(level)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def metadata(self, options):
+        try:
+            revision = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            revision = None
+        return {
+            'generated_at': timezone.now().isoformat(),
+            'revision': revision,
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'seed': options['seed'],
+            'async_read_views': settings.ASYNC_READ_VIEWS,
+        }
+
+    def run_scale(self, rows, options):
+        result = {}
+        try:
+            with transaction.atomic():
+                config = scale_config(rows)
+                started = time.perf_counter()
+                counts = generate_dataset(seed=options['seed'], prefix='bench', **config)
+                result['dataset'] = {**counts, 'generate_seconds': round(time.perf_counter() - started, 3)}
+                ctx = build_context()
+                result['endpoints'] = {
+                    endpoint.name: self.measure(endpoint, ctx, options['repeat']) for endpoint in ENDPOINTS
+                }
+                raise Rollback
+        except Rollback:
+            pass
+        cache.clear()
+        return result
+
+    def measure(self, endpoint, ctx, repeat):
+        url, client = endpoint_client(endpoint, ctx)
+
+        timings, queries, status = [], [], None
+        for _ in range(repeat):
+            # Cold catalog cache, so query counts are stable and comparable.
+            cache.clear()
+            try:
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = send_request(client, endpoint, url, ctx)
+                        timings.append(time.perf_counter() - started)
+                    raise Rollback
+            except Rollback:
+                pass
+            queries.append(len(captured.captured_queries))
+            status = response.status_code
+        return {
+            'method': endpoint.method.upper(),
+            'path': url,
+            'status': status,
+            'queries': max(queries),
+            'median_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+            'min_ms': round(min(timings) * 1000, 3),
+        }
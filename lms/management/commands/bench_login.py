@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from lms.models import UserProfile
+from lms.serializers import CustomTokenObtainPairSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the login serializer against the previous double-hash login path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        email = 'bench-login@example.com'
+        password = 'bench-login-password'
+
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user('bench-login', email, password)
+                UserProfile.objects.create(user=user, role='student')
+
+                legacy = self.measure(iterations, lambda: self.legacy_login(email, password))
+                current = self.measure(iterations, lambda: self.current_login(email, password))
+                raise Rollback
+        except Rollback:
+            pass
+
+        for label, (elapsed, queries) in (('legacy', legacy), ('current', current)):
+            self.stdout.write(
+                f"{label:8} {iterations / elapsed:8.2f} logins/s  "
+                f"{elapsed / iterations * 1000:8.1f} ms/login  {queries / iterations:.1f} queries/login"
+            )
+        self.stdout.write(f"speedup  {legacy[0] / current[0]:.2f}x")
+
+    def measure(self, iterations, login):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                login()
+            elapsed = time.perf_counter() - started
+        return elapsed, len(captured.captured_queries)
+
+    def current_login(self, email, password):
+        serializer = CustomTokenObtainPairSerializer(data={'email': email, 'password': password})
+        serializer.is_valid(raise_exception=True)
+
+    def legacy_login(self, email, password):
+        # Mirrors the pre-optimization flow: email lookup, check_password,
+        # authenticate() (second hash), then a profile get_or_create.
+        user = User.objects.get(email=email)
+        user.check_password(password)
+        authenticate(username=user.username, password=password)
+        UserProfile.objects.get_or_create(user=user, defaults={'role': 'student'})
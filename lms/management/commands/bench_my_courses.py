@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import force_authenticate
+
+from lms.models import Course, UserCourse, OrganizationProfile, Batch, BatchCourse
+from lms.views import my_assigned_courses
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark /my-courses/ for a student who belongs to many batches of one organization."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batches', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=500)
+        parser.add_argument('--courses-per-batch', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=13)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                student = self.build(options)
+                self.measure(student, options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def build(self, options):
+        rng = random.Random(options['seed'])
+        org_user = User.objects.create_user('bench-org', 'bench-org@example.com', 'unused')
+        org = OrganizationProfile.objects.create(user=org_user, organization_name='Bench Org')
+        student = User.objects.create_user('bench-student', 'bench-student@example.com', 'unused')
+
+        courses = Course.objects.bulk_create([
+            Course(
+                title=f'Bench course {i}', category='Manual Testing', level='Beginner',
+                price_type='Free', price=0, instructor='Mani', description='Benchmark course',
+            )
+            for i in range(options['courses'])
+        ])
+        batches = Batch.objects.bulk_create([
+            Batch(name=f'Bench batch {i}', organization=org) for i in range(options['batches'])
+        ])
+        Batch.users.through.objects.bulk_create([
+            Batch.users.through(batch_id=batch.id, user_id=student.id) for batch in batches
+        ])
+        batch_courses, links = [], []
+        for batch in batches:
+            picked = rng.sample(courses, options['courses_per_batch'])
+            half = len(picked) // 2
+            batch_courses += [BatchCourse(batch=batch, course=course) for course in picked[:half]]
+            links += [Batch.courses.through(batch_id=batch.id, course_id=course.id) for course in picked[half:]]
+        BatchCourse.objects.bulk_create(batch_courses)
+        Batch.courses.through.objects.bulk_create(links)
+        UserCourse.objects.bulk_create([
+            UserCourse(user=student, course=course) for course in rng.sample(courses, 20)
+        ])
+        self.stdout.write(
+            f"{options['batches']} batches, {len(batch_courses) + len(links)} batch-course rows, "
+            f"{options['courses']} courses"
+        )
+        return student
+
+    def measure(self, student, count):
+        factory = RequestFactory(HTTP_HOST='localhost')
+        for label, params in (('full list', {}), ('page of 20', {'page_size': 20})):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                for _ in range(count):
+                    request = factory.get('/api/my-courses/', params)
+                    force_authenticate(request, user=student)
+                    response = my_assigned_courses(request)
+                elapsed = time.perf_counter() - started
+            data = response.data['results'] if 'results' in response.data else response.data
+            self.stdout.write(
+                f"{label:12} {elapsed / count * 1000:8.2f} ms/req  "
+                f"{len(captured.captured_queries) / count:.1f} queries/req  {len(data)} courses"
+            )
@@ -0,0 +1,94 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.serializers import CustomTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server's read endpoints with N concurrent keep-alive connections and "
+        "report throughput and latency percentiles. Run it once against the WSGI deployment "
+        "(e.g. gunicorn lmsbacknd.wsgi) and once against ASGI (e.g. uvicorn lmsbacknd.asgi:application) "
+        "to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run.")
+        parser.add_argument('--user', help="Username to mint an access token for.")
+        parser.add_argument('--token', help="Access token to send instead of minting one.")
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help="Endpoint to hit (repeatable). Defaults to the course catalog and /my-courses/.",
+        )
+
+    def handle(self, *args, **options):
+        token = options['token']
+        if not token:
+            if not options['user']:
+                raise CommandError("Pass --token or --user.")
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}.")
+            token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+        target = urlsplit(options['url'])
+        paths = options['paths'] or ['/api/courses/', '/api/my-courses/']
+        headers = {'Authorization': f'Bearer {token}', 'Connection': 'keep-alive'}
+        deadline = time.perf_counter() + options['duration']
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(offset):
+            conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            local, failed, i = [], 0, offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    failed += 1
+                    conn.close()
+                    conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                    continue
+                if response.status != 200:
+                    failed += 1
+                local.append(time.perf_counter() - started)
+            conn.close()
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if not latencies:
+            raise CommandError(f"No responses from {options['url']}.")
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(
+            f"{options['url']}  concurrency={options['concurrency']}  "
+            f"requests={len(latencies)}  errors={sum(errors)}\n"
+            f"  throughput {len(latencies) / elapsed:.1f} req/s\n"
+            f"  latency p50 {percentile(0.50):.1f} ms  p90 {percentile(0.90):.1f} ms  "
+            f"p99 {percentile(0.99):.1f} ms"
+        )
@@ -0,0 +1,79 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from lms.models import Course, UserCourse
+from lms.renderers import FastJSONRenderer, orjson
+from lms.serializers import CourseSerializer, UserCourseDetailSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare JSON render time and bytes on the wire (raw and gzip) for large list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                payloads = self.build_payloads(options['rows'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer uses the stdlib encoder."))
+        renderers = [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]
+        for name, data in payloads.items():
+            self.stdout.write(f"{name} ({len(data)} rows)")
+            outputs = {}
+            for label, renderer in renderers:
+                elapsed, body = self.time(lambda: renderer.render(data), options['repeat'])
+                outputs[label] = body
+                self.stdout.write(f"  {label:<17} render {elapsed * 1000:8.1f} ms  {len(body):>10} bytes")
+            gzip_time, compressed = self.time(lambda: compress_string(outputs['FastJSONRenderer']), options['repeat'])
+            ratio = len(compressed) / len(outputs['FastJSONRenderer'])
+            self.stdout.write(
+                f"  {'gzip':<17} encode {gzip_time * 1000:8.1f} ms  {len(compressed):>10} bytes ({ratio:.0%})"
+            )
+            if outputs['JSONRenderer'] != outputs['FastJSONRenderer']:
+                self.stdout.write(self.style.ERROR("  renderer outputs differ"))
+
+    def time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), result
+
+    def build_payloads(self, rows):
+        courses = Course.objects.bulk_create(
+            Course(
+                title=f'Bench course {i}', category='Manual Testing', level='Beginner',
+                price_type='Paid', price='499.00', old_price='999.00', instructor='Mani',
+                description='Benchmark course ' * 8,
+            )
+            for i in range(rows)
+        )
+        users = User.objects.bulk_create(
+            User(username=f'bench-render-{i}', email=f'bench-render-{i}@example.com') for i in range(rows)
+        )
+        UserCourse.objects.bulk_create(
+            UserCourse(user=user, course=course) for user, course in zip(users, courses)
+        )
+        assignments = UserCourse.objects.filter(user__in=users).select_related('user', 'course')
+        return {
+            '/courses/': CourseSerializer(Course.objects.filter(pk__in=[c.pk for c in courses]), many=True).data,
+            '/admin/list-assignments/': UserCourseDetailSerializer(assignments, many=True).data,
+        }
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from lms.models import Course
+from lms.storage import dedupe_directory
+
+
+class Command(BaseCommand):
+    help = "Deduplicate the course image directory in place, keeping one content-addressed copy per image."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be removed without changing anything.")
+
+    def handle(self, *args, **options):
+        field = Course._meta.get_field('image')
+        directory = field.upload_to.rstrip('/')
+        report = dedupe_directory(field.storage, directory, dry_run=options['dry_run'])
+        verb, repoint = ("Would remove", "would repoint") if options['dry_run'] else ("Removed", "repointed")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {report['files']} files in {directory}/: {report['objects']} distinct images. "
+            f"{verb} {report['removed']} duplicates ({report['bytes_reclaimed']} bytes), "
+            f"{repoint} {report['courses_updated']} courses."
+        ))
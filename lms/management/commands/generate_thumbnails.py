@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from lms.models import Course
+from lms.thumbnails import fetch_source, generate_variants
+
+
+class Command(BaseCommand):
+    help = "Generate card thumbnail variants for courses whose thumbnail has none yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate the map for every course with a thumbnail.")
+        parser.add_argument('--course', type=int, action='append', dest='course_ids')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.exclude(thumbnail__isnull=True).exclude(thumbnail='').only('id', 'thumbnail', 'thumbnails')
+        if options['course_ids']:
+            courses = courses.filter(id__in=options['course_ids'])
+        done = failed = 0
+        for course in courses.order_by('id').iterator():
+            if course.thumbnails and not options['all']:
+                continue
+            try:
+                with fetch_source(course.thumbnail.url) as source:
+                    course.thumbnails = generate_variants(source)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Course {course.id}: {exc}")
+                continue
+            course.save(update_fields=['thumbnails', 'updated_at'])
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} courses, {failed} failed."))
@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms.models import Batch, OrganizationProfile
+from lms.student_import import StudentImportError, import_students, read_student_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Create student accounts from a CSV (username, email, password and optional phone, "
+        "referral_code, batch columns). Prints a summary; --report writes the per-row results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--organization', help="Organization user's username; batches are looked up within it.")
+        parser.add_argument('--batch', type=int, help="Batch id for rows without a batch column.")
+        parser.add_argument('--workers', type=int, help="Hashing processes (default: STUDENT_IMPORT_WORKERS or one per CPU).")
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--dry-run', action='store_true', help="Validate only.")
+        parser.add_argument('--report', help="Write the per-row report here.")
+
+    def handle(self, *args, **options):
+        organization_id = None
+        if options['organization']:
+            try:
+                organization_id = OrganizationProfile.objects.get(user__username=options['organization']).id
+            except OrganizationProfile.DoesNotExist:
+                raise CommandError(f"No organization user named {options['organization']!r}.")
+        if options['batch'] is not None:
+            batches = Batch.objects.filter(id=options['batch'])
+            if organization_id is not None:
+                batches = batches.filter(organization_id=organization_id)
+            if not batches.exists():
+                raise CommandError(f"Batch {options['batch']} not found.")
+
+        try:
+            with open(options['csv_file'], 'rb') as file:
+                rows = read_student_csv(file)
+        except (OSError, StudentImportError) as exc:
+            raise CommandError(exc)
+
+        report = import_students(
+            rows, organization_id, options['batch'], workers=options['workers'],
+            chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+        )
+        if options['report']:
+            with open(options['report'], 'w') as file:
+                json.dump(report, file, indent=2)
+        for entry in report['results']:
+            if 'errors' in entry:
+                self.stderr.write(f"Row {entry['row']} ({entry['username'] or '-'}): {'; '.join(entry['errors'])}")
+
+        if options['dry_run']:
+            message = f"{report['rows'] - report['failed']} of {report['rows']} rows are valid."
+        else:
+            message = f"Created {report['created']} of {report['rows']} students."
+        style = self.style.WARNING if report['failed'] else self.style.SUCCESS
+        self.stdout.write(style(message))
@@ -0,0 +1,106 @@
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from lms.datasets import generate_dataset, parse_scale, scale_config
+from lms.explain import explain, is_explainable
+
+from .bench_endpoints import ENDPOINTS, Endpoint, Rollback, build_context, endpoint_client, send_request
+
+# The catalog filters and orderings, which the plain ENDPOINTS specs don't use.
+FILTER_PROBES = [
+    Endpoint('course-list', role='student', query={'category': 'API Testing'}),
+    Endpoint('course-list', role='student', query={'level': 'Beginner', 'page_size': '20'}),
+    Endpoint('course-list', role='student', query={'price_type': 'Free', 'page_size': '20'}),
+    Endpoint('course-list', role='student', query={'instructor': 'Mani', 'page_size': '20'}),
+    Endpoint('course-list', role='student', query={'ordering': 'category', 'page_size': '20'}),
+    Endpoint('admin-view-courses', role='admin', query={'category': 'API Testing'}),
+]
+
+# Scans that are the right plan: these list nearly every row of the table.
+EXPECTED_SCANS = {
+    'list-users': {'auth_user'},
+    'non-admin-users': {'auth_user'},
+}
+
+
+def probe_label(endpoint):
+    label = f'{endpoint.method.upper()} {endpoint.name}'
+    return f'{label}?{urlencode(endpoint.query)}' if endpoint.query else label
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the queries every endpoint in lms/urls.py runs against a generated dataset, "
+        "EXPLAIN each one and flag filtered queries whose plan scans a whole table. "
+        "Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='1k', help="1k, 10k, 100k or a row count.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--show-plans', action='store_true', help="Print the plan of every query, not just flagged ones.")
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if anything is flagged.")
+        parser.add_argument('--allow-non-sqlite', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['allow_non_sqlite']:
+            raise CommandError(
+                f"The default database is {connection.vendor}; point it at a scratch SQLite file "
+                "(or pass --allow-non-sqlite)."
+            )
+        try:
+            with transaction.atomic():
+                generate_dataset(seed=options['seed'], prefix='bench', **scale_config(parse_scale(options['scale'])))
+                if connection.vendor == 'sqlite':
+                    # Give the planner row statistics, as a long-lived database would have.
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+                ctx = build_context()
+                flagged = sum(self.advise(endpoint, ctx, options['show_plans']) for endpoint in ENDPOINTS + FILTER_PROBES)
+                raise Rollback
+        except Rollback:
+            pass
+        cache.clear()
+
+        if flagged:
+            message = f"{flagged} filtered quer{'y' if flagged == 1 else 'ies'} scan a whole table."
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("Every filtered query is served by an index."))
+
+    def advise(self, endpoint, ctx, show_plans):
+        statements = []
+
+        def collect(execute, sql, params, many, context):
+            if not many and is_explainable(sql) and (sql, params) not in statements:
+                statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        url, client = endpoint_client(endpoint, ctx)
+        cache.clear()
+        try:
+            with transaction.atomic():
+                with connection.execute_wrapper(collect):
+                    response = send_request(client, endpoint, url, ctx)
+                # Explain inside the savepoint, while the request's writes are visible.
+                plans = [explain(sql, params) for sql, params in statements]
+                raise Rollback
+        except Rollback:
+            pass
+
+        expected = EXPECTED_SCANS.get(endpoint.name, set())
+        flagged = [plan for plan in plans if plan.flagged and not set(plan.full_scans) <= expected]
+        status = self.style.ERROR('SCAN') if flagged else self.style.SUCCESS('ok  ')
+        self.stdout.write(f"{status} {probe_label(endpoint)} [{response.status_code}] {len(plans)} queries")
+        for plan in plans:
+            if plan in flagged or show_plans:
+                marker = 'full scan of ' + ', '.join(plan.full_scans) if plan in flagged else 'plan'
+                self.stdout.write(f"     {marker}: {plan.sql}")
+                for line in plan.lines:
+                    self.stdout.write(f"       {line}")
+        return len(flagged)
@@ -0,0 +1,34 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms.media import claim_job, get_media_target, process_job
+
+
+class Command(BaseCommand):
+    help = "Run the media upload worker: push staged course thumbnails and videos to the media target."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when no job is runnable instead of polling.")
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}')
+
+    def handle(self, *args, **options):
+        target = get_media_target()
+        done = failed = 0
+        while True:
+            job = claim_job(options['worker_id'])
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            if process_job(job, target):
+                done += 1
+                self.stdout.write(f"Uploaded {job.field} for course {job.course_id}.")
+            else:
+                failed += 1
+                self.stderr.write(f"Upload of {job.field} for course {job.course_id} failed; see logs.")
+        self.stdout.write(self.style.SUCCESS(f"{done} uploaded, {failed} failed."))
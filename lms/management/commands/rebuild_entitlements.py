@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from lms.entitlements import rebuild_entitlements
+
+
+class Command(BaseCommand):
+    help = "Regenerate the user->course entitlement index from the enrollment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('id').values_list('id', flat=True)
+        written = rebuild_entitlements(user_ids.iterator(), chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} entitlement rows."))
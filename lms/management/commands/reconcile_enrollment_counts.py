@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from lms.counters import reconcile_enrollment_counts
+
+
+class Command(BaseCommand):
+    help = "Recount Course enrollment counters from the enrollment tables and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        checked, repaired = reconcile_enrollment_counts(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} courses, repaired {repaired}."))
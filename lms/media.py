@@ -0,0 +1,241 @@
+"""
+Deferred course media uploads.
+
+The add-course views stage ``thumbnail`` and ``video_file`` uploads on local
+disk (the ``media_staging`` storage), create the course with
+``media_status='processing'`` and queue one MediaUploadJob per file. A worker
+(``manage.py process_media_uploads``) claims jobs from the table and pushes
+them to the configured media target in chunks; a finished thumbnail also gets
+its card-sized variants (lms/thumbnails.py). Progress is recorded after
+every acknowledged chunk, so a retry resumes where the last attempt stopped.
+
+Targets are configured like storages::
+
+    MEDIA_UPLOAD_TARGET = {'BACKEND': 'lms.media.LocalMediaTarget', 'OPTIONS': {'location': ...}}
+
+and implement ``upload_chunk(job, data, offset, total)``. It returns the
+value to store in the course field once the final chunk is accepted, and
+``None`` before that.
+"""
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+import cloudinary
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Course, MediaUploadJob
+from .thumbnails import generate_variants
+
+logger = logging.getLogger(__name__)
+
+DEFERRED_FIELDS = ('thumbnail', 'video_file')
+
+
+class LocalMediaTarget:
+    """Filesystem stand-in for Cloudinary, for tests and local development."""
+
+    def __init__(self, location=None):
+        self.location = str(location or os.path.join(settings.BASE_DIR, 'media_uploads'))
+
+    def upload_chunk(self, job, data, offset, total):
+        resource_type = resource_type_for(job.field)
+        partial = os.path.join(self.location, f'{job.upload_id}.part')
+        os.makedirs(self.location, exist_ok=True)
+        with open(partial, 'r+b' if os.path.exists(partial) else 'wb') as file:
+            file.seek(offset)
+            file.write(data)
+            file.truncate()
+        if offset + len(data) < total:
+            return None
+
+        extension = os.path.splitext(job.file_name)[1].lower()
+        job.public_id = job.upload_id
+        directory = os.path.join(self.location, resource_type, 'upload')
+        os.makedirs(directory, exist_ok=True)
+        os.replace(partial, os.path.join(directory, job.public_id + extension))
+        return f'{resource_type}/upload/{job.public_id}{extension}'
+
+
+class CloudinaryMediaTarget:
+    """Cloudinary chunked upload API (``X-Unique-Upload-Id`` + ``Content-Range``)."""
+
+    def upload_chunk(self, job, data, offset, total):
+        from cloudinary import uploader
+
+        options = {'resource_type': resource_type_for(job.field)}
+        if job.public_id:
+            options['public_id'] = job.public_id
+        result = uploader.upload_large_part(
+            (job.file_name, data),
+            http_headers={
+                'Content-Range': f'bytes {offset}-{offset + len(data) - 1}/{total}',
+                'X-Unique-Upload-Id': job.upload_id,
+            },
+            **options,
+        )
+        job.public_id = result.get('public_id', job.public_id)
+        if offset + len(data) < total:
+            return None
+        return cloudinary.CloudinaryResource(
+            public_id=result['public_id'], format=result.get('format'), version=result.get('version'),
+            type=result.get('type', 'upload'), resource_type=result.get('resource_type'),
+        ).get_prep_value()
+
+
+def get_media_target():
+    config = settings.MEDIA_UPLOAD_TARGET
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+def get_staging_storage():
+    return storages['media_staging']
+
+
+def resource_type_for(field):
+    return Course._meta.get_field(field).resource_type
+
+
+def save_course_with_deferred_media(serializer, **kwargs):
+    """
+    ``serializer.save(**kwargs)`` without uploading media inside the request:
+    uploaded files are staged locally and queued instead.
+    """
+    uploads = {
+        name: serializer.validated_data.pop(name)
+        for name in DEFERRED_FIELDS
+        if isinstance(serializer.validated_data.get(name), UploadedFile)
+    }
+    if not uploads:
+        return serializer.save(**kwargs)
+
+    staging = get_staging_storage()
+    staged = {}
+    try:
+        for name, upload in uploads.items():
+            extension = os.path.splitext(upload.name)[1].lower()
+            staged[name] = staging.save(f'{name}/{uuid.uuid4().hex}{extension}', upload)
+        with transaction.atomic():
+            course = serializer.save(media_status=Course.MEDIA_PROCESSING, **kwargs)
+            MediaUploadJob.objects.bulk_create([
+                MediaUploadJob(
+                    course=course, field=name, staged_name=staged[name],
+                    file_name=upload.name, size=upload.size,
+                )
+                for name, upload in uploads.items()
+            ])
+    except Exception:
+        for staged_name in staged.values():
+            staging.delete(staged_name)
+        raise
+    return course
+
+
+def claim_job(worker_id):
+    """Lease the next runnable job to ``worker_id``, or return ``None``."""
+    now = timezone.now()
+    runnable = Q(status=MediaUploadJob.PENDING, available_at__lte=now) | Q(
+        status=MediaUploadJob.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.MEDIA_UPLOAD_LEASE_SECONDS),
+    )
+    candidates = MediaUploadJob.objects.filter(runnable).order_by('available_at', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:10]:
+        # A conditional UPDATE is the lock: whichever worker flips the row wins.
+        claimed = MediaUploadJob.objects.filter(runnable, pk=job_id).update(
+            status=MediaUploadJob.RUNNING, locked_by=worker_id, locked_at=now,
+        )
+        if claimed:
+            return MediaUploadJob.objects.get(pk=job_id)
+    return None
+
+
+def process_job(job, target=None):
+    """Upload a claimed job; returns True once the course field is set."""
+    target = target or get_media_target()
+    try:
+        value = upload_staged_file(job, target)
+    except Exception as exc:
+        logger.exception("Media upload job %s failed (attempt %s)", job.pk, job.attempts + 1)
+        fail_job(job, exc)
+        return False
+    complete_job(job, value)
+    return True
+
+
+def upload_staged_file(job, target):
+    if not job.upload_id:
+        job.upload_id = uuid.uuid4().hex
+        MediaUploadJob.objects.filter(pk=job.pk).update(upload_id=job.upload_id)
+
+    chunk_size = settings.MEDIA_UPLOAD_CHUNK_SIZE
+    offset = job.bytes_uploaded
+    with get_staging_storage().open(job.staged_name, 'rb') as source:
+        source.seek(offset)
+        while True:
+            data = source.read(chunk_size)
+            value = target.upload_chunk(job, data, offset, job.size)
+            offset += len(data)
+            if offset >= job.size:
+                return value
+            job.bytes_uploaded = offset
+            MediaUploadJob.objects.filter(pk=job.pk).update(
+                bytes_uploaded=offset, public_id=job.public_id, locked_at=timezone.now(),
+            )
+
+
+def complete_job(job, value):
+    fields = {job.field: value}
+    if job.field == 'thumbnail':
+        # The staged copy is still local, so card variants are cut from it here.
+        fields['thumbnails'] = staged_thumbnail_variants(job)
+    with transaction.atomic():
+        MediaUploadJob.objects.filter(pk=job.pk).update(
+            status=MediaUploadJob.DONE, bytes_uploaded=job.size, public_id=job.public_id,
+            locked_by='', locked_at=None, last_error='',
+        )
+        course = Course.objects.select_for_update().get(pk=job.course_id)
+        for name, field_value in fields.items():
+            setattr(course, name, field_value)
+        course.media_status = media_status_for(course.pk)
+        course.save(update_fields=[*fields, 'media_status', 'updated_at'])
+    get_staging_storage().delete(job.staged_name)
+
+
+def staged_thumbnail_variants(job):
+    try:
+        with get_staging_storage().open(job.staged_name, 'rb') as source:
+            return generate_variants(source)
+    except Exception:
+        logger.exception("Could not generate thumbnail variants for course %s", job.course_id)
+        return {}
+
+
+def fail_job(job, exc):
+    attempts = job.attempts + 1
+    fields = {'attempts': attempts, 'last_error': repr(exc), 'locked_by': '', 'locked_at': None}
+    if attempts >= settings.MEDIA_UPLOAD_MAX_ATTEMPTS:
+        MediaUploadJob.objects.filter(pk=job.pk).update(status=MediaUploadJob.FAILED, **fields)
+        course = Course.objects.get(pk=job.course_id)
+        course.media_status = Course.MEDIA_FAILED
+        course.save(update_fields=['media_status', 'updated_at'])
+    else:
+        delay = settings.MEDIA_UPLOAD_RETRY_DELAY * 2 ** (attempts - 1)
+        MediaUploadJob.objects.filter(pk=job.pk).update(
+            status=MediaUploadJob.PENDING, available_at=timezone.now() + timedelta(seconds=delay), **fields,
+        )
+
+
+def media_status_for(course_id):
+    statuses = set(MediaUploadJob.objects.filter(course_id=course_id).values_list('status', flat=True))
+    if MediaUploadJob.FAILED in statuses:
+        return Course.MEDIA_FAILED
+    if statuses & {MediaUploadJob.PENDING, MediaUploadJob.RUNNING}:
+        return Course.MEDIA_PROCESSING
+    return Course.MEDIA_READY
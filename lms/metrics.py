@@ -0,0 +1,261 @@
+"""
+Per-request instrumentation.
+
+RequestMetricsMiddleware records, for every request, the number of SQL
+queries, time spent in the database, time spent rendering the response body
+(serialization) and total latency. The numbers go out in a ``Server-Timing``
+header and into an in-process registry that ``/metrics`` exposes in the
+Prometheus text format, labelled by the URL name the request resolved to.
+
+Queries are timed by a wrapper installed on every database connection as it
+is opened, so ORM calls that async views push to a worker thread are counted
+too; the per-request totals live in a context variable. Queries slower than
+``SLOW_QUERY_THRESHOLD_MS`` are logged to ``lms.slow_queries``.
+
+The registry is per process: with several workers, each exposes its own
+counters and Prometheus sums them per instance.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+slow_query_logger = logging.getLogger('lms.slow_queries')
+
+UNMATCHED = 'unmatched'
+
+_current = ContextVar('lms_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view_name = UNMATCHED
+
+    def server_timing(self, total):
+        app = max(total - self.db_time - self.serialize_time, 0.0)
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.1f}',
+            f'app;dur={app * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def serializing():
+    """Count the enclosed block as serialization time for the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.serialize_time += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_time += duration
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold and duration * 1000 >= threshold:
+            REGISTRY.record_slow_query(metrics.view_name if metrics else UNMATCHED)
+            slow_query_logger.warning(
+                "Slow query (%.1f ms) in %s: %s", duration * 1000,
+                metrics.view_name if metrics else UNMATCHED, sql,
+                extra={'duration': duration, 'sql': sql, 'params': params},
+            )
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created fires on every reconnect of the same wrapper.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latency = {}
+        self.requests = {}
+        self.queries = {}
+        self.db_seconds = {}
+        self.serialize_seconds = {}
+        self.slow_queries = {}
+
+    def record_request(self, view, method, status, metrics, total):
+        with self.lock:
+            histogram = self.latency.get((view, method))
+            if histogram is None:
+                histogram = self.latency[(view, method)] = Histogram(settings.METRICS_LATENCY_BUCKETS)
+            histogram.observe(total)
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.queries[view] = self.queries.get(view, 0) + metrics.queries
+            self.db_seconds[view] = self.db_seconds.get(view, 0.0) + metrics.db_time
+            self.serialize_seconds[view] = self.serialize_seconds.get(view, 0.0) + metrics.serialize_time
+
+    def record_slow_query(self, view):
+        with self.lock:
+            self.slow_queries[view] = self.slow_queries.get(view, 0) + 1
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines += [
+                '# HELP lms_http_request_duration_seconds Request latency by URL name.',
+                '# TYPE lms_http_request_duration_seconds histogram',
+            ]
+            for (view, method), histogram in sorted(self.latency.items()):
+                labels = f'view="{escape(view)}",method="{method}"'
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'lms_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'lms_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'lms_http_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'lms_http_request_duration_seconds_count{{{labels}}} {histogram.count}')
+            lines += [
+                '# HELP lms_http_requests_total Responses by URL name, method and status.',
+                '# TYPE lms_http_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'lms_http_requests_total{{view="{escape(view)}",method="{method}",status="{status}"}} {count}'
+                )
+            for name, kind, help_text, values in [
+                ('lms_db_queries_total', 'counter', 'SQL queries run by requests.', self.queries),
+                ('lms_db_query_seconds_total', 'counter', 'Time requests spent in the database.', self.db_seconds),
+                ('lms_serialize_seconds_total', 'counter', 'Time spent rendering response bodies.',
+                 self.serialize_seconds),
+                ('lms_db_slow_queries_total', 'counter', 'Queries over SLOW_QUERY_THRESHOLD_MS.', self.slow_queries),
+            ]:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                for view, value in sorted(values.items()):
+                    lines.append(f'{name}{{view="{escape(view)}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = MetricsRegistry()
+
+
+def view_name_for(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED
+    return match.url_name or match.view_name or UNMATCHED
+
+
+class RequestMetricsMiddleware:
+    """Keep this first in MIDDLEWARE so the total covers the other middleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_name = view_name_for(request)
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered by the handler after the view returns;
+        # that render is the serialization step.
+        metrics = _current.get()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.serialize_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        view = view_name_for(request)
+        if view != 'metrics':
+            REGISTRY.record_request(view, request.method, response.status_code, metrics, total)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(total)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS_TOKEN unless DEBUG is on."""
+    token = settings.METRICS_TOKEN
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not constant_time_compare(supplied, token):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from lms.search import drop_search_index, install_search_index
+
+
+def create_index(apps, schema_editor):
+    install_search_index(schema_editor.connection, rebuild=True)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0012_alter_batch_courses'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
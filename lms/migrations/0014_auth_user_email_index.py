@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+EMAIL_INDEX = models.Index(fields=['email'], name='lms_auth_user_email_idx')
+
+
+def add_email_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+    """
+    Index auth_user.email, which login, registration and password reset
+    look users up by. auth.User's Meta is not ours to change, so the index
+    is added through the schema editor without touching the auth app state.
+    """
+
+    dependencies = [
+        ('lms', '0013_course_search_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
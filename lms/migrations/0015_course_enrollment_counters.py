@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0014_auth_user_email_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='batch_enrollments',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='direct_enrollments',
+            field=models.IntegerField(default=0),
+        ),
+    ]
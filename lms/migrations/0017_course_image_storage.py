@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:46
+
+import lms.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0016_courseentitlement'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=lms.storage.course_image_storage, upload_to='courses/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0018_media_upload_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
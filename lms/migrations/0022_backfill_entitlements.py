@@ -0,0 +1,92 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count
+from django.utils import timezone
+
+CHUNK_SIZE = 500
+
+
+def backfill_entitlements(apps):
+    User = apps.get_model('auth', 'User')
+    UserCourse = apps.get_model('lms', 'UserCourse')
+    Batch = apps.get_model('lms', 'Batch')
+    BatchCourse = apps.get_model('lms', 'BatchCourse')
+    CourseEntitlement = apps.get_model('lms', 'CourseEntitlement')
+
+    # Courses a batch grants, through either BatchCourse or Batch.courses.
+    courses_by_batch = {}
+    for model in (BatchCourse, Batch.courses.through):
+        for batch_id, course_id in model.objects.values_list('batch_id', 'course_id'):
+            courses_by_batch.setdefault(batch_id, set()).add(course_id)
+
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[start:start + CHUNK_SIZE]
+        direct = set(UserCourse.objects.filter(user_id__in=chunk).values_list('user_id', 'course_id'))
+        grants = Counter()
+        for user_id, batch_id in Batch.users.through.objects.filter(user_id__in=chunk).values_list('user_id', 'batch_id'):
+            for course_id in courses_by_batch.get(batch_id, ()):
+                grants[(user_id, course_id)] += 1
+
+        CourseEntitlement.objects.filter(user_id__in=chunk).delete()
+        CourseEntitlement.objects.bulk_create(
+            [
+                CourseEntitlement(user_id=user_id, course_id=course_id, direct=(user_id, course_id) in direct,
+                                  batch_grants=grants[(user_id, course_id)])
+                for user_id, course_id in direct | set(grants)
+            ],
+            batch_size=1000,
+        )
+
+
+def backfill_counters(apps):
+    Course = apps.get_model('lms', 'Course')
+    UserCourse = apps.get_model('lms', 'UserCourse')
+    Batch = apps.get_model('lms', 'Batch')
+    BatchCourse = apps.get_model('lms', 'BatchCourse')
+
+    direct = Counter(dict(
+        UserCourse.objects.values_list('course_id').annotate(total=Count('id')).values_list('course_id', 'total')
+    ))
+    members = dict(
+        Batch.users.through.objects.values_list('batch_id').annotate(total=Count('id')).values_list('batch_id', 'total')
+    )
+    pairs = set(BatchCourse.objects.values_list('batch_id', 'course_id'))
+    pairs.update(Batch.courses.through.objects.values_list('batch_id', 'course_id'))
+    batch = Counter()
+    for batch_id, course_id in pairs:
+        batch[course_id] += members.get(batch_id, 0)
+
+    rows = Course.objects.values_list('pk', 'direct_enrollments', 'batch_enrollments', 'students')
+    for course_id, direct_count, batch_count, students in rows.iterator():
+        actual = (direct[course_id], batch[course_id])
+        if (direct_count, batch_count, students) != (*actual, sum(actual)):
+            Course.objects.filter(pk=course_id).update(
+                direct_enrollments=actual[0],
+                batch_enrollments=actual[1],
+                students=sum(actual),
+                updated_at=timezone.now(),
+            )
+
+
+def backfill(apps, schema_editor):
+    # The entitlement index (0016) and the enrollment counters (0015) are
+    # only maintained from signals, so enrollments and batch memberships made
+    # before them are missing. This recomputes both the way the
+    # rebuild_entitlements and reconcile_enrollment_counts commands do, but
+    # against the historical models.
+    backfill_entitlements(apps)
+    backfill_counters(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0021_composite_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 
+from .storage import course_image_storage
+
 
 class Course(models.Model):
     CATEGORY_CHOICES = [
@@ -26,6 +29,15 @@ class Course(models.Model):
         ('Paid', 'Paid'),
     ]
 
+    MEDIA_READY = 'ready'
+    MEDIA_PROCESSING = 'processing'
+    MEDIA_FAILED = 'failed'
+    MEDIA_STATUS_CHOICES = [
+        (MEDIA_READY, 'Ready'),
+        (MEDIA_PROCESSING, 'Processing'),
+        (MEDIA_FAILED, 'Failed'),
+    ]
+
     INSTRUCTOR_CHOICES = [
         ('Pramod', 'Pramod'),
         ('Mani', 'Mani'),
@@ -39,17 +51,41 @@ class Course(models.Model):
     price_type = models.CharField(max_length=10, choices=PRICE_TYPE)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     old_price = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    # Live enrollment counters, maintained with F() updates by lms/counters.py.
+    # students = direct_enrollments + batch_enrollments.
     students = models.IntegerField(default=0)
+    direct_enrollments = models.IntegerField(default=0)
+    batch_enrollments = models.IntegerField(default=0)
     rating = models.FloatField(default=0.0)
     instructor = models.CharField(max_length=100, choices=INSTRUCTOR_CHOICES)
-    image = models.ImageField(upload_to='courses/', null=True, blank=True)
+    image = models.ImageField(upload_to='courses/', storage=course_image_storage, null=True, blank=True)
     description = models.TextField()
     thumbnail = CloudinaryField('thumbnail', null=True, blank=True)
     video_file = CloudinaryField('video', resource_type='video', null=True, blank=True)
+    # Drives the ETag/Last-Modified validators; .update() calls and
+    # save(update_fields=...) must set it too.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # {"<width>": {"<format>": name}} in the course_thumbnails storage (see lms/thumbnails.py).
+    thumbnails = models.JSONField(default=dict, blank=True)
+    # 'processing' while thumbnail/video uploads are still queued (see lms/media.py).
+    media_status = models.CharField(max_length=12, choices=MEDIA_STATUS_CHOICES, default=MEDIA_READY)
     youtube_url = models.URLField(blank=True, null=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_courses')
     organization = models.ForeignKey('OrganizationProfile', on_delete=models.CASCADE, null=True, blank=True)
 
+    class Meta:
+        # Catalog filters (lms/filters.py) end in id, the default keyset
+        # ordering, so a single-value filter reads its page straight off the
+        # index; (category, id) is also the "category" keyset ordering.
+        # created_by is served by its foreign key index.
+        indexes = [
+            models.Index(fields=['category', 'id'], name='lms_course_category_idx'),
+            models.Index(fields=['level', 'id'], name='lms_course_level_idx'),
+            models.Index(fields=['price_type', 'id'], name='lms_course_price_type_idx'),
+            models.Index(fields=['instructor', 'id'], name='lms_course_instructor_idx'),
+            models.Index(fields=['title'], name='lms_course_title_idx'),
+        ]
+
     @property
     def thumbnail_url(self):
         return self.thumbnail.url if self.thumbnail else "/default-thumbnail.jpg"
@@ -91,6 +127,7 @@ class UserCourse(models.Model):
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [models.Index(fields=['enrolled_at'], name='lms_usercourse_enrolled_idx')]
 
     def __str__(self):
         return f"{self.user.username} enrolled in {self.course.title}"
@@ -126,3 +163,65 @@ class BatchCourse(models.Model):
 
     def __str__(self):
         return f"{self.course.title} to {self.batch.name}"
+
+
+class CourseEntitlement(models.Model):
+    """
+    Denormalized answer to "may this user access this course?", maintained
+    by lms/access.py. A row exists while the user is enrolled directly or
+    belongs to at least one batch that is assigned the course.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='entitlements')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='entitlements')
+    direct = models.BooleanField(default=False)
+    batch_grants = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'course')
+
+    def __str__(self):
+        return f"{self.user_id} may access {self.course_id}"
+
+
+class MediaUploadJob(models.Model):
+    """
+    A staged course media file waiting to be pushed to the media target by
+    ``manage.py process_media_uploads``. ``upload_id``, ``public_id`` and
+    ``bytes_uploaded`` let a retried job resume after the last acknowledged chunk.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    FIELD_CHOICES = [
+        ('thumbnail', 'Thumbnail'),
+        ('video_file', 'Video file'),
+    ]
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='media_jobs')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    staged_name = models.CharField(max_length=255)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    upload_id = models.CharField(max_length=64, blank=True)
+    public_id = models.CharField(max_length=255, blank=True)
+    bytes_uploaded = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+    def __str__(self):
+        return f"{self.field} for {self.course.title} [{self.status}]"
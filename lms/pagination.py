@@ -0,0 +1,169 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CourseKeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination for course listings.
+
+    Pages are selected with a ``WHERE (category, id) > (...)`` predicate
+    instead of an OFFSET, so the cost of a page does not depend on how deep
+    the client has paged. Pagination only kicks in when the client sends
+    ``cursor`` or ``page_size``; otherwise views return the full list as
+    before.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    default_page_size = 20
+    max_page_size = 100
+    orderings = OrderedDict([
+        ('id', ('id',)),
+        ('category', ('category', 'id')),
+    ])
+    default_ordering = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+        if page_size <= 0:
+            return self.default_page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            ordering = self.default_ordering
+        return ordering
+
+    def encode_cursor(self, ordering, position):
+        payload = json.dumps({'o': ordering, 'p': position}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def get_ordering_field(self, queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, ordering, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            position = payload['p']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        fields = self.orderings[ordering]
+        if payload.get('o') != ordering or not isinstance(position, list) or len(position) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        # The cursor is client input: coerce every value to its column's type
+        # so a tampered one is a 404 rather than a database error.
+        try:
+            position = [self.get_ordering_field(queryset, field).to_python(value)
+                        for field, value in zip(fields, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_keyset_filter(self, fields, position):
+        # Expands the row-value comparison (a, b) > (x, y) into
+        # a > x OR (a = x AND b > y), which every backend can drive
+        # from a composite index on (a, b).
+        condition = Q()
+        equal = {}
+        for field, value in zip(fields, position):
+            condition |= Q(**equal, **{f'{field}__gt': value})
+            equal[field] = value
+        return condition
+
+    def get_page_queryset(self, queryset, request):
+        """Return the lazy queryset for the requested page (plus one look-ahead row)."""
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.page_size = self.get_page_size(request)
+        fields = self.orderings[self.ordering]
+
+        queryset = queryset.order_by(*fields)
+        position = self.decode_cursor(request, self.ordering, queryset)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(fields, position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.has_next:
+            last = self.page[-1]
+            self.next_position = [getattr(last, field) for field in self.orderings[self.ordering]]
+        else:
+            self.next_position = None
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_next_cursor(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.ordering, self.next_position)
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('next_cursor', self.get_next_cursor()),
+            ('page_size', self.page_size),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class CourseSearchPagination(CourseKeysetPagination):
+    """Keyset pagination over ranked search results, ordered by (rank, id)."""
+    orderings = OrderedDict([
+        ('rank', ('search_rank', 'id')),
+    ])
+    default_ordering = 'rank'
+
+    def is_requested(self, request):
+        return True
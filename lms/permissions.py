@@ -0,0 +1,76 @@
+from rest_framework.permissions import BasePermission
+
+from .models import UserProfile, OrganizationProfile
+
+ROLE_CLAIM = 'role'
+ORGANIZATION_CLAIM = 'organization_id'
+
+
+def _token_claim(request, claim):
+    token = getattr(request, 'auth', None)
+    if token is None or not hasattr(token, 'get'):
+        return None
+    return token.get(claim)
+
+
+def get_user_role(request):
+    """
+    Return the lower-cased role of ``request.user``.
+
+    Read from the access token's ``role`` claim when present; tokens issued
+    before the claim existed fall back to one UserProfile query, memoized on
+    the request.
+    """
+    if not hasattr(request, '_lms_role'):
+        role = _token_claim(request, ROLE_CLAIM)
+        if role is None and request.user and request.user.is_authenticated:
+            role = (
+                UserProfile.objects.filter(user=request.user)
+                .values_list('role', flat=True)
+                .first()
+            )
+        request._lms_role = role.lower() if role else None
+    return request._lms_role
+
+
+def get_organization_id(request):
+    """Return the OrganizationProfile id of ``request.user``, or ``None``."""
+    if not hasattr(request, '_lms_organization_id'):
+        token = getattr(request, 'auth', None)
+        if token is not None and hasattr(token, 'get') and ORGANIZATION_CLAIM in token:
+            organization_id = token.get(ORGANIZATION_CLAIM)
+        elif request.user and request.user.is_authenticated:
+            organization_id = (
+                OrganizationProfile.objects.filter(user=request.user)
+                .values_list('id', flat=True)
+                .first()
+            )
+        else:
+            organization_id = None
+        request._lms_organization_id = organization_id
+    return request._lms_organization_id
+
+
+def is_organization_user(request):
+    return get_user_role(request) == 'organization'
+
+
+class IsOrganizationUser(BasePermission):
+    """
+    Allows access only to users whose role is ``organization``.
+
+    Denials use the ``{'error': ...}`` body the rest of the API returns;
+    use ``with_message()`` for a view-specific message.
+    """
+    error = 'Only organization users can perform this action'
+
+    @property
+    def message(self):
+        return {'error': self.error}
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and is_organization_user(request))
+
+    @classmethod
+    def with_message(cls, error):
+        return type(cls.__name__, (cls,), {'error': error})
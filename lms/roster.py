@@ -0,0 +1,110 @@
+import csv
+import io
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import access
+from .models import Batch
+
+ROSTER_CHUNK_SIZE = 500
+MAX_REPORTED_UNKNOWN = 1000
+HEADER_NAMES = {'id', 'user', 'user_id', 'username', 'email'}
+
+
+def iter_csv_identifiers(uploaded_file):
+    """Yield identifiers from an uploaded CSV one row at a time."""
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    try:
+        for line_number, row in enumerate(csv.reader(text)):
+            cells = [cell.strip() for cell in row if cell.strip()]
+            if line_number == 0 and cells and all(cell.lower() in HEADER_NAMES for cell in cells):
+                continue
+            yield from cells
+    finally:
+        text.detach()
+
+
+class RosterImportError(ValueError):
+    """The request body isn't a roster."""
+
+
+def iter_json_identifiers(data):
+    """Return an iterator over a JSON list of identifiers, or an object's ``users`` list."""
+    if isinstance(data, dict):
+        data = data.get('users', [])
+    if not isinstance(data, list):
+        raise RosterImportError('Send a JSON list of users, or an object with a "users" list.')
+    return (value for value in (str(value).strip() for value in data) if value)
+
+
+def classify(identifier):
+    # isdigit() alone accepts digits such as '²' that int() rejects.
+    if identifier.isascii() and identifier.isdigit():
+        return 'id'
+    if '@' in identifier:
+        return 'email'
+    return 'username'
+
+
+def resolve_chunk(identifiers):
+    """Map each identifier in ``identifiers`` to a user id, with one IN query per kind."""
+    by_kind = {'id': set(), 'username': set(), 'email': set()}
+    for identifier in identifiers:
+        kind = classify(identifier)
+        by_kind[kind].add(int(identifier) if kind == 'id' else identifier)
+
+    resolved = {}
+    if by_kind['id']:
+        for user_id in User.objects.filter(id__in=by_kind['id']).values_list('id', flat=True):
+            resolved[str(user_id)] = user_id
+    if by_kind['username']:
+        for user_id, username in User.objects.filter(username__in=by_kind['username']).values_list('id', 'username'):
+            resolved[username] = user_id
+    if by_kind['email']:
+        for user_id, email in User.objects.filter(email__in=by_kind['email']).values_list('id', 'email'):
+            resolved.setdefault(email, user_id)
+    return resolved
+
+
+def import_roster(batch, identifiers, chunk_size=ROSTER_CHUNK_SIZE):
+    """
+    Add the users named by ``identifiers`` (ids, usernames or emails) to
+    ``batch``. Identifiers are consumed ``chunk_size`` at a time so memory
+    stays bounded however long the roster is; unknown users are reported
+    and skipped.
+    """
+    Membership = Batch.users.through
+    identifiers = iter(identifiers)
+    report = {'processed': 0, 'added': 0, 'already_in_batch': 0, 'unknown_count': 0, 'unknown': []}
+
+    while True:
+        chunk = list(islice(identifiers, chunk_size))
+        if not chunk:
+            break
+        report['processed'] += len(chunk)
+
+        resolved = resolve_chunk(chunk)
+        for identifier in chunk:
+            if identifier not in resolved:
+                report['unknown_count'] += 1
+                if len(report['unknown']) < MAX_REPORTED_UNKNOWN:
+                    report['unknown'].append(identifier)
+
+        user_ids = set(resolved.values())
+        existing = set(
+            Membership.objects.filter(batch_id=batch.id, user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        new_ids = user_ids - existing
+        with transaction.atomic():
+            Membership.objects.bulk_create(
+                [Membership(batch_id=batch.id, user_id=user_id) for user_id in new_ids],
+                ignore_conflicts=True,
+            )
+            # bulk_create skips m2m_changed, so update the derived data here.
+            access.batch_members_changed(batch.id, new_ids, 1)
+        report['added'] += len(new_ids)
+        report['already_in_batch'] += len(existing)
+
+    return report
@@ -0,0 +1,169 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ('title', 'description', 'category', 'instructor')
+FTS_TABLE = 'lms_course_fts'
+FULLTEXT_INDEX = 'lms_course_fulltext'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_COLUMNS = ', '.join(SEARCH_FIELDS)
+_NEW_VALUES = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+_OLD_VALUES = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+
+# External-content FTS5 table kept in sync with lms_course by triggers.
+# Every statement is idempotent: SQLite drops triggers whenever a migration
+# rebuilds lms_course, so install_search_index() is re-run after migrate.
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_COLUMNS}, content='lms_course', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS lms_course_fts_ai AFTER INSERT ON lms_course BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS lms_course_fts_ad AFTER DELETE ON lms_course BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+    END""",
+    # Re-created on every install so databases that have the older trigger,
+    # which fired on any column, pick this one up.
+    'DROP TRIGGER IF EXISTS lms_course_fts_au',
+    # Only the indexed columns: counter bumps and media writes update
+    # lms_course on hot paths and must not re-index the row.
+    f"""CREATE TRIGGER lms_course_fts_au AFTER UPDATE OF {_COLUMNS} ON lms_course BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+    END""",
+]
+SQLITE_REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+SQLITE_DROP_SQL = [
+    'DROP TRIGGER IF EXISTS lms_course_fts_au',
+    'DROP TRIGGER IF EXISTS lms_course_fts_ad',
+    'DROP TRIGGER IF EXISTS lms_course_fts_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query or '')
+
+
+class BaseSearchBackend:
+    """
+    Turns a free-text query into a ``Course`` queryset annotated with
+    ``search_rank``. Lower ranks sort first on every backend, so callers can
+    order by ``('search_rank', 'id')`` without knowing which index is used.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    # bm25() column weights, in SEARCH_FIELDS order.
+    weights = (10.0, 1.0, 4.0, 4.0)
+
+    def build_match(self, query):
+        # Quote every token so user input can never be read as FTS5 syntax,
+        # and make the last one a prefix match for search-as-you-type.
+        tokens = ['"%s"' % token for token in tokenize(query)]
+        if not tokens:
+            return None
+        tokens[-1] += '*'
+        return ' '.join(tokens)
+
+    def search(self, queryset, query):
+        match = self.build_match(query)
+        if match is None:
+            return queryset.none()
+        weights = ', '.join(str(weight) for weight in self.weights)
+        matched_ids = RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        )
+        rank = RawSQL(
+            f'SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = lms_course.id',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matched_ids).annotate(search_rank=rank)
+
+
+class MySQLFullTextSearchBackend(BaseSearchBackend):
+    def search(self, queryset, query):
+        if not tokenize(query):
+            return queryset.none()
+        columns = ', '.join(f'lms_course.{field}' for field in SEARCH_FIELDS)
+        match = f'MATCH ({columns}) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+        # MATCH() scores higher-is-better; negate it to share the ordering.
+        rank = RawSQL(f'-({match})', [query], output_field=FloatField())
+        # MySQL only uses the FULLTEXT index for a bare MATCH() in WHERE, not
+        # for one wrapped in an expression such as the negated rank.
+        return queryset.extra(where=[match], params=[query]).annotate(search_rank=rank)
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """Unindexed fallback for databases without a full-text index."""
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            condition = Q()
+            for field in SEARCH_FIELDS:
+                condition |= Q(**{f'{field}__icontains': token})
+            queryset = queryset.filter(condition)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def install_search_index(conn, rebuild=False):
+    """Create the full-text index for ``conn`` if it does not exist yet."""
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for statement in SQLITE_INDEX_SQL:
+                cursor.execute(statement)
+            if rebuild:
+                cursor.execute(SQLITE_REBUILD_SQL)
+        elif conn.vendor == 'mysql':
+            existing = conn.introspection.get_constraints(cursor, 'lms_course')
+            if FULLTEXT_INDEX not in existing:
+                cursor.execute(
+                    f'ALTER TABLE lms_course ADD FULLTEXT INDEX {FULLTEXT_INDEX} ({_COLUMNS})'
+                )
+    _fts5_available.pop(conn.alias, None)
+
+
+def drop_search_index(conn):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for statement in SQLITE_DROP_SQL:
+                cursor.execute(statement)
+        elif conn.vendor == 'mysql':
+            cursor.execute(f'ALTER TABLE lms_course DROP INDEX {FULLTEXT_INDEX}')
+    _fts5_available.pop(conn.alias, None)
+
+
+_fts5_available = {}
+
+
+def _has_fts5_table(conn):
+    if conn.alias not in _fts5_available:
+        with conn.cursor() as cursor:
+            _fts5_available[conn.alias] = FTS_TABLE in conn.introspection.table_names(cursor)
+    return _fts5_available[conn.alias]
+
+
+def get_search_backend(conn=None):
+    conn = conn or connection
+    if conn.vendor == 'sqlite' and _has_fts5_table(conn):
+        return SQLiteFTS5SearchBackend()
+    if conn.vendor == 'mysql':
+        return MySQLFullTextSearchBackend()
+    return BasicSearchBackend()
+
+
+def search_courses(queryset, query):
+    return get_search_backend().search(queryset, query)
@@ -1,8 +1,10 @@
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, update_last_login
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import ValidationError, AuthenticationFailed
 from .models import Course, UserProfile, UserCourse, OrganizationProfile, Batch, BatchCourse
+from .thumbnails import thumbnail_urls
 
 # ✅ Register User Serializer
 class RegisterSerializer(serializers.ModelSerializer):
@@ -49,24 +51,46 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         if not email or not password:
             raise AuthenticationFailed('Email and password are required.')
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
+        # One indexed lookup for the user and profile, and one password hash:
+        # super().validate() would authenticate() and hash a second time.
+        user = (
+            User.objects.select_related('userprofile', 'organizationprofile')
+            .filter(email=email)
+            .order_by('id')
+            .first()
+        )
+        if user is None:
             raise AuthenticationFailed('User with this email not found.')
 
         if not user.check_password(password):
             raise AuthenticationFailed('Incorrect password.')
 
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+
         attrs['username'] = user.username
         self.user = user
-        data = super().validate(attrs)
+
+        try:
+            profile = user.userprofile
+        except UserProfile.DoesNotExist:
+            profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'role': 'student'})
+            user.userprofile = profile
+
+        refresh = self.get_token(user)
+        data = {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
 
         data['user_id'] = user.id
         data['username'] = user.username
         data['email'] = user.email
         data['is_superuser'] = user.is_superuser
-
-        profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'role': 'student'})
         data['role'] = profile.role.lower()
         data['phone'] = profile.phone
         data['referral_code'] = profile.referral_code
@@ -76,7 +100,19 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
+        token['username'] = user.username
         token['is_superuser'] = user.is_superuser
+
+        # Role and organization claims let permission checks skip the
+        # UserProfile/OrganizationProfile queries (see lms/permissions.py).
+        try:
+            token['role'] = user.userprofile.role.lower()
+        except UserProfile.DoesNotExist:
+            token['role'] = 'student'
+        try:
+            token['organization_id'] = user.organizationprofile.id
+        except OrganizationProfile.DoesNotExist:
+            token['organization_id'] = None
         return token
 
 # ✅ Admin/Org Create User Serializer
@@ -92,18 +128,86 @@ class AdminUserSerializer(serializers.ModelSerializer):
 # ✅ Course Serializer
 class CourseSerializer(serializers.ModelSerializer):
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
 
+    # Card-sized projection served for ?view=summary.
+    SUMMARY_FIELDS = [
+        'id', 'title', 'category', 'level', 'price_type', 'price', 'old_price',
+        'students', 'rating', 'instructor', 'thumbnail_url', 'thumbnails',
+    ]
+    # Model columns backing the computed fields.
+    SOURCE_COLUMNS = {
+        'thumbnail_url': ['thumbnail'],
+        'video_url': ['video_file', 'youtube_url'],
+    }
+
     class Meta:
         model = Course
         fields = '__all__'
+        read_only_fields = ['students', 'direct_enrollments', 'batch_enrollments', 'media_status']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_requested_fields(cls, query_params):
+        """
+        Resolve ``?view=summary`` or ``?fields=a,b`` into a list of field
+        names, or ``None`` when the client wants the full representation.
+        """
+        if query_params.get('view') == 'summary':
+            return list(cls.SUMMARY_FIELDS)
+
+        requested = [
+            name.strip()
+            for value in query_params.getlist('fields')
+            for name in value.split(',')
+            if name.strip()
+        ]
+        if not requested:
+            return None
+
+        available = cls().fields
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}"})
+        return list(dict.fromkeys(requested))
+
+    @classmethod
+    def get_model_columns(cls, fields):
+        """Return the columns to pass to ``.only()`` to serialize ``fields``."""
+        concrete = {field.name for field in Course._meta.concrete_fields}
+        columns = ['id']
+        for name in fields:
+            for column in cls.SOURCE_COLUMNS.get(name, [name]):
+                if column in concrete and column not in columns:
+                    columns.append(column)
+        return columns
 
     def get_thumbnail_url(self, obj):
         return obj.thumbnail_url
 
+    def get_thumbnails(self, obj):
+        return thumbnail_urls(obj.thumbnails)
+
     def get_video_url(self, obj):
         return obj.video_url
 
+# ✅ Student's Own Courses
+class MyCourseSerializer(serializers.ModelSerializer):
+    MODEL_COLUMNS = [
+        'id', 'title', 'description', 'thumbnail', 'video_file', 'youtube_url',
+        'price', 'level', 'instructor',
+    ]
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'description', 'thumbnail_url', 'video_url', 'price', 'level', 'instructor']
+
 # ✅ Assign Courses to Users
 class UserCourseSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -122,6 +226,36 @@ class UserCourseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("User is already enrolled in this course.")
         return data
 
+# ✅ Bulk Course Assignment (pairs, or users × courses)
+class BulkEnrollmentSerializer(serializers.Serializer):
+    MAX_PAIRS = 50000
+
+    pairs = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField(min_value=1)),
+        required=False,
+    )
+    users = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    courses = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+    def validate_pairs(self, pairs):
+        for pair in pairs:
+            if set(pair) != {'user', 'course'}:
+                raise serializers.ValidationError("Each pair needs exactly 'user' and 'course'.")
+        return pairs
+
+    def validate(self, data):
+        pairs = [(pair['user'], pair['course']) for pair in data.get('pairs', [])]
+        if data.get('users') or data.get('courses'):
+            if not data.get('users') or not data.get('courses'):
+                raise serializers.ValidationError("'users' and 'courses' must be sent together.")
+            pairs += [(user, course) for user in data['users'] for course in data['courses']]
+        if not pairs:
+            raise serializers.ValidationError("Send 'pairs' or 'users' and 'courses'.")
+        if len(pairs) > self.MAX_PAIRS:
+            raise serializers.ValidationError(f"At most {self.MAX_PAIRS} pairs per request.")
+        data['pairs'] = pairs
+        return data
+
 # ✅ Admin View: Full Info of Assigned Courses
 class UserCourseDetailSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -1,4 +1,110 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed, post_migrate
 from django.dispatch import receiver
-from .models import UserProfile
+from .models import UserProfile, Course, UserCourse, Batch, BatchCourse
+from . import access
+from .cache import bump_catalog_generation
+from .search import install_search_index
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_catalog(sender, **kwargs):
+    bump_catalog_generation()
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    # SQLite drops triggers when a migration rebuilds lms_course.
+    if sender.name != 'lms':
+        return
+    connection = connections[using]
+    if ('lms', '0013_course_search_index') in MigrationRecorder(connection).applied_migrations():
+        install_search_index(connection)
+
+
+# Enrollment counters and the entitlement index (see lms/access.py).
+
+@receiver(post_save, sender=UserCourse)
+def track_direct_enrollment(sender, instance, created, **kwargs):
+    if created:
+        access.direct_enrolled([(instance.user_id, instance.course_id)])
+
+
+@receiver(post_delete, sender=UserCourse)
+def track_direct_unenrollment(sender, instance, **kwargs):
+    access.direct_unenrolled([(instance.user_id, instance.course_id)])
+
+
+@receiver(post_save, sender=BatchCourse)
+def track_batch_course_assigned(sender, instance, created, **kwargs):
+    if created:
+        access.batch_course_changed(instance.batch_id, instance.course_id, 1, source='batch_course')
+
+
+@receiver(post_delete, sender=BatchCourse)
+def track_batch_course_removed(sender, instance, **kwargs):
+    access.batch_course_changed(instance.batch_id, instance.course_id, -1, source='batch_course')
+
+
+@receiver(pre_delete, sender=Batch)
+def track_batch_deleting(sender, instance, **kwargs):
+    access.batch_deleting(instance.pk)
+
+
+@receiver(post_delete, sender=Batch)
+def track_batch_deleted(sender, instance, **kwargs):
+    access.batch_deleted(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def track_user_deleting(sender, instance, **kwargs):
+    access.user_deleting(instance.pk)
+
+
+def _existing_links(through, field, other_field, instance_id, pk_set):
+    filters = {field: instance_id}
+    if pk_set is not None:
+        filters[f'{other_field}__in'] = pk_set
+    return set(through.objects.filter(**filters).values_list(other_field, flat=True))
+
+
+@receiver(m2m_changed, sender=Batch.users.through)
+def track_batch_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    field, other = ('user_id', 'batch_id') if reverse else ('batch_id', 'user_id')
+    if action in ('pre_remove', 'pre_clear'):
+        # pk_set on remove holds whatever was passed in, not what existed.
+        instance._lms_removed_members = _existing_links(sender, field, other, instance.pk, pk_set)
+        return
+    if action == 'post_add':
+        changed, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        changed, delta = instance.__dict__.pop('_lms_removed_members', set()), -1
+    else:
+        return
+
+    if reverse:
+        for batch_id in changed:
+            access.batch_members_changed(batch_id, [instance.pk], delta)
+    else:
+        access.batch_members_changed(instance.pk, changed, delta)
+
+
+@receiver(m2m_changed, sender=Batch.courses.through)
+def track_batch_courses(sender, instance, action, reverse, pk_set, **kwargs):
+    field, other = ('course_id', 'batch_id') if reverse else ('batch_id', 'course_id')
+    if action in ('pre_remove', 'pre_clear'):
+        instance._lms_removed_courses = _existing_links(sender, field, other, instance.pk, pk_set)
+        return
+    if action == 'post_add':
+        changed, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        changed, delta = instance.__dict__.pop('_lms_removed_courses', set()), -1
+    else:
+        return
+
+    for other_id in changed:
+        batch_id, course_id = (other_id, instance.pk) if reverse else (instance.pk, other_id)
+        access.batch_course_changed(batch_id, course_id, delta, source='batch_courses')
@@ -0,0 +1,134 @@
+"""
+Content-addressed storage for course images.
+
+Uploads are stored as ``<upload_to>/<sha256><ext>``. Identical content always
+maps to the same name, so a re-upload resolves to the object that is already
+there instead of being kept as ``fullstack_1bdkAmT.png``. Seekable uploads
+(everything Django's upload handlers produce) are hashed before anything is
+written, so a repeat costs one read and no write. Others are hashed as they
+are streamed to a temporary file next to their destination.
+
+Files are never removed when a course changes or drops its image, so several
+rows can safely share one object.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+
+HASH_ALGORITHM = 'sha256'
+
+
+def file_digest(chunks):
+    digest = hashlib.new(HASH_ALGORITHM)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_name(name, digest):
+    """``courses/fullstack.png`` + digest -> ``courses/<digest>.png``."""
+    directory, basename = posixpath.split(name.replace('\\', '/'))
+    extension = os.path.splitext(basename)[1].lower()
+    return posixpath.join(directory, digest + extension)
+
+
+def is_seekable(content):
+    try:
+        return content.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name depends on the content, which is only known in _save();
+        # an existing file under that name already holds the same bytes.
+        return name
+
+    def _save(self, name, content):
+        if is_seekable(content):
+            # File.chunks() rewinds first, so the upload can be read twice.
+            existing = content_name(name, file_digest(content.chunks()))
+            if os.path.exists(self.path(existing)):
+                return existing
+        return self._write(name, content)
+
+    def _write(self, name, content):
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            digest = hashlib.new(HASH_ALGORITHM)
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = content_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                return name
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            # Atomic; a concurrent upload of the same bytes just replaces them with themselves.
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+
+def course_image_storage():
+    return storages['course_images']
+
+
+def walk_files(storage, directory):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        if not name.startswith('.'):
+            yield posixpath.join(directory, name)
+    for subdirectory in directories:
+        yield from walk_files(storage, posixpath.join(directory, subdirectory))
+
+
+def dedupe_directory(storage, directory, dry_run=False):
+    """
+    Collapse byte-identical files under ``directory`` into one content-addressed
+    object each, repoint ``Course.image`` at it and delete the copies.
+    """
+    from .cache import bump_catalog_generation
+    from .models import Course
+
+    groups = {}
+    for name in walk_files(storage, directory):
+        with storage.open(name, 'rb') as file:
+            digest = file_digest(file.chunks())
+        target = content_name(posixpath.join(directory, posixpath.basename(name)), digest)
+        groups.setdefault(target, []).append(name)
+
+    report = {'files': 0, 'objects': len(groups), 'removed': 0, 'bytes_reclaimed': 0, 'courses_updated': 0}
+    for target, names in groups.items():
+        report['files'] += len(names)
+        copies = [name for name in names if name != target]
+        if not storage.exists(target):
+            keep = copies.pop()
+            if not dry_run:
+                os.replace(storage.path(keep), storage.path(target))
+        for name in copies:
+            report['removed'] += 1
+            report['bytes_reclaimed'] += storage.size(name)
+        stale = Course.objects.filter(image__in=names).exclude(image=target)
+        if dry_run:
+            report['courses_updated'] += stale.count()
+            continue
+        report['courses_updated'] += stale.update(image=target, updated_at=timezone.now())
+        for name in copies:
+            storage.delete(name)
+
+    if report['courses_updated'] and not dry_run:
+        bump_catalog_generation()
+    return report
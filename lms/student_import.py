@@ -0,0 +1,258 @@
+"""
+Bulk student account import (``POST /api/students/import/`` and
+``manage.py import_students``).
+
+The CSV needs a header row with ``username``, ``email`` and ``password``
+columns. It may also have ``phone``, ``referral_code`` and ``batch`` (a batch
+id or name). Every row is validated against the rest of the file and the
+database before anything is written. The valid rows' passwords are hashed in
+a process pool, because one PBKDF2 hash costs a good fraction of a second of
+CPU. Users, profiles and batch memberships then go in with bulk_create, one
+transaction per chunk. The result has one report entry per row.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from . import access
+from .hashing import hash_passwords
+from .models import Batch, UserProfile
+
+REQUIRED_COLUMNS = ('username', 'email', 'password')
+OPTIONAL_COLUMNS = ('phone', 'referral_code', 'batch')
+LOOKUP_CHUNK_SIZE = 500
+
+CREATED = 'created'
+VALID = 'valid'  # dry runs only
+ERROR = 'error'
+
+
+class StudentImportError(ValueError):
+    """The file as a whole can't be imported (bad header, too many rows)."""
+
+
+@dataclass
+class StudentRow:
+    line: int
+    username: str
+    email: str
+    password: str = field(repr=False)
+    phone: str = ''
+    referral_code: str = ''
+    batch: str = ''
+    batch_id: int = None
+    user_id: int = None
+    password_hash: str = field(default='', repr=False)
+    errors: list = field(default_factory=list)
+    status: str = ERROR
+
+    def report(self):
+        entry = {'row': self.line, 'username': self.username, 'email': self.email, 'status': self.status}
+        if self.user_id is not None:
+            entry['user_id'] = self.user_id
+        if self.batch_id is not None:
+            entry['batch_id'] = self.batch_id
+        if self.errors:
+            entry['errors'] = self.errors
+        return entry
+
+
+def read_student_csv(file, max_rows=None):
+    """Parse a binary CSV file object into StudentRows."""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        return parse_rows(csv.reader(text), max_rows)
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise StudentImportError(f'Could not read the CSV file: {exc}') from exc
+    finally:
+        text.detach()
+
+
+def parse_rows(reader, max_rows):
+    header = [cell.strip().lower() for cell in next(reader, [])]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise StudentImportError(f"Missing CSV columns: {', '.join(missing)}")
+
+    rows = []
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        if max_rows and len(rows) >= max_rows:
+            raise StudentImportError(f'At most {max_rows} students can be imported at once.')
+        record = dict(zip(header, values))
+        rows.append(StudentRow(
+            line=reader.line_num,
+            password=record.get('password', ''),
+            **{column: record.get(column, '').strip() for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+               if column != 'password'},
+        ))
+    return rows
+
+
+def existing_values(column, values, ignore_case=False):
+    """The ``values`` already taken in ``column``; lower-cased when ``ignore_case``."""
+    users = User.objects.all()
+    if ignore_case:
+        users = users.annotate(lookup_value=Lower(column))
+        values = {value.lower() for value in values}
+        column = 'lookup_value'
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        lookup = {f'{column}__in': values[start:start + LOOKUP_CHUNK_SIZE]}
+        found.update(users.filter(**lookup).values_list(column, flat=True))
+    return found
+
+
+def validate_rows(rows, organization_id=None, default_batch_id=None):
+    """Fill in ``errors`` and ``batch_id`` on every row."""
+    username_field = User._meta.get_field('username')
+    first_seen = {'username': {}, 'email': {}}
+    for row in rows:
+        try:
+            username_field.clean(row.username, None)
+        except ValidationError as exc:
+            row.errors.extend(f'username: {message}' for message in exc.messages)
+        try:
+            validate_email(row.email)
+        except ValidationError as exc:
+            row.errors.extend(f'email: {message}' for message in exc.messages)
+        if not row.password:
+            row.errors.append('password: This field cannot be blank.')
+
+        for column, value in (('username', row.username), ('email', row.email.lower())):
+            if not value:
+                continue
+            if value in first_seen[column]:
+                row.errors.append(f'{column}: Duplicate of row {first_seen[column][value]}.')
+            else:
+                first_seen[column][value] = row.line
+
+    taken_usernames = existing_values('username', {row.username for row in rows if row.username})
+    # Emails are compared case-insensitively, as within the file above.
+    taken_emails = existing_values('email', {row.email for row in rows if row.email}, ignore_case=True)
+    for row in rows:
+        if row.username in taken_usernames:
+            row.errors.append('username: Username already exists.')
+        if row.email.lower() in taken_emails:
+            row.errors.append('email: Email already exists.')
+
+    resolve_batches(rows, organization_id, default_batch_id)
+    for row in rows:
+        row.status = ERROR if row.errors else VALID
+
+
+def batch_reference_id(reference):
+    # isdigit() alone accepts digits such as '²' that int() rejects.
+    return int(reference) if reference.isascii() and reference.isdigit() else None
+
+
+def resolve_batches(rows, organization_id, default_batch_id):
+    batches = Batch.objects.all()
+    if organization_id is not None:
+        batches = batches.filter(organization_id=organization_id)
+    references = {row.batch for row in rows if row.batch}
+    reference_ids = {batch_reference_id(ref) for ref in references} - {None}
+    ids = set(batches.filter(id__in=reference_ids).values_list('id', flat=True))
+    by_name = {}
+    for batch_id, name in batches.filter(name__in=references).values_list('id', 'name'):
+        by_name.setdefault(name, []).append(batch_id)
+
+    for row in rows:
+        if not row.batch:
+            row.batch_id = default_batch_id
+        elif batch_reference_id(row.batch) in ids:
+            row.batch_id = batch_reference_id(row.batch)
+        elif len(by_name.get(row.batch, [])) == 1:
+            row.batch_id = by_name[row.batch][0]
+        elif row.batch in by_name:
+            row.errors.append(f'batch: "{row.batch}" matches several batches; use the batch id.')
+        else:
+            row.errors.append(f'batch: Unknown batch "{row.batch}".')
+
+
+def insert_chunk(rows):
+    users = User.objects.bulk_create([
+        User(username=row.username, email=row.email, password=row.password_hash) for row in rows
+    ])
+    if all(user.pk for user in users):
+        user_ids = {user.username: user.pk for user in users}
+    else:
+        # MySQL doesn't return primary keys from bulk inserts.
+        user_ids = dict(User.objects.filter(username__in=[row.username for row in rows]).values_list('username', 'id'))
+    for row in rows:
+        row.user_id = user_ids[row.username]
+
+    UserProfile.objects.bulk_create([
+        UserProfile(user_id=row.user_id, role='student', phone=row.phone or None, referral_code=row.referral_code or None)
+        for row in rows
+    ])
+
+    members = {}
+    for row in rows:
+        if row.batch_id is not None:
+            members.setdefault(row.batch_id, []).append(row.user_id)
+    Membership = Batch.users.through
+    Membership.objects.bulk_create([
+        Membership(batch_id=batch_id, user_id=user_id)
+        for batch_id, user_ids in members.items()
+        for user_id in user_ids
+    ])
+    # bulk_create skips m2m_changed, so update the derived data here.
+    for batch_id, user_ids in members.items():
+        access.batch_members_changed(batch_id, user_ids, 1)
+
+
+def create_students(rows, chunk_size):
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                insert_chunk(chunk)
+        except IntegrityError:
+            # Someone took one of these usernames after validation; retry the
+            # chunk one row at a time so only the conflicting rows fail.
+            for row in chunk:
+                row.user_id = None
+                try:
+                    with transaction.atomic():
+                        insert_chunk([row])
+                except IntegrityError:
+                    row.user_id = None
+                    row.errors.append('username: Username already exists.')
+                    row.status = ERROR
+                else:
+                    row.status = CREATED
+        else:
+            for row in chunk:
+                row.status = CREATED
+
+
+def import_students(rows, organization_id=None, default_batch_id=None, workers=None, chunk_size=None, dry_run=False):
+    """
+    Validate and create ``rows``. Batches are looked up within
+    ``organization_id`` when it is given; ``default_batch_id`` applies to
+    rows without a ``batch`` value. Invalid rows are reported and skipped.
+    """
+    validate_rows(rows, organization_id, default_batch_id)
+    valid = [row for row in rows if row.status == VALID]
+    if valid and not dry_run:
+        for row, password_hash in zip(valid, hash_passwords([row.password for row in valid], workers)):
+            row.password_hash = password_hash
+        create_students(valid, chunk_size or settings.STUDENT_IMPORT_CHUNK_SIZE)
+
+    return {
+        'rows': len(rows),
+        'created': sum(row.status == CREATED for row in rows),
+        'failed': sum(row.status == ERROR for row in rows),
+        'dry_run': dry_run,
+        'results': [row.report() for row in rows],
+    }
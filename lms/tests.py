@@ -1,3 +1,1526 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings as django_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import async_views
+from .authentication import ClaimsUser
+from .cache import catalog_cache_key
+from .management.commands.bench_endpoints import ENDPOINTS
+from .counters import reconcile_enrollment_counts
+from .datasets import generate_dataset, scale_config
+from .enrollment import bulk_enroll
+from .explain import explain
+from .entitlements import has_course_access, rebuild_entitlements
+from .media import LocalMediaTarget, claim_job, get_staging_storage, process_job
+from .metrics import REGISTRY
+from .models import (
+    Course, UserProfile, UserCourse, OrganizationProfile, Batch, BatchCourse, CourseEntitlement,
+    MediaUploadJob,
+)
+from .renderers import FastJSONRenderer
+from .search import MySQLFullTextSearchBackend, SQLiteFTS5SearchBackend, get_search_backend
+from .serializers import CourseSerializer, CustomTokenObtainPairSerializer
+from . import student_import
+from .hashing import hash_passwords
+from .thumbnails import generate_variants, get_thumbnail_storage
+
+
+def create_course(title, **kwargs):
+    fields = {
+        'category': 'Manual Testing',
+        'level': 'Beginner',
+        'price_type': 'Free',
+        'price': 0,
+        'instructor': 'Mani',
+        'description': f'{title} description',
+    }
+    fields.update(kwargs)
+    return Course.objects.create(title=title, **fields)
+
+
+def encode_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+class CourseKeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass')
+        categories = ['UI/UX', 'API Testing', 'Manual Testing']
+        cls.courses = [create_course(f'Course {i}', category=categories[i % 3]) for i in range(7)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def traverse(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = {**params, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get(reverse('course-list'), query)
+            self.assertEqual(response.status_code, 200)
+            ids += [course['id'] for course in response.data['results']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_course_once_in_order(self):
+        self.assertEqual(self.traverse(page_size=3), [course.id for course in self.courses])
+        by_category = sorted(self.courses, key=lambda course: (course.category, course.id))
+        self.assertEqual(self.traverse(page_size=2, ordering='category', fields='id,title'),
+                         [course.id for course in by_category])
+
+    def test_unpaginated_without_cursor_or_page_size(self):
+        self.assertEqual(len(self.client.get(reverse('course-list')).data), len(self.courses))
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse('course-list'), {'page_size': 10_000})
+        self.assertEqual(response.data['page_size'], 100)
+        self.assertEqual(self.client.get(reverse('course-list'), {'page_size': -1}).data['page_size'], 20)
+
+    def test_garbage_and_tampered_cursors_are_404(self):
+        for cursor in [
+            'not-a-cursor',
+            encode_cursor(['id']),
+            encode_cursor({'o': 'id', 'p': ['a']}),
+            encode_cursor({'o': 'id', 'p': [None]}),
+            encode_cursor({'o': 'id', 'p': [1, 2]}),
+            encode_cursor({'o': 'category', 'p': ['UI/UX', 1]}),
+        ]:
+            response = self.client.get(reverse('course-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+        # A numeric string is still a valid id.
+        cursor = encode_cursor({'o': 'id', 'p': [str(self.courses[2].id)]})
+        response = self.client.get(reverse('course-list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['id'], self.courses[3].id)
+
+
+def catalog_key(query):
+    return catalog_cache_key(Request(APIRequestFactory().get('/api/courses/?' + query)))
+
+
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass')
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.course = create_course('Python Basics', level='Beginner')
+        create_course('Selenium', level='Advance')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_key_ignores_parameter_order_and_duplicates(self):
+        key = catalog_key('level=Beginner&level=Advance&category=UI/UX')
+        self.assertEqual(catalog_key('category=UI/UX&level=Advance&level=Beginner&level=Advance'), key)
+        self.assertEqual(catalog_key('level=Advance&category=UI/UX&level=Beginner&unknown=1'), key)
+        self.assertNotEqual(catalog_key('level=Advance'), key)
+        self.assertEqual(catalog_key('fields=title,id'), catalog_key('fields=id&fields=title'))
+        self.assertNotEqual(catalog_key('fields=id'), catalog_key(''))
+
+    def test_hits_and_misses_are_counted(self):
+        url = reverse('course-list')
+        self.client.get(url, {'level': ['Beginner', 'Advance']})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'level': ['Advance', 'Beginner']})
+        self.assertEqual(len(response.data), 2)
+        self.client.get(url, {'level': 'Beginner'})
+
+        self.client.force_authenticate(self.admin)
+        stats = self.client.get(reverse('catalog-cache-stats')).data
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 2, round(1 / 3, 4)))
+
+    def test_saving_or_deleting_a_course_invalidates(self):
+        url = reverse('course-list')
+        self.assertEqual(len(self.client.get(url).data), 2)
+        key = catalog_key('')
+
+        self.course.title = 'Python Advanced'
+        self.course.save()
+        self.assertNotEqual(catalog_key(''), key)
+        self.assertIn('Python Advanced', [course['title'] for course in self.client.get(url).data])
+
+        self.course.delete()
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass')
+        for i in range(3):
+            create_course(f'Course {i}', thumbnail=f'courses/{i}.png')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_model_columns_cover_computed_fields(self):
+        self.assertEqual(CourseSerializer.get_model_columns(['title', 'thumbnail_url', 'thumbnails']),
+                         ['id', 'title', 'thumbnail', 'thumbnails'])
+        self.assertEqual(CourseSerializer.get_model_columns(['video_url']), ['id', 'video_file', 'youtube_url'])
+
+    def test_fields_are_projected(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('course-list'), {'fields': 'id,title,thumbnail_url'})
+        self.assertEqual(response.status_code, 200)
+        # Conditional GET validators, then the courses.
+        self.assertEqual(len(queries), 2)
+        select = queries[1]['sql'].split(' FROM ')[0]
+        self.assertIn('"title"', select)
+        self.assertIn('"thumbnail"', select)
+        self.assertNotIn('"description"', select)
+        self.assertEqual([set(course) for course in response.data], [{'id', 'title', 'thumbnail_url'}] * 3)
+        self.assertTrue(response.data[0]['thumbnail_url'].endswith('.png'))
+
+    def test_summary_view(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('course-list'), {'view': 'summary'})
+        self.assertEqual(set(response.data[0]), set(CourseSerializer.SUMMARY_FIELDS))
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('course-list'), {'fields': 'id,secret,title'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', str(response.data['fields']))
+
+
+class CourseSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass')
+        cls.in_description = create_course('Testing basics', description='Write selenium scripts')
+        cls.in_title = create_course('Selenium WebDriver', description='Browser automation')
+        create_course('Postman', description='API calls')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, q, **params):
+        response = self.client.get(reverse('course-search'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_uses_fts5_and_ranks_title_matches_first(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTS5SearchBackend)
+        results = self.search('selenium')['results']
+        self.assertEqual([course['id'] for course in results], [self.in_title.id, self.in_description.id])
+        # The last token is a prefix match.
+        self.assertEqual([course['id'] for course in self.search('seleni')['results']][0], self.in_title.id)
+        self.assertEqual(self.search('"OR NOT')['results'], [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.title = 'Cypress'
+        self.in_title.description = 'Component tests'
+        self.in_title.save()
+        self.assertEqual([course['id'] for course in self.search('selenium')['results']], [self.in_description.id])
+        self.assertEqual([course['id'] for course in self.search('cypress')['results']], [self.in_title.id])
+
+        self.in_description.delete()
+        self.assertEqual(self.search('selenium')['results'], [])
+
+    def test_counter_updates_do_not_reindex(self):
+        def changes(update):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT total_changes()')
+                before = cursor.fetchone()[0]
+                update()
+                cursor.execute('SELECT total_changes()')
+                return cursor.fetchone()[0] - before
+
+        courses = Course.objects.filter(pk=self.in_title.pk)
+        # total_changes() counts the rows the FTS5 trigger writes, too.
+        self.assertEqual(changes(lambda: courses.update(students=5)), 1)
+        self.assertGreater(changes(lambda: courses.update(title='Selenium Grid')), 1)
+
+    def test_pages_through_ranked_results(self):
+        extra = [create_course(f'Selenium {i}') for i in range(4)]
+        expected = [course['id'] for course in self.search('selenium', page_size=100)['results']]
+        self.assertEqual(set(expected), {self.in_title.id, self.in_description.id, *(course.id for course in extra)})
+
+        ids, cursor = [], None
+        while True:
+            page = self.search('selenium', page_size=2, **({'cursor': cursor} if cursor else {}))
+            ids += [course['id'] for course in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, expected)
+
+    def test_mysql_filters_on_a_bare_match(self):
+        queryset = MySQLFullTextSearchBackend().search(Course.objects.all(), 'selenium')
+        where = str(queryset.query).split(' WHERE ')[1]
+        self.assertTrue(where.startswith('(MATCH ('), where)
+
+
+class BatchRollupQueryBudgetTests(TestCase):
+    """The org roll-up endpoints must not issue queries per batch."""
+
+    batch_count = 15
+    users_per_batch = 3
+    courses_per_batch = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        UserProfile.objects.create(user=cls.org_user, role='organization')
+        cls.org = OrganizationProfile.objects.create(user=cls.org_user, organization_name='Org')
+
+        courses = [create_course(f'Course {i}') for i in range(cls.courses_per_batch * 2)]
+        for i in range(cls.batch_count):
+            batch = Batch.objects.create(name=f'Batch {i}', organization=cls.org)
+            batch.users.add(*[
+                User.objects.create_user(f'student{i}_{j}', f'student{i}_{j}@example.com', 'pass')
+                for j in range(cls.users_per_batch)
+            ])
+            for course in courses[i % 2::2][:cls.courses_per_batch]:
+                BatchCourse.objects.create(batch=batch, course=course)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=self.org_user.pk))
+
+    def test_batches_with_users_query_budget(self):
+        # organization profile + batches + prefetched users
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('batches-with-users'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), self.batch_count)
+        self.assertTrue(all(len(batch['users']) == self.users_per_batch for batch in response.data))
+
+    def test_batches_with_courses_query_budget(self):
+        # batches + prefetched batch courses joined to their course
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('batches-with-courses'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), self.batch_count)
+        self.assertTrue(all(len(batch['courses']) == self.courses_per_batch for batch in response.data))
+        self.assertEqual(set(response.data[0]['courses'][0]), {'id', 'title', 'description'})
+
+    def test_query_budget_does_not_grow_with_batches(self):
+        for i in range(10):
+            batch = Batch.objects.create(name=f'Extra {i}', organization=self.org)
+            batch.users.add(self.org_user)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('batches-with-users'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('batches-with-courses'))
+
+
+class BulkEnrollmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.students = [
+            User.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass')
+            for i in range(4)
+        ]
+        cls.courses = [create_course(f'Course {i}') for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_users_times_courses_enrolls_every_pair(self):
+        UserCourse.objects.create(user=self.students[0], course=self.courses[0])
+        response = self.client.post(reverse('admin-bulk-assign-courses'), {
+            'users': [student.id for student in self.students],
+            'courses': [course.id for course in self.courses],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary'], {'already_enrolled': 1, 'created': 11})
+        self.assertEqual(UserCourse.objects.count(), 12)
+
+    def test_reports_per_pair_results(self):
+        student, course = self.students[0], self.courses[0]
+        response = self.client.post(reverse('admin-bulk-assign-courses'), {'pairs': [
+            {'user': student.id, 'course': course.id},
+            {'user': student.id, 'course': course.id},
+            {'user': 999999, 'course': course.id},
+            {'user': student.id, 'course': 999999},
+        ]}, format='json')
+        self.assertEqual(
+            [item['result'] for item in response.data['results']],
+            ['created', 'duplicate', 'unknown_user', 'unknown_course'],
+        )
+
+    def test_validation_query_count_is_constant(self):
+        pairs = [{'user': s.id, 'course': c.id} for s in self.students for c in self.courses]
+        # users + courses + existing enrollments, then in one transaction:
+        # savepoint, insert, release, counters, entitlement insert + update
+        with self.assertNumQueries(11):
+            self.client.post(reverse('admin-bulk-assign-courses'), {'pairs': pairs}, format='json')
+
+    def test_pair_enrolled_concurrently_is_not_counted(self):
+        student, course = self.students[0], self.courses[0]
+        UserCourse.objects.create(user=student, course=course)
+        # As if the enrollment landed between the check and the insert.
+        with mock.patch('lms.enrollment.existing_enrollments', return_value=set()):
+            results = bulk_enroll([(student.id, course.id), (student.id, self.courses[1].id)])
+        self.assertEqual([item['result'] for item in results], ['already_enrolled', 'created'])
+        course.refresh_from_db()
+        self.assertEqual((course.direct_enrollments, course.students), (1, 1))
+        self.assertEqual(UserCourse.objects.filter(user=student).count(), 2)
+
+    def test_requires_superuser(self):
+        self.client.force_authenticate(self.students[0])
+        response = self.client.post(reverse('admin-bulk-assign-courses'), {'pairs': []}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class BatchRosterImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        UserProfile.objects.create(user=cls.org_user, role='organization')
+        org = OrganizationProfile.objects.create(user=cls.org_user, organization_name='Org')
+        cls.batch = Batch.objects.create(name='Batch', organization=org)
+        cls.students = [
+            User.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass')
+            for i in range(3)
+        ]
+        cls.batch.users.add(cls.students[2])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.org_user)
+        self.url = reverse('import-batch-roster', args=[self.batch.id])
+
+    def test_csv_upload_resolves_ids_usernames_and_emails(self):
+        content = (
+            'user\n'
+            f'{self.students[0].id}\n'
+            'student1@example.com\n'
+            'student2\n'
+            'ghost\n'
+        ).encode()
+        upload = SimpleUploadedFile('roster.csv', content, content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['added'], 2)
+        self.assertEqual(response.data['already_in_batch'], 1)
+        self.assertEqual(response.data['unknown'], ['ghost'])
+        self.assertEqual(self.batch.users.count(), 3)
+
+    def test_json_list(self):
+        response = self.client.post(self.url, ['student0', 'student1', 'nobody@example.com'], format='json')
+        self.assertEqual(response.data['added'], 2)
+        self.assertEqual(response.data['unknown_count'], 1)
+
+    def test_non_ascii_digits_are_unknown(self):
+        response = self.client.post(self.url, ['²', '١٢'], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unknown'], ['²', '١٢'])
+
+    def test_json_object_with_users(self):
+        response = self.client.post(self.url, {'users': [self.students[0].id]}, format='json')
+        self.assertEqual(response.data['added'], 1)
+
+    def test_json_that_is_not_a_list_is_400(self):
+        for body in ['student0', 42, {'users': 'student0'}]:
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.data)
+        self.assertEqual(self.batch.users.count(), 1)
+
+
+class AssignmentExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        course = create_course('Exported', price='49.50')
+        for i in range(5):
+            student = User.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass')
+            UserCourse.objects.create(user=student, course=course)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('admin-list-assignments')
+
+    def test_ndjson_export_matches_json_rows(self):
+        expected = self.client.get(self.url).json()
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'username', 'email'])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][8], '49.50')
+
+
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass-1234')
+        UserProfile.objects.create(user=cls.user, role='Student', phone='123')
+
+    def setUp(self):
+        cache.clear()  # throttle buckets
+
+    def test_login_returns_tokens_and_profile_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse('token_obtain_pair'),
+                {'email': 'student@example.com', 'password': 'pass-1234'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertEqual(response.data['role'], 'student')
+        self.assertEqual(response.data['phone'], '123')
+
+    def test_password_is_hashed_once(self):
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=True) as check:
+            self.client.post(reverse('token_obtain_pair'), {'email': 'student@example.com', 'password': 'x'})
+        self.assertEqual(check.call_count, 1)
+
+    def test_wrong_password(self):
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            {'email': 'student@example.com', 'password': 'wrong'},
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_inactive_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            {'email': 'student@example.com', 'password': 'pass-1234'},
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class RoleClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org_user = User.objects.create_user('org', 'org@example.com', 'pass-1234')
+        UserProfile.objects.create(user=cls.org_user, role='organization')
+        cls.org = OrganizationProfile.objects.create(user=cls.org_user, organization_name='Org')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'pass-1234')
+        UserProfile.objects.create(user=cls.student, role='student')
+
+    def login(self, email):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': email, 'password': 'pass-1234'})
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return client
+
+    def test_token_carries_role_and_organization(self):
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'email': 'org@example.com', 'password': 'pass-1234'}
+        )
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['role'], 'organization')
+        self.assertEqual(token['organization_id'], self.org.id)
+
+    def test_role_check_does_not_query_profiles(self):
+        client = self.login('org@example.com')
+        # JWTAuthentication user lookup, batch insert, serializing batch users
+        with self.assertNumQueries(3):
+            response = client.post(reverse('create-batch'), {'name': 'Batch'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Batch.objects.get().organization, self.org)
+
+    def test_students_are_denied_with_error_body(self):
+        client = self.login('student@example.com')
+        response = client.get(reverse('list-all-batch-courses'))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {'error': 'Only organization users can view batch courses'})
+
+    def test_legacy_token_falls_back_to_profile(self):
+        client = APIClient()
+        client.force_authenticate(self.org_user)
+        response = client.get(reverse('list-all-batch-courses'))
+        self.assertEqual(response.status_code, 200)
+
+
+class StatelessAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass-1234')
+        UserProfile.objects.create(user=cls.user, role='student')
+        cls.course = create_course('Course')
+        UserCourse.objects.create(user=cls.user, course=cls.course)
+        cls.token = CustomTokenObtainPairSerializer.get_token(cls.user).access_token
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_read_endpoints_skip_user_lookup(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('course-detail', args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my-assigned-courses'))
+        self.assertEqual([course['id'] for course in response.data], [self.course.id])
+
+    def test_claims_user_loads_row_lazily(self):
+        user = ClaimsUser(self.token)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.id, user.username, user.role), (self.user.id, 'student', 'student'))
+            self.assertFalse(user.is_superuser)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'student@example.com')
+            self.assertEqual(user.first_name, '')
+
+    def test_claims_user_of_deleted_user_fails_authentication(self):
+        user = ClaimsUser(self.token)
+        User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(user.username, 'student')
+        with self.assertRaises(AuthenticationFailed):
+            user.email
+
+
+class EnrollmentCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        cls.org = OrganizationProfile.objects.create(user=org_user, organization_name='Org')
+        cls.students = [
+            User.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass')
+            for i in range(3)
+        ]
+        cls.course = create_course('Counted')
+
+    def counters(self):
+        self.course.refresh_from_db()
+        return self.course.direct_enrollments, self.course.batch_enrollments, self.course.students
+
+    def test_direct_enrollments(self):
+        enrollment = UserCourse.objects.create(user=self.students[0], course=self.course)
+        bulk_enroll([(self.students[1].id, self.course.id), (self.students[2].id, self.course.id)])
+        self.assertEqual(self.counters(), (3, 0, 3))
+        enrollment.delete()
+        self.assertEqual(self.counters(), (2, 0, 2))
+
+    def test_batch_paths(self):
+        batch = Batch.objects.create(name='Batch', organization=self.org)
+        batch.users.add(self.students[0], self.students[1])
+        BatchCourse.objects.create(batch=batch, course=self.course)
+        self.assertEqual(self.counters(), (0, 2, 2))
+
+        # The same course through Batch.courses must not count twice.
+        batch.courses.add(self.course)
+        self.students[2].batches.add(batch)
+        self.assertEqual(self.counters(), (0, 3, 3))
+
+        batch.users.remove(self.students[0], self.students[0])
+        self.assertEqual(self.counters(), (0, 2, 2))
+        BatchCourse.objects.filter(batch=batch).delete()
+        self.assertEqual(self.counters(), (0, 2, 2))
+        batch.courses.clear()
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_batch_delete_releases_seats(self):
+        batch = Batch.objects.create(name='Batch', organization=self.org)
+        batch.users.add(*self.students)
+        BatchCourse.objects.create(batch=batch, course=self.course)
+        batch.delete()
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        UserCourse.objects.create(user=self.students[0], course=self.course)
+        Course.objects.filter(pk=self.course.pk).update(students=40, direct_enrollments=40)
+        self.assertEqual(reconcile_enrollment_counts(chunk_size=1), (1, 1))
+        self.assertEqual(self.counters(), (1, 0, 1))
+
+    def test_stats_endpoint_reads_counters(self):
+        UserCourse.objects.create(user=self.students[0], course=self.course)
+        client = APIClient()
+        client.force_authenticate(self.students[0])
+        with self.assertNumQueries(1):
+            response = client.get(reverse('course-enrollment-stats', args=[self.course.pk]))
+        self.assertEqual(response.data['students'], 1)
+
+    def test_counter_changes_invalidate_the_course_list(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(self.students[0])
+        url = reverse('course-list')
+        response = client.get(url, {'fields': 'id,students'})
+        etag = response['ETag']
+        self.assertEqual(response.data, [{'id': self.course.id, 'students': 0}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserCourse.objects.create(user=self.students[0], course=self.course)
+        response = client.get(url, {'fields': 'id,students'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data, [{'id': self.course.id, 'students': 1}])
+
+        etag = response['ETag']
+        batch = Batch.objects.create(name='Batch', organization=self.org)
+        BatchCourse.objects.create(batch=batch, course=self.course)
+        with self.captureOnCommitCallbacks(execute=True):
+            batch.users.add(self.students[1])
+        response = client.get(url, {'fields': 'id,students'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data, [{'id': self.course.id, 'students': 2}])
+
+
+class MyCoursesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        org = OrganizationProfile.objects.create(user=org_user, organization_name='Org')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'pass')
+        cls.courses = [create_course(f'Course {i}') for i in range(5)]
+
+        UserCourse.objects.create(user=cls.student, course=cls.courses[0])
+        first = Batch.objects.create(name='First', organization=org)
+        first.users.add(cls.student)
+        BatchCourse.objects.create(batch=first, course=cls.courses[0])
+        BatchCourse.objects.create(batch=first, course=cls.courses[1])
+        second = Batch.objects.create(name='Second', organization=org)
+        second.users.add(cls.student)
+        second.courses.add(cls.courses[1], cls.courses[2])
+        # A batch the student is not in.
+        other = Batch.objects.create(name='Other', organization=org)
+        other.courses.add(cls.courses[4])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_union_of_direct_and_batch_courses_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my-assigned-courses'))
+        self.assertEqual([course['id'] for course in response.data], [c.id for c in self.courses[:3]])
+        self.assertEqual(
+            set(response.data[0]),
+            {'id', 'title', 'description', 'thumbnail_url', 'video_url', 'price', 'level', 'instructor'},
+        )
+
+    def test_paginated(self):
+        response = self.client.get(reverse('my-assigned-courses'), {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([course['id'] for course in response.data['results']], [self.courses[2].id])
+
+
+class EntitlementIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        cls.org = OrganizationProfile.objects.create(user=org_user, organization_name='Org')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'pass')
+        cls.course = create_course('Entitled')
+
+    def entitlement(self):
+        return CourseEntitlement.objects.filter(user=self.student, course=self.course).values_list(
+            'direct', 'batch_grants'
+        ).first()
+
+    def test_direct_and_batch_sources_are_tracked(self):
+        enrollment = UserCourse.objects.create(user=self.student, course=self.course)
+        self.assertEqual(self.entitlement(), (True, 0))
+
+        first = Batch.objects.create(name='First', organization=self.org)
+        first.users.add(self.student)
+        BatchCourse.objects.create(batch=first, course=self.course)
+        first.courses.add(self.course)
+        second = Batch.objects.create(name='Second', organization=self.org)
+        second.courses.add(self.course)
+        self.student.batches.add(second)
+        self.assertEqual(self.entitlement(), (True, 2))
+
+        enrollment.delete()
+        first.delete()
+        self.assertEqual(self.entitlement(), (False, 1))
+        second.users.clear()
+        self.assertIsNone(self.entitlement())
+        self.assertFalse(has_course_access(self.student.id, self.course.id))
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        batch = Batch.objects.create(name='Batch', organization=self.org)
+        batch.users.add(self.student)
+        batch.courses.add(self.course)
+        bulk_enroll([(self.student.id, self.course.id)])
+        expected = list(CourseEntitlement.objects.values_list('user_id', 'course_id', 'direct', 'batch_grants'))
+
+        CourseEntitlement.objects.all().delete()
+        rebuild_entitlements(User.objects.values_list('id', flat=True), chunk_size=1)
+        self.assertEqual(
+            list(CourseEntitlement.objects.values_list('user_id', 'course_id', 'direct', 'batch_grants')),
+            expected,
+        )
+
+    def test_untracked_membership_can_be_removed(self):
+        batch = Batch.objects.create(name='Batch', organization=self.org)
+        batch.courses.add(self.course)
+        batch.users.add(self.student)
+        UserCourse.objects.create(user=self.student, course=self.course)
+        # As if the membership predated the entitlement index.
+        CourseEntitlement.objects.update(batch_grants=0)
+        batch.users.remove(self.student)
+        self.assertEqual(self.entitlement(), (True, 0))
+
+    def test_migration_backfills_entitlements_and_counters(self):
+        batch = Batch.objects.create(name='Batch', organization=self.org)
+        batch.courses.add(self.course)
+        BatchCourse.objects.create(batch=batch, course=create_course('Other'))
+        batch.users.add(self.student)
+        UserCourse.objects.create(user=self.student, course=self.course)
+        entitlements = list(CourseEntitlement.objects.order_by('course_id').values_list(
+            'user_id', 'course_id', 'direct', 'batch_grants'))
+        counters = list(Course.objects.order_by('pk').values_list('direct_enrollments', 'batch_enrollments', 'students'))
+        # As if all of it predated the index and the counters.
+        CourseEntitlement.objects.all().delete()
+        Course.objects.update(students=0, direct_enrollments=0, batch_enrollments=0)
+
+        migration = importlib.import_module('lms.migrations.0022_backfill_entitlements')
+        state = MigrationExecutor(connection).loader.project_state(('lms', '0022_backfill_entitlements'))
+        migration.backfill(state.apps, None)
+        self.assertEqual(list(CourseEntitlement.objects.order_by('course_id').values_list(
+            'user_id', 'course_id', 'direct', 'batch_grants')), entitlements)
+        self.assertEqual(
+            list(Course.objects.order_by('pk').values_list('direct_enrollments', 'batch_enrollments', 'students')),
+            counters,
+        )
+        self.assertEqual(self.entitlement(), (True, 1))
+
+    def test_access_endpoint_is_a_single_probe(self):
+        UserCourse.objects.create(user=self.student, course=self.course)
+        client = APIClient()
+        client.force_authenticate(self.student)
+        with self.assertNumQueries(1):
+            response = client.get(reverse('course-access', args=[self.course.pk]))
+        self.assertEqual(response.data['has_access'], True)
+
+
+class AsyncReadViewTests(TestCase):
+    """The async read views must return exactly what the DRF views return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        UserProfile.objects.create(user=cls.org_user, role='organization')
+        org = OrganizationProfile.objects.create(user=cls.org_user, organization_name='Org')
+        cls.student = User.objects.create_user('student', 'student@example.com', 'pass')
+        cls.courses = [create_course(f'Course {i}', category='UI/UX' if i % 2 else 'API Testing') for i in range(4)]
+        batch = Batch.objects.create(name='Batch', organization=org)
+        batch.users.add(cls.student)
+        batch.courses.add(cls.courses[1])
+        UserCourse.objects.create(user=cls.student, course=cls.courses[2])
+
+    def assert_same(self, async_view, path, user, params=None, **kwargs):
+        headers = {'Authorization': f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'}
+        expected = APIClient().get(path, params or {}, headers=headers)
+        request = AsyncRequestFactory().get(path, params or {}, headers=headers)
+        response = async_to_sync(async_view)(request, **kwargs)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), expected.json())
+
+    def test_course_list(self):
+        cache.clear()
+        self.assert_same(async_views.course_list, reverse('course-list'), self.student)
+        cache.clear()
+        self.assert_same(
+            async_views.course_list, reverse('course-list'), self.student,
+            {'category': 'UI/UX', 'view': 'summary', 'page_size': 1},
+        )
+        self.assert_same(
+            async_views.course_list, reverse('course-list'), self.student,
+            {'fields': 'id,title', 'page_size': 1, 'ordering': 'category'},
+        )
+
+    def test_course_detail(self):
+        pk = self.courses[0].pk
+        self.assert_same(async_views.course_detail, reverse('course-detail', args=[pk]), self.student, pk=pk)
+        self.assert_same(async_views.course_detail, reverse('course-detail', args=[0]), self.student, pk=0)
+
+        course = create_course('With media', image='courses/abc.png', video_file='video/upload/abc.mp4')
+        url = reverse('course-detail', args=[course.pk])
+        self.assert_same(async_views.course_detail, url, self.student, pk=course.pk)
+
+    def test_my_courses(self):
+        self.assert_same(async_views.my_assigned_courses, reverse('my-assigned-courses'), self.student)
+        self.assert_same(
+            async_views.my_assigned_courses, reverse('my-assigned-courses'), self.student,
+            {'page_size': 1, 'ordering': 'category'},
+        )
+
+    def test_list_batches_for_org(self):
+        self.assert_same(async_views.list_batches_for_org, reverse('list-batches'), self.org_user)
+
+    def test_requires_token(self):
+        request = AsyncRequestFactory().get(reverse('course-list'))
+        response = async_to_sync(async_views.course_list)(request)
+        self.assertEqual(response.status_code, 401)
+
+
+class ContentAddressedImageTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = Course._meta.get_field('image').storage
+        self.directory = os.path.join(media.name, 'courses')
+
+    def test_identical_uploads_share_one_object(self):
+        first = create_course('First')
+        second = create_course('Second')
+        first.image.save('fullstack.png', ContentFile(b'png-bytes'))
+        second.image.save('fullstack.png', ContentFile(b'png-bytes'))
+        create_course('Third').image.save('logo.png', ContentFile(b'other-bytes'))
+
+        digest = hashlib.sha256(b'png-bytes').hexdigest()
+        self.assertEqual(first.image.name, f'courses/{digest}.png')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_repeat_upload_is_not_written(self):
+        create_course('First').image.save('fullstack.png', ContentFile(b'png-bytes'))
+        upload = SimpleUploadedFile('again.png', b'png-bytes', content_type='image/png')
+        with mock.patch('lms.storage.tempfile.mkstemp') as mkstemp:
+            name = self.storage.save('courses/again.png', upload)
+        mkstemp.assert_not_called()
+        self.assertEqual(name, f"courses/{hashlib.sha256(b'png-bytes').hexdigest()}.png")
+
+    def test_dedupe_command_collapses_existing_copies(self):
+        plain = FileSystemStorage()
+        names = [plain.save('courses/fullstack.png', ContentFile(b'png-bytes')) for _ in range(3)]
+        plain.save('courses/images/fullstack.png', ContentFile(b'png-bytes'))
+        logo = plain.save('courses/logo.png', ContentFile(b'logo-bytes'))
+        courses = [create_course(f'Course {i}', image=name) for i, name in enumerate(names + [logo])]
+
+        call_command('dedupe_course_images', stdout=io.StringIO())
+
+        digest = hashlib.sha256(b'png-bytes').hexdigest()
+        logo_digest = hashlib.sha256(b'logo-bytes').hexdigest()
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([f'{digest}.png', f'{logo_digest}.png', 'images']))
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'images')), [])
+        images = [Course.objects.get(pk=course.pk).image.name for course in courses]
+        self.assertEqual(images, [f'courses/{digest}.png'] * 3 + [f'courses/{logo_digest}.png'])
+        with self.storage.open(images[0]) as file:
+            self.assertEqual(file.read(), b'png-bytes')
+
+
+class FlakyMediaTarget(LocalMediaTarget):
+    """Fails the first ``failures`` chunks sent at ``fail_at``."""
+
+    def __init__(self, fail_at, failures=1, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_at, self.failures = fail_at, failures
+
+    def upload_chunk(self, job, data, offset, total):
+        if offset == self.fail_at and self.failures:
+            self.failures -= 1
+            raise ConnectionError('upload interrupted')
+        return super().upload_chunk(job, data, offset, total)
+
+
+class MediaUploadQueueTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.target_dir = os.path.join(root.name, 'target')
+        storages = dict(
+            django_settings.STORAGES,
+            media_staging={
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': os.path.join(root.name, 'staging')},
+            },
+            course_thumbnails={
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                'OPTIONS': {'location': os.path.join(root.name, 'thumbnails'), 'base_url': '/media/'},
+            },
+        )
+        settings = override_settings(
+            STORAGES=storages,
+            MEDIA_UPLOAD_TARGET={'BACKEND': 'lms.media.LocalMediaTarget', 'OPTIONS': {'location': self.target_dir}},
+            MEDIA_UPLOAD_CHUNK_SIZE=4,
+            MEDIA_UPLOAD_RETRY_DELAY=0,
+            MEDIA_UPLOAD_MAX_ATTEMPTS=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def add_course(self, **files):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        data = {
+            'title': 'Video course', 'category': 'Manual Testing', 'level': 'Beginner',
+            'price_type': 'Free', 'price': '0', 'instructor': 'Mani', 'description': 'Course',
+        }
+        data.update(files)
+        with mock.patch('cloudinary.uploader.upload_resource') as upload:
+            response = client.post(reverse('admin-add-course'), data, format='multipart')
+        upload.assert_not_called()
+        return response
+
+    def test_add_course_defers_uploads_to_worker(self):
+        response = self.add_course(
+            video_file=SimpleUploadedFile('intro.mp4', b'0123456789', content_type='video/mp4'),
+            thumbnail=SimpleUploadedFile('card.png', png_bytes(40, 20), content_type='image/png'),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['media_status'], 'processing')
+        self.assertIsNone(response.data['video_file'])
+        course = Course.objects.get(pk=response.data['id'])
+        self.assertEqual(course.media_jobs.filter(status=MediaUploadJob.PENDING).count(), 2)
+
+        call_command('process_media_uploads', '--once', stdout=io.StringIO())
+
+        course.refresh_from_db()
+        self.assertEqual(course.media_status, 'ready')
+        job = course.media_jobs.get(field='video_file')
+        self.assertEqual(course.video_file.public_id, job.public_id)
+        self.assertEqual(course.video_file.resource_type, 'video')
+        with open(os.path.join(self.target_dir, 'video', 'upload', f'{job.public_id}.mp4'), 'rb') as file:
+            self.assertEqual(file.read(), b'0123456789')
+        self.assertFalse(get_staging_storage().exists(job.staged_name))
+
+    def test_finished_job_changes_the_course_etag(self):
+        response = self.add_course(video_file=SimpleUploadedFile('intro.mp4', b'0123', content_type='video/mp4'))
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = reverse('course-detail', args=[response.data['id']])
+        etag = client.get(url)['ETag']
+
+        call_command('process_media_uploads', '--once', stdout=io.StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['media_status'], 'ready')
+
+    def test_thumbnail_upload_generates_card_variants(self):
+        response = self.add_course(
+            thumbnail=SimpleUploadedFile('card.png', png_bytes(1000, 500), content_type='image/png'),
+        )
+        call_command('process_media_uploads', '--once', stdout=io.StringIO())
+
+        course = Course.objects.get(pk=response.data['id'])
+        self.assertEqual(set(course.thumbnails), {'160', '320', '640'})
+        with get_thumbnail_storage().open(course.thumbnails['320']['webp']) as file:
+            self.assertEqual(Image.open(file).size, (320, 160))
+        data = CourseSerializer(course).data
+        self.assertTrue(data['thumbnails']['640']['jpeg'].startswith('/media/thumbnails/'))
+
+    def test_course_without_media_is_ready(self):
+        response = self.add_course()
+        self.assertEqual(response.data['media_status'], 'ready')
+        self.assertFalse(MediaUploadJob.objects.exists())
+
+    def test_retry_resumes_after_last_acknowledged_chunk(self):
+        self.add_course(video_file=SimpleUploadedFile('intro.mp4', b'0123456789', content_type='video/mp4'))
+        target = FlakyMediaTarget(fail_at=8, location=self.target_dir)
+        sent = []
+        original = LocalMediaTarget.upload_chunk
+
+        def record(target, job, data, offset, total):
+            sent.append(offset)
+            return original(target, job, data, offset, total)
+
+        with mock.patch.object(LocalMediaTarget, 'upload_chunk', record):
+            with self.assertLogs('lms.media', 'ERROR'):
+                self.assertFalse(process_job(claim_job('w1'), target))
+            job = MediaUploadJob.objects.get()
+            self.assertEqual((job.status, job.attempts, job.bytes_uploaded), ('pending', 1, 8))
+            self.assertTrue(process_job(claim_job('w1'), target))
+        self.assertEqual(sent, [0, 4, 8])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        with open(os.path.join(self.target_dir, 'video', 'upload', f'{job.public_id}.mp4'), 'rb') as file:
+            self.assertEqual(file.read(), b'0123456789')
+
+    def test_gives_up_after_max_attempts(self):
+        response = self.add_course(video_file=SimpleUploadedFile('intro.mp4', b'0123', content_type='video/mp4'))
+        target = FlakyMediaTarget(fail_at=0, failures=5, location=self.target_dir)
+        with self.assertLogs('lms.media', 'ERROR'):
+            self.assertFalse(process_job(claim_job('w1'), target))
+            self.assertFalse(process_job(claim_job('w1'), target))
+        self.assertIsNone(claim_job('w1'))
+        self.assertEqual(Course.objects.get(pk=response.data['id']).media_status, 'failed')
+        self.assertEqual(MediaUploadJob.objects.get().status, 'failed')
+
+
+def png_bytes(width, height, color='navy'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ThumbnailVariantTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = dict(django_settings.STORAGES, course_thumbnails={
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': root.name},
+        })
+        settings = override_settings(STORAGES=storages, THUMBNAIL_WIDTHS=[100, 400], THUMBNAIL_FORMATS=['webp', 'jpeg'])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_variants_are_sized_and_never_upscaled(self):
+        variants = generate_variants(io.BytesIO(png_bytes(300, 150)))
+        storage = get_thumbnail_storage()
+        with storage.open(variants['100']['jpeg']) as file:
+            self.assertEqual(Image.open(file).size, (100, 50))
+        with storage.open(variants['400']['webp']) as file:
+            self.assertEqual(Image.open(file).size, (300, 150))
+
+    def test_same_content_is_generated_once(self):
+        first = generate_variants(io.BytesIO(png_bytes(300, 150)))
+        with mock.patch('lms.thumbnails.Image.open') as image_open:
+            second = generate_variants(io.BytesIO(png_bytes(300, 150)))
+        image_open.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertNotEqual(generate_variants(io.BytesIO(png_bytes(300, 150, 'red'))), first)
+
+    @override_settings(THUMBNAIL_MAX_PIXELS=1000)
+    def test_oversized_source_is_rejected_before_decoding(self):
+        with self.assertRaises(ValueError):
+            generate_variants(io.BytesIO(png_bytes(300, 150)))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass')
+        cls.courses = [create_course(f'Course {i}') for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_revalidates_without_serializing(self):
+        url = reverse('course-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        cache.clear()
+        with mock.patch.object(CourseSerializer, 'to_representation') as serialize, self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        serialize.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Served from the catalog cache: no queries at all.
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_list_etag_tracks_filtered_set(self):
+        url = reverse('course-list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'category': 'UI/UX'})['ETag'], etag)
+
+        course = self.courses[0]
+        course.title = 'Renamed'
+        course.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.courses[1].delete()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_list_ignores_if_modified_since(self):
+        url = reverse('course-list')
+        self.client.get(url)
+        since = http_date(time.time() + 60)
+        self.courses[1].delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_detail_if_none_match_and_if_modified_since(self):
+        url = reverse('course-detail', args=[self.courses[0].pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_detail_etag_changes_with_enrollment_counters(self):
+        url = reverse('course-detail', args=[self.courses[0].pk])
+        etag = self.client.get(url)['ETag']
+        UserCourse.objects.create(user=self.user, course=self.courses[0])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['students'], 1)
+
+    def test_async_views_send_the_same_validators(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        headers = {'Authorization': f'Bearer {token}'}
+        for view, url, kwargs in [
+            (async_views.course_list, reverse('course-list'), {}),
+            (async_views.course_detail, reverse('course-detail', args=[self.courses[0].pk]), {'pk': self.courses[0].pk}),
+        ]:
+            etag = self.client.get(url)['ETag']
+            cache.clear()
+            request = AsyncRequestFactory().get(url, headers={**headers, 'If-None-Match': etag})
+            response = async_to_sync(view)(request, **kwargs)
+            self.assertEqual((response.status_code, response['ETag']), (304, etag))
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_drf_json_renderer(self):
+        data = {
+            'price': Decimal('499.50'),
+            'when': datetime.datetime(2025, 1, 2, 3, 4, 5, 678, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2025, 1, 2),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Course'),
+            'text': 'naïve\u2028line',
+            'rows': [{'n': 1, 'ok': True, 'none': None}],
+            1: 'non-string key',
+        }
+        for media_type in (None, 'application/json; indent=2', 'application/json; indent=4'):
+            self.assertEqual(FastJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type))
+
+    def test_list_endpoint_is_gzipped_when_accepted(self):
+        for i in range(20):
+            create_course(f'Course {i}')
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('student', 'student@example.com', 'pass'))
+        response = client.get(reverse('course-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 20)
+        self.assertNotIn('Content-Encoding', client.get(reverse('course-list')))
+
+
+class SyntheticDatasetTests(TestCase):
+    def test_dataset_is_seeded_and_consistent(self):
+        counts = generate_dataset(seed=7, prefix='a', **scale_config(100))
+        again = generate_dataset(seed=7, prefix='b', **scale_config(100))
+        self.assertEqual({k: v for k, v in counts.items() if k != 'admin'}, {k: v for k, v in again.items() if k != 'admin'})
+        titles = list(Course.objects.order_by('id').values_list('title', flat=True))
+        self.assertEqual(titles[:counts['courses']], titles[counts['courses']:])
+
+        self.assertEqual(UserCourse.objects.count(), counts['enrollments'] * 2)
+        self.assertEqual(Batch.users.through.objects.count(), counts['batch_members'] * 2)
+        # Derived state is rebuilt after the bulk inserts.
+        self.assertEqual(reconcile_enrollment_counts(), (counts['courses'] * 2, 0))
+        self.assertEqual(rebuild_entitlements(User.objects.values_list('id', flat=True)), CourseEntitlement.objects.count())
+
+    def test_benchmark_covers_every_endpoint(self):
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            call_command('bench_endpoints', '--scales', '40', '--repeat', '1', '--output', output.name, stderr=io.StringIO())
+            report = json.load(output)
+        self.assertEqual(report['uncovered'], [])
+        endpoints = report['scales']['40']['endpoints']
+        self.assertEqual(len(endpoints), len(ENDPOINTS))
+        self.assertEqual({name: e['status'] for name, e in endpoints.items() if e['status'] >= 500}, {})
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass')
+        create_course('Selenium Basics')
+
+    def setUp(self):
+        cache.clear()
+        REGISTRY.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_reports_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('course-list'))
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'serialize', 'app', 'total'})
+        self.assertIn(f'desc="{len(captured)} queries"', timing['db'])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_turned_off(self):
+        self.assertFalse(self.client.get(reverse('course-list')).has_header('Server-Timing'))
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint_exposes_histograms_by_url_name(self):
+        self.client.get(reverse('course-list'))
+        self.client.get(reverse('course-list'))
+        self.client.get(reverse('course-detail', kwargs={'pk': 999}))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('lms_http_request_duration_seconds_count{view="course-list",method="GET"} 2', body)
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="course-list",method="GET",le="+Inf"} 2', body)
+        self.assertIn('lms_http_requests_total{view="course-detail",method="GET",status="404"} 1', body)
+        self.assertIn('lms_db_queries_total{view="course-list"}', body)
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, 403)
+        response = client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_metrics_needs_a_token_without_debug(self):
+        self.assertEqual(APIClient().get(reverse('metrics')).status_code, 404)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=1e-6)
+    def test_slow_queries_are_logged(self):
+        with self.assertLogs('lms.slow_queries', 'WARNING') as logs:
+            self.client.get(reverse('course-list'))
+        self.assertIn('in course-list:', logs.output[-1])
+        self.assertIn('lms_db_slow_queries_total{view="course-list"}', REGISTRY.render())
+
+
+class IndexAdvisorTests(TestCase):
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return explain(sql, params)
+
+    def test_catalog_filters_and_lookups_use_indexes(self):
+        for queryset in [
+            Course.objects.filter(category='API Testing').order_by('id'),
+            Course.objects.filter(level='Beginner').order_by('id'),
+            Course.objects.filter(price_type='Free').order_by('id'),
+            Course.objects.filter(instructor='Mani').order_by('id'),
+            Course.objects.filter(title='Selenium Basics'),
+            UserCourse.objects.filter(enrolled_at__gte=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)),
+            User.objects.filter(email='student@example.com'),
+        ]:
+            with self.subTest(sql=str(queryset.query)):
+                self.assertFalse(self.plan(queryset).flagged)
+
+    def test_unindexed_filter_is_flagged(self):
+        plan = self.plan(Course.objects.filter(description='x'))
+        self.assertTrue(plan.flagged)
+        self.assertEqual(plan.full_scans, ['lms_course'])
+        # Listing a whole table is not a finding.
+        self.assertFalse(self.plan(Course.objects.all()).flagged)
+
+    def test_command_replays_endpoints(self):
+        out = io.StringIO()
+        call_command('index_advisor', '--scale', '40', stdout=out, stderr=io.StringIO())
+        output = out.getvalue()
+        self.assertIn('GET course-list?category=API+Testing', output)
+        self.assertIn('POST token_obtain_pair', output)
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+
+class StudentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.org_user = User.objects.create_user('org', 'org@example.com', 'pass')
+        UserProfile.objects.create(user=cls.org_user, role='organization')
+        org = OrganizationProfile.objects.create(user=cls.org_user, organization_name='Org')
+        cls.batch = Batch.objects.create(name='Morning', organization=org)
+        cls.course = create_course('Selenium Basics')
+        BatchCourse.objects.create(batch=cls.batch, course=cls.course)
+        other = OrganizationProfile.objects.create(
+            user=User.objects.create_user('other-org', 'other-org@example.com', 'pass'), organization_name='Other',
+        )
+        cls.other_batch = Batch.objects.create(name='Evening', organization=other)
+        User.objects.create_user('taken', 'taken@example.com', 'pass')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.org_user)
+
+    def post(self, content, **data):
+        upload = SimpleUploadedFile('students.csv', content.encode(), content_type='text/csv')
+        return self.client.post(reverse('import-students'), {'file': upload, **data}, format='multipart')
+
+    def test_creates_valid_rows_and_reports_every_row(self):
+        response = self.post(
+            'Username,Email,Password,Phone,Batch\n'
+            'asha,asha@example.com,s3cret-1,9000000001,Morning\n'
+            'ravi,ravi@example.com,s3cret-2,,\n'
+            'asha,ASHA@example.com,s3cret-3,,\n'
+            'taken,new@example.com,s3cret-4,,\n'
+            'bad name,not-an-email,,,\n'
+            f'meena,meena@example.com,s3cret-5,,{self.other_batch.id}\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (6, 2, 4))
+        results = response.data['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'created', 'error', 'error', 'error', 'error'])
+        self.assertEqual(results[0]['batch_id'], self.batch.id)
+        self.assertIn('username: Duplicate of row 2.', results[2]['errors'])
+        self.assertIn('email: Duplicate of row 2.', results[2]['errors'])
+        self.assertIn('username: Username already exists.', results[3]['errors'])
+        self.assertEqual(len(results[4]['errors']), 3)
+        # Batches are resolved within the caller's organization only.
+        self.assertEqual(results[5]['errors'], [f'batch: Unknown batch "{self.other_batch.id}".'])
+
+        asha = User.objects.get(username='asha')
+        self.assertTrue(asha.check_password('s3cret-1'))
+        self.assertEqual((asha.userprofile.role, asha.userprofile.phone), ('student', '9000000001'))
+        self.assertEqual(list(self.batch.users.all()), [asha])
+        self.assertTrue(has_course_access(asha.id, self.course.id))
+        self.assertEqual(Course.objects.get(pk=self.course.pk).batch_enrollments, 1)
+        self.assertFalse(User.objects.filter(username='meena').exists())
+
+    def test_default_batch_and_dry_run(self):
+        content = 'username,email,password\nkiran,kiran@example.com,pw\n'
+        response = self.post(content, batch_id=self.batch.id, dry_run='true')
+        self.assertEqual(response.data['results'][0]['status'], 'valid')
+        self.assertEqual(response.data['results'][0]['batch_id'], self.batch.id)
+        self.assertFalse(User.objects.filter(username='kiran').exists())
+
+        self.assertEqual(self.post(content, batch_id=self.other_batch.id).status_code, 404)
+        self.assertEqual(self.post(content, batch_id='abc').status_code, 404)
+        self.assertEqual(self.post(content, batch_id='²').status_code, 404)
+        self.assertEqual(self.post(content, batch_id=self.batch.id).data['created'], 1)
+        self.assertTrue(self.batch.users.filter(username='kiran').exists())
+
+    def test_existing_emails_match_case_insensitively(self):
+        response = self.post('username,email,password,batch\nnew,Taken@Example.com,pw,\nother,other@example.com,pw,²\n')
+        results = response.data['results']
+        self.assertEqual(results[0]['errors'], ['email: Email already exists.'])
+        self.assertEqual(results[1]['errors'], ['batch: Unknown batch "²".'])
+        self.assertEqual(response.data['created'], 0)
+
+    def test_rejects_bad_files_and_callers(self):
+        response = self.post('username,email\nx,x@example.com\n')
+        self.assertEqual(response.data, {'error': 'Missing CSV columns: password'})
+        student = User.objects.create_user('student', 'student@example.com', 'pass')
+        UserProfile.objects.create(user=student, role='student')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.post('username,email,password\n').status_code, 403)
+
+    def test_conflict_after_validation_only_fails_that_row(self):
+        with mock.patch.object(student_import, 'existing_values', return_value=set()):
+            response = self.post('username,email,password\nneha,neha@example.com,pw\ntaken,t2@example.com,pw\n')
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'error'])
+        self.assertTrue(User.objects.filter(username='neha').exists())
+
+    def test_hashing_in_a_process_pool(self):
+        hashes = hash_passwords(['first', 'second', 'third'], workers=2)
+        user = User(username='pool')
+        for password, encoded in zip(['first', 'second', 'third'], hashes):
+            user.password = encoded
+            self.assertTrue(user.check_password(password))
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('username,email,password,batch\nvikram,vikram@example.com,pw,Morning\n')
+        self.addCleanup(os.remove, file.name)
+        out = io.StringIO()
+        call_command('import_students', file.name, '--organization', 'org', stdout=out)
+        self.assertIn('Created 1 of 1 students.', out.getvalue())
+        self.assertTrue(self.batch.users.filter(username='vikram').exists())
+
+
+
+def throttle_rates(rates):
+    """Override the throttle rates; buckets not named are switched off."""
+    return override_settings(REST_FRAMEWORK={
+        **django_settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **dict.fromkeys(django_settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']), **rates,
+        },
+    })
+
+
+class AuthThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', 'student@example.com', 'pass-1234')
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, email='student@example.com', password='wrong', ip='10.0.0.1'):
+        return self.client.post(
+            reverse('token_obtain_pair'), {'email': email, 'password': password}, REMOTE_ADDR=ip,
+        )
+
+    @throttle_rates({'login.email': '2/min'})
+    def test_email_bucket_sheds_before_any_work(self):
+        # A frozen clock: the hashes below take long enough to refill part of a token.
+        with mock.patch('lms.throttling.time.time', return_value=1_000_000.0):
+            self.assertEqual(self.login(ip='10.0.0.1').status_code, 401)
+            self.assertEqual(self.login(ip='10.0.0.2').status_code, 401)
+            with self.assertNumQueries(0), mock.patch.object(User, 'check_password') as check:
+                response = self.login(email='Student@Example.com ', password='pass-1234', ip='10.0.0.3')
+            check.assert_not_called()
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '30')
+            self.assertIn('error', response.json())
+            # Other accounts are unaffected.
+            self.assertEqual(self.login(email='other@example.com').status_code, 401)
+
+    @throttle_rates({'login.ip': '2/min'})
+    def test_ip_bucket_ignores_spoofed_forwarded_for(self):
+        statuses = [
+            self.client.post(
+                reverse('token_obtain_pair'), {'email': f'user{i}@example.com', 'password': 'wrong'},
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'198.51.100.{i}',
+            ).status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [401, 401, 429, 429])
+
+    @throttle_rates({'login.ip': '2/min'})
+    def test_ip_bucket_refills(self):
+        now = 1_000_000.0
+        with mock.patch('lms.throttling.time.time', side_effect=lambda: now):
+            self.login(email='a@example.com')
+            self.login(email='b@example.com')
+            self.assertEqual(self.login(email='c@example.com').status_code, 429)
+            self.assertEqual(self.login(email='c@example.com', ip='10.0.0.9').status_code, 401)
+            now += 30
+            self.assertEqual(self.login(password='pass-1234').status_code, 200)
+            self.assertEqual(self.login().status_code, 429)
+
+    @throttle_rates({'password_reset.ip': '1/min', 'register.email': '1/hour'})
+    def test_reset_and_register_are_throttled_before_authentication(self):
+        url = reverse('reset-password')
+        self.assertEqual(self.client.post(url, {'email': 'x@example.com', 'password': 'p'}).status_code, 401)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post(url, {'email': 'x@example.com', 'password': 'p'}).status_code, 429)
+
+        data = {'username': 'new', 'email': 'new@example.com', 'password': 'pass-1234', 'phone': '1'}
+        self.assertEqual(self.client.post(reverse('register'), data).status_code, 201)
+        data['username'] = 'new2'
+        self.assertEqual(self.client.post(reverse('register'), data).status_code, 429)
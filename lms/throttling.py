@@ -0,0 +1,127 @@
+"""
+Token-bucket throttles for the endpoints that hash passwords: login,
+registration and password reset.
+
+A rate of ``n/period`` gives each key a bucket of ``n`` tokens that refills
+continuously at ``n`` per period. Every request takes a token; once the bucket
+is empty the request gets a 429, and Retry-After says when the next token
+arrives. Buckets are keyed by client IP and by the email in the request body,
+with rates in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] as ``'<scope>.<kind>'``.
+A rate of ``None`` turns that bucket off. The client IP is DRF's ``get_ident``,
+so REST_FRAMEWORK['NUM_PROXIES'] must match the deployment: X-Forwarded-For is
+only trusted as far as the configured proxies.
+
+Buckets live in the THROTTLE_CACHE_ALIAS cache. The default local-memory cache
+is shared by every thread of a process. Point the alias at Redis or Memcached
+to share the buckets across workers; updates there aren't atomic, so
+concurrent workers may let a request or two past a limit.
+
+Views opt in with ThrottleFirstMixin. It checks the throttles before
+authentication and before the handler, so a refused request costs no database
+query and no password hash.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY_PREFIX = 'lms:throttle:'
+
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> ``(10, 60)``: bucket size and refill period in seconds."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def take_token(key, capacity, period):
+    """Return ``(allowed, wait)``, ``wait`` being seconds until the next token."""
+    cache = caches[settings.THROTTLE_CACHE_ALIAS]
+    refill = capacity / period
+    with _lock:
+        now = time.time()
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            return False, (1 - tokens) / refill
+        # A key that expires after one period would be a full bucket anyway.
+        cache.set(key, (tokens - 1, now), timeout=period)
+        return True, None
+
+
+def email_ident(request):
+    data = request.data
+    email = data.get('email') if hasattr(data, 'get') else None
+    if not isinstance(email, str) or not email.strip():
+        return None
+    # Hashed: bounded cache key length, and no addresses in cache keys.
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    kind = None  # 'ip' or 'email'
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_rate(self):
+        name = f'{self.scope}.{self.kind}'
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[name]
+        except KeyError:
+            raise ImproperlyConfigured(f"No throttle rate set for '{name}'.")
+
+    def get_key_ident(self, request):
+        if self.kind == 'ip':
+            return self.get_ident(request)
+        return email_ident(request)
+
+    def allow_request(self, request, view):
+        rate = self.get_rate()
+        if rate is None:
+            return True
+        ident = self.get_key_ident(request)
+        if ident is None:
+            return True
+        capacity, period = parse_rate(rate)
+        allowed, self.wait_seconds = take_token(f'{KEY_PREFIX}{self.scope}:{self.kind}:{ident}', capacity, period)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+    @classmethod
+    def keyed(cls, scope, kind):
+        return type(cls.__name__, (cls,), {'scope': scope, 'kind': kind})
+
+
+def token_bucket_throttles(scope):
+    return [TokenBucketThrottle.keyed(scope, 'ip'), TokenBucketThrottle.keyed(scope, 'email')]
+
+
+class ThrottleFirstMixin:
+    """Check throttles before authentication, permissions and the handler."""
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        self.throttles_checked = True
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        if not getattr(self, 'throttles_checked', False):
+            super().check_throttles(request)
+
+    def throttled(self, request, wait):
+        exc = exceptions.Throttled(wait)
+        exc.detail = {'error': str(exc.detail)}
+        raise exc
@@ -0,0 +1,104 @@
+"""
+Pre-sized thumbnail variants for course cards.
+
+Each source image is hashed, and every configured width/format pair is stored
+once under ``thumbnails/<sha256>/<width>.<format>`` in the
+``course_thumbnails`` storage. A source that has already been processed,
+whether for this course or another, costs only the hash. Variants are
+generated by the media worker (lms/media.py) and by
+``manage.py generate_thumbnails``, never inside a request.
+
+Decoding stays memory-bounded. Image.open() only reads the header, and sources
+over THUMBNAIL_MAX_PIXELS are rejected before decoding. JPEG sources are
+decoded directly at a reduced scale via draft(). Each smaller width is resized
+from the previous variant rather than from the source.
+"""
+import io
+import posixpath
+import shutil
+import tempfile
+import urllib.request
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from PIL import Image, ImageOps
+
+from .storage import file_digest
+
+READ_CHUNK_SIZE = 64 * 1024
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+
+def get_thumbnail_storage():
+    return storages['course_thumbnails']
+
+
+def variant_name(digest, width, fmt):
+    return posixpath.join('thumbnails', digest, f'{width}.{fmt}')
+
+
+def generate_variants(source):
+    """
+    Produce the configured variants of ``source`` (a seekable binary file) and
+    return ``{"<width>": {"<format>": storage name}}``.
+    """
+    storage = get_thumbnail_storage()
+    source.seek(0)
+    digest = file_digest(iter(lambda: source.read(READ_CHUNK_SIZE), b''))
+    widths = sorted(settings.THUMBNAIL_WIDTHS, reverse=True)
+    formats = settings.THUMBNAIL_FORMATS
+
+    variants = {str(width): {fmt: variant_name(digest, width, fmt) for fmt in formats} for width in widths}
+    missing = {
+        name for by_format in variants.values() for name in by_format.values() if not storage.exists(name)
+    }
+    if not missing:
+        return variants
+
+    source.seek(0)
+    with Image.open(source) as image:
+        if image.width * image.height > settings.THUMBNAIL_MAX_PIXELS:
+            raise ValueError(f'{image.width}x{image.height} image exceeds THUMBNAIL_MAX_PIXELS')
+        target_height = max(1, image.height * widths[0] // image.width)
+        image.draft('RGB', (widths[0], target_height))
+        current = ImageOps.exif_transpose(image)
+        current.load()
+
+    for width in widths:
+        if current.width > width:
+            current.thumbnail((width, current.height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        for fmt in formats:
+            name = variants[str(width)][fmt]
+            if name in missing:
+                storage.save(name, ContentFile(encode(current, fmt)))
+    return variants
+
+
+def encode(image, fmt):
+    if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, **SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def fetch_source(url):
+    """Stream a remote image into a spooled temp file, without buffering it whole in memory."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+    with urllib.request.urlopen(url, timeout=30) as response:
+        shutil.copyfileobj(response, spooled, READ_CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+def thumbnail_urls(variants):
+    storage = get_thumbnail_storage()
+    return {
+        width: {fmt: storage.url(name) for fmt, name in by_format.items()}
+        for width, by_format in (variants or {}).items()
+    }
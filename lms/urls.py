@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
@@ -8,24 +9,36 @@ from .views import (
     user_profile, my_assigned_courses, ListRegisteredUsersAPIView, delete_user,
 
     # Course
-    CourseListAPIView, CourseDetailAPIView, AddCourseAPIView, AdminViewCoursesAPIView,
-    assign_course_to_user, AssignedCoursesListAPIView,
+    CourseListAPIView, CourseSearchAPIView, CourseDetailAPIView, course_enrollment_stats, course_access, AddCourseAPIView, AdminViewCoursesAPIView,
+    assign_course_to_user, bulk_assign_courses, AssignedCoursesListAPIView, catalog_cache_stats,
      org_view_courses,OrganizationAddCourseView,OrganizationProfileView,
 
     # Batch
     CreateBatchView, list_batches_for_org,
-    AddUserToBatchView, assign_course_to_batch,
+    AddUserToBatchView, ImportBatchRosterView, assign_course_to_batch,
     ListBatchCoursesView, view_users_in_batch,
     remove_course_by_name, remove_user_from_batch,
 
     # User Creation
     admin_create_user, admin_or_org_create_user, create_organization_user,
-    non_admin_users, list_batches_with_users,list_batches_with_courses,
+    non_admin_users, list_batches_with_users,list_batches_with_courses, ImportStudentsView,
     
 
     # Organization
     org_view_courses,list_all_batch_courses,
 )
+from . import async_views
+
+if settings.ASYNC_READ_VIEWS:
+    course_list_view = async_views.course_list
+    course_detail_view = async_views.course_detail
+    my_courses_view = async_views.my_assigned_courses
+    list_batches_view = async_views.list_batches_for_org
+else:
+    course_list_view = CourseListAPIView.as_view()
+    course_detail_view = CourseDetailAPIView.as_view()
+    my_courses_view = my_assigned_courses
+    list_batches_view = list_batches_for_org
 
 urlpatterns = [
     # 🔐 Authentication
@@ -37,20 +50,25 @@ urlpatterns = [
 
     # 👤 User Profile
     path('profile/', user_profile, name='user-profile'),
-    path('my-courses/', my_assigned_courses, name='my-assigned-courses'),
+    path('my-courses/', my_courses_view, name='my-assigned-courses'),
 
     # 📚 Shared Courses
-    path('courses/', CourseListAPIView.as_view(), name='course-list'),
-    path('courses/<int:pk>/', CourseDetailAPIView.as_view(), name='course-detail'),
+    path('courses/', course_list_view, name='course-list'),
+    path('courses/search/', CourseSearchAPIView.as_view(), name='course-search'),
+    path('courses/<int:pk>/', course_detail_view, name='course-detail'),
+    path('courses/<int:pk>/stats/', course_enrollment_stats, name='course-enrollment-stats'),
+    path('courses/<int:pk>/access/', course_access, name='course-access'),
 
     # 🛠 Admin Panel
     path('admin/create-user/', admin_create_user, name='admin-create-user'),
     path('admin/create-organization/', create_organization_user, name='admin-create-organization'),
     path('admin/add-course/', AddCourseAPIView.as_view(), name='admin-add-course'),
     path('admin/assign-course/', assign_course_to_user, name='admin-assign-course'),
+    path('admin/assign-courses/bulk/', bulk_assign_courses, name='admin-bulk-assign-courses'),
     path('admin/view-courses/', AdminViewCoursesAPIView.as_view(), name='admin-view-courses'),
     path('admin/list-assignments/', AssignedCoursesListAPIView.as_view(), name='admin-list-assignments'),
     path('admin/delete-user/<int:user_id>/', delete_user, name='delete-user'),
+    path('admin/catalog-cache-stats/', catalog_cache_stats, name='catalog-cache-stats'),
 
     # 📋 User Lists
     path('users/', ListRegisteredUsersAPIView.as_view(), name='list-users'),
@@ -58,6 +76,7 @@ urlpatterns = [
 
     # 🏢 Organization Routes
     path('org/create-user/', admin_or_org_create_user, name='org-create-user'),
+    path('students/import/', ImportStudentsView.as_view(), name='import-students'),
     path('org/add-course/', OrganizationAddCourseView.as_view(), name='org-add-course'),
     path('org/batches-with-users/', list_batches_with_users, name='batches-with-users'),
     path('org/view-courses/', org_view_courses, name='org-view-courses'),
@@ -68,8 +87,9 @@ urlpatterns = [
 
     # 🧑‍🤝‍🧑 Batch Management
     path('org/batches/create/', CreateBatchView.as_view(), name='create-batch'),
-    path('org/batches/', list_batches_for_org, name='list-batches'),
+    path('org/batches/', list_batches_view, name='list-batches'),
     path('org/batches/<int:batch_id>/add-user/', AddUserToBatchView.as_view(), name='assign-user-to-batch'),
+    path('org/batches/<int:batch_id>/import-users/', ImportBatchRosterView.as_view(), name='import-batch-roster'),
     path('org/batches/<int:batch_id>/assign-course/', assign_course_to_batch, name='assign-course-to-batch'),
     path('org/batches/<int:batch_id>/courses/', ListBatchCoursesView.as_view(), name='list-batch-courses'),
     path('org/batches/<int:batch_id>/users/', view_users_in_batch, name='view-users-in-batch'),
@@ -2,15 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.generics import RetrieveAPIView, ListAPIView
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.permissions import IsAdminUser
 from rest_framework.decorators import api_view, permission_classes
-from .models import Course, UserProfile, UserCourse, Batch, BatchCourse, OrganizationProfile
+from .models import Course, UserProfile, UserCourse, Batch, BatchCourse, OrganizationProfile, CourseEntitlement
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .serializers import (
     RegisterSerializer,
@@ -20,18 +23,66 @@ from .serializers import (
     UserCourseSerializer,
     UserCourseDetailSerializer,
     CustomTokenObtainPairSerializer,
-    BatchSerializer,UserSerializer
+    BatchSerializer,UserSerializer,
+    BulkEnrollmentSerializer, MyCourseSerializer
 )
+from .enrollment import bulk_enroll, accessible_courses
+from .exports import streaming_export_response
+from .media import save_course_with_deferred_media
+from .renderers import CSVExportRenderer, FastJSONRenderer, NDJSONExportRenderer
+from .roster import RosterImportError, import_roster, iter_csv_identifiers, iter_json_identifiers
+from .student_import import StudentImportError, import_students, read_student_csv
+from .throttling import ThrottleFirstMixin, token_bucket_throttles
+from .cache import catalog_cache_key, get_cached_catalog, set_cached_catalog, get_catalog_cache_stats
+from .filters import filter_courses
+from .conditional import course_validators, list_etag, not_modified, set_validators
+from .authentication import ClaimsJWTAuthentication
+from .permissions import IsOrganizationUser, get_organization_id
+from .pagination import CourseKeysetPagination, CourseSearchPagination
+from .search import search_courses
+
+
+def prepare_course_list(request, courses):
+    """
+    Apply sparse fieldsets to ``courses`` and return ``(courses, fields,
+    paginator)``; ``paginator`` is ``None`` unless the client asked for pages.
+    """
+    paginator = CourseKeysetPagination()
+    paginated = paginator.is_requested(request)
+
+    # Sparse fieldsets: only fetch the columns the requested fields need.
+    fields = CourseSerializer.get_requested_fields(request.query_params)
+    if fields is not None:
+        columns = CourseSerializer.get_model_columns(fields)
+        if paginated:
+            columns += paginator.orderings[paginator.get_ordering(request)]
+        courses = courses.only(*columns)
+
+    return courses, fields, paginator if paginated else None
+
+
+def course_list_response(request, courses):
+    courses, fields, paginator = prepare_course_list(request, courses)
+    if paginator is not None:
+        page = paginator.paginate_queryset(courses, request)
+        serializer = CourseSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
+
+    serializer = CourseSerializer(courses, many=True, fields=fields)
+    return Response(serializer.data)
 
 # ✅ Register API
-class RegisterView(generics.CreateAPIView):
+class RegisterView(ThrottleFirstMixin, generics.CreateAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = token_bucket_throttles('register')
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
 
 
 # ✅ Password Reset
-class SimplePasswordResetView(APIView):
+class SimplePasswordResetView(ThrottleFirstMixin, APIView):
+    throttle_classes = token_bucket_throttles('password_reset')
+
     def post(self, request):
         email = request.data.get("email")
         new_password = request.data.get("password")
@@ -50,31 +101,93 @@ class SimplePasswordResetView(APIView):
 
 # ✅ Course List API with filters
 class CourseListAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
     def get(self, request):
-        courses = Course.objects.all()
-        category = request.GET.getlist('category')
-        level = request.GET.getlist('level')
-        price_type = request.GET.getlist('price_type')
-        instructor = request.GET.getlist('instructor')
-
-        if category:
-            courses = courses.filter(category__in=category)
-        if level:
-            courses = courses.filter(level__in=level)
-        if price_type:
-            courses = courses.filter(price_type__in=price_type)
-        if instructor:
-            courses = courses.filter(instructor__in=instructor)
-
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data)
+        cache_key = catalog_cache_key(request)
+        entry = get_cached_catalog(cache_key)
+        if entry is None:
+            courses = filter_courses(Course.objects.all(), request.GET)
+            etag = list_etag(courses)
+        else:
+            etag = entry['etag']
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if entry is None:
+            response = course_list_response(request, courses)
+            set_cached_catalog(cache_key, {'etag': etag, 'data': response.data})
+        else:
+            response = Response(entry['data'])
+        return set_validators(response, etag)
+
+
+# ✅ Course Search API (ranked, full-text)
+class CourseSearchAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter q is required.'}, status=400)
+
+        courses = search_courses(filter_courses(Course.objects.all(), request.GET), query)
+
+        fields = CourseSerializer.get_requested_fields(request.query_params)
+        if fields is not None:
+            courses = courses.only(*CourseSerializer.get_model_columns(fields))
+
+        paginator = CourseSearchPagination()
+        page = paginator.paginate_queryset(courses, request)
+        serializer = CourseSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
 
 # ✅ Course Detail API by ID
 class CourseDetailAPIView(RetrieveAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        course = self.get_object()
+        etag, last_modified = course_validators(course)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(course).data)
+        return set_validators(response, etag, last_modified)
+
+
+# ✅ Course Enrollment Stats (reads the live counters)
+@api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def course_enrollment_stats(request, pk):
+    stats = Course.objects.filter(pk=pk).values(
+        'id', 'title', 'students', 'direct_enrollments', 'batch_enrollments'
+    ).first()
+    if not stats:
+        return Response({'error': 'Course not found'}, status=404)
+    return Response(stats)
+
+
+# ✅ Course Access Check (entitlement index)
+@api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def course_access(request, pk):
+    entitlement = CourseEntitlement.objects.filter(user_id=request.user.id, course_id=pk).values(
+        'direct', 'batch_grants'
+    ).first()
+    return Response({
+        'course_id': pk,
+        'has_access': entitlement is not None,
+        'direct': bool(entitlement and entitlement['direct']),
+        'batch_grants': entitlement['batch_grants'] if entitlement else 0,
+    })
+
 
 # ✅ Add Course (Admin Only)
 class AddCourseAPIView(APIView):
@@ -87,7 +200,8 @@ class AddCourseAPIView(APIView):
 
         serializer = CourseSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(created_by=request.user)
+            # Thumbnail and video are queued for the media worker, not uploaded here.
+            save_course_with_deferred_media(serializer, created_by=request.user)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
@@ -100,23 +214,15 @@ class AdminViewCoursesAPIView(APIView):
         if not request.user.is_superuser:
             return Response({'error': 'Permission denied'}, status=403)
 
-        courses = Course.objects.filter(created_by=request.user)
-        category = request.GET.getlist('category')
-        level = request.GET.getlist('level')
-        price_type = request.GET.getlist('price_type')
-        instructor = request.GET.getlist('instructor')
-
-        if category:
-            courses = courses.filter(category__in=category)
-        if level:
-            courses = courses.filter(level__in=level)
-        if price_type:
-            courses = courses.filter(price_type__in=price_type)
-        if instructor:
-            courses = courses.filter(instructor__in=instructor)
-
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data)
+        courses = filter_courses(Course.objects.filter(created_by=request.user), request.GET)
+        return course_list_response(request, courses)
+
+
+# ✅ Admin - Catalog Cache Stats
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def catalog_cache_stats(request):
+    return Response(get_catalog_cache_stats())
 
 
 class ListRegisteredUsersAPIView(APIView):
@@ -135,12 +241,20 @@ class ListRegisteredUsersAPIView(APIView):
 class AssignedCoursesListAPIView(ListAPIView):
     serializer_class = UserCourseDetailSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer, CSVExportRenderer, NDJSONExportRenderer]
 
     def get_queryset(self):
         if not self.request.user.is_superuser:
             return UserCourse.objects.none()
         return UserCourse.objects.select_related('user', 'course')
 
+    def list(self, request, *args, **kwargs):
+        # ?format=csv|ndjson streams the rows instead of building one response.
+        export_format = request.accepted_renderer.format
+        if export_format in ('csv', 'ndjson'):
+            return streaming_export_response(self.get_queryset(), export_format, 'course-assignments')
+        return super().list(request, *args, **kwargs)
+
 
 # ✅ Admin - Create User
 
@@ -170,6 +284,24 @@ def assign_course_to_user(request):
     return Response(serializer.errors, status=400)
 
 
+# ✅ Admin - Bulk Assign Courses to Users
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_assign_courses(request):
+    if not request.user.is_superuser:
+        return Response({'error': 'Permission denied'}, status=403)
+
+    serializer = BulkEnrollmentSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+
+    results = bulk_enroll(serializer.validated_data['pairs'])
+    summary = {}
+    for item in results:
+        summary[item['result']] = summary.get(item['result'], 0) + 1
+    return Response({'summary': summary, 'results': results}, status=200)
+
+
 # ✅ Get Logged-In User Profile
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -182,20 +314,21 @@ def user_profile(request):
     return Response(serializer.data)
 
 
-# ✅ Student - View Assigned Courses
+# ✅ Student - View Assigned Courses (direct and batch-derived)
 @api_view(['GET'])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def my_assigned_courses(request):
-    user = request.user
-    assigned = UserCourse.objects.filter(user=user).select_related('course')
+    courses = accessible_courses(request.user.id)
 
-    class SimpleCourseSerializer(serializers.ModelSerializer):
-        class Meta:
-            model = Course
-            fields = ['id', 'title', 'description', 'thumbnail_url', 'video_url', 'price', 'level', 'instructor']
+    paginator = CourseKeysetPagination()
+    if paginator.is_requested(request):
+        ordering = paginator.orderings[paginator.get_ordering(request)]
+        page = paginator.paginate_queryset(courses.only(*MyCourseSerializer.MODEL_COLUMNS, *ordering), request)
+        serializer = MyCourseSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
-    courses = [item.course for item in assigned]
-    serializer = SimpleCourseSerializer(courses, many=True)
+    serializer = MyCourseSerializer(courses.only(*MyCourseSerializer.MODEL_COLUMNS).order_by('id'), many=True)
     return Response(serializer.data)
 
 
@@ -219,33 +352,25 @@ def delete_user(request, user_id):
 
 
 # ✅ Login with Role Data
-class CustomLoginView(TokenObtainPairView):
+class CustomLoginView(ThrottleFirstMixin, TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = token_bucket_throttles('login')
 
 
 # ✅ Organization Add Course s
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganizationUser.with_message('Only organization users can view users')])
 def org_view_users(request):
-    profile = UserProfile.objects.filter(user=request.user).first()
-    if not profile or profile.role.lower() != "organization":
-        return Response({'error': 'Only organization users can view users'}, status=403)
-
     users = User.objects.filter(is_superuser=False)
     serializer = AdminUserSerializer(users, many=True)
     return Response(serializer.data)
 
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganizationUser.with_message('Only organization users can view courses')])
 def org_view_courses(request):
-    profile = UserProfile.objects.filter(user=request.user).first()
-    if not profile or profile.role.lower() != "organization":
-        return Response({'error': 'Only organization users can view courses'}, status=403)
-
     courses = Course.objects.all()
-    serializer = CourseSerializer(courses, many=True)
-    return Response(serializer.data)
+    return course_list_response(request, courses)
 
 
 @api_view(['POST'])
@@ -279,20 +404,16 @@ def admin_or_org_create_user(request):
 
 class CreateBatchView(generics.CreateAPIView):
     serializer_class = BatchSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsOrganizationUser.with_message('Only organization users can create batches')]
 
     def post(self, request, *args, **kwargs):
-        profile = UserProfile.objects.filter(user=request.user).first()
-        if not profile or profile.role.lower() != "organization":
-            return Response({'error': 'Only organization users can create batches'}, status=403)
-
-        org_profile = OrganizationProfile.objects.filter(user=request.user).first()
-        if not org_profile:
+        organization_id = get_organization_id(request)
+        if not organization_id:
             return Response({'error': 'Organization profile not found'}, status=404)
 
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(organization=org_profile)
+            serializer.save(organization_id=organization_id)
             return Response(serializer.data, status=201)
         else:
             return Response(serializer.errors, status=400)  # 👈 This shows the exact validation errors
@@ -311,12 +432,8 @@ def list_batches_for_org(request):
     return Response(data)
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganizationUser.with_message('Only organization users can assign courses to batches')])
 def assign_course_to_batch(request, batch_id):
-    profile = UserProfile.objects.filter(user=request.user).first()
-    if not profile or profile.role.lower() != "organization":
-        return Response({'error': 'Only organization users can assign courses to batches'}, status=403)
-
     try:
         batch = Batch.objects.get(id=batch_id)
     except Batch.DoesNotExist:
@@ -368,32 +485,93 @@ class AddUserToBatchView(APIView):
         # Add user to the batch
         batch.users.add(user)
         return Response({"message": "User assigned to batch successfully."}, status=status.HTTP_200_OK)
-class ListBatchCoursesView(APIView):
+# ✅ Bulk Roster Import into a Batch (CSV upload or JSON list)
+class ImportBatchRosterView(APIView):
+    permission_classes = [IsAuthenticated, IsOrganizationUser.with_message('Only organization users can import batch rosters')]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    def post(self, request, batch_id):
+        try:
+            batch = Batch.objects.get(id=batch_id, organization_id=get_organization_id(request))
+        except Batch.DoesNotExist:
+            return Response({'error': 'Batch not found'}, status=404)
+
+        uploaded = request.FILES.get('file')
+        if uploaded is not None:
+            identifiers = iter_csv_identifiers(uploaded)
+        elif request.content_type.startswith('application/json'):
+            try:
+                identifiers = iter_json_identifiers(request.data)
+            except RosterImportError as exc:
+                return Response({'error': str(exc)}, status=400)
+        else:
+            return Response({'error': 'Upload a CSV file or send a JSON list of users.'}, status=400)
+
+        report = import_roster(batch, identifiers)
+        return Response(report, status=200)
+
+
+# ✅ Bulk Student Import (Admin or Organization)
+class ImportStudentsView(APIView):
     permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
 
-    def get(self, request, batch_id):
-        # Check if the user is an organization
-        profile = UserProfile.objects.filter(user=request.user).first()
-        if not profile or profile.role.lower() != "organization":
-            return Response({'error': 'Only organization users can view batch courses'}, status=403)
+    def post(self, request):
+        organization_id = None
+        if not request.user.is_superuser:
+            organization_id = get_organization_id(request)
+            if organization_id is None:
+                return Response({'error': 'Permission denied'}, status=403)
+
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response({'error': 'Upload a CSV file of students.'}, status=400)
+
+        default_batch_id = request.data.get('batch_id')
+        if default_batch_id:
+            try:
+                default_batch_id = int(default_batch_id)
+            except ValueError:
+                return Response({'error': 'Batch not found'}, status=404)
+            batches = Batch.objects.filter(id=default_batch_id)
+            if organization_id is not None:
+                batches = batches.filter(organization_id=organization_id)
+            if not batches.exists():
+                return Response({'error': 'Batch not found'}, status=404)
+        else:
+            default_batch_id = None
 
+        try:
+            rows = read_student_csv(uploaded, max_rows=settings.STUDENT_IMPORT_MAX_ROWS)
+        except StudentImportError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        report = import_students(rows, organization_id, default_batch_id, dry_run=dry_run)
+        return Response(report, status=200)
+
+
+class ListBatchCoursesView(APIView):
+    permission_classes = [IsAuthenticated, IsOrganizationUser.with_message('Only organization users can view batch courses')]
+
+    def get(self, request, batch_id):
         try:
             batch = Batch.objects.get(id=batch_id)
         except Batch.DoesNotExist:
             return Response({'error': 'Batch not found'}, status=404)
 
         batch_courses = BatchCourse.objects.filter(batch=batch).select_related('course')
+        fields = CourseSerializer.get_requested_fields(request.query_params)
+        if fields is not None:
+            columns = CourseSerializer.get_model_columns(fields)
+            batch_courses = batch_courses.only('course', *[f'course__{column}' for column in columns])
         courses = [bc.course for bc in batch_courses]
 
-        serializer = CourseSerializer(courses, many=True)
+        serializer = CourseSerializer(courses, many=True, fields=fields)
         return Response(serializer.data)
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganizationUser.with_message('Only organization users can view users in a batch')])
 def view_users_in_batch(request, batch_id):
-    profile = UserProfile.objects.filter(user=request.user).first()
-    if not profile or profile.role.lower() != "organization":
-        return Response({'error': 'Only organization users can view users in a batch'}, status=403)
-
     try:
         batch = Batch.objects.get(id=batch_id)
         users = batch.users.all()
@@ -428,12 +606,8 @@ def remove_course_by_name(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['DELETE'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganizationUser.with_message('Only organization users can remove users from batches')])
 def remove_user_from_batch(request, batch_id, username):
-    profile = UserProfile.objects.filter(user=request.user).first()
-    if not profile or profile.role.lower() != "organization":
-        return Response({'error': 'Only organization users can remove users from batches'}, status=403)
-
     try:
         batch = Batch.objects.get(id=batch_id)
     except Batch.DoesNotExist:
@@ -518,50 +692,53 @@ class OrganizationProfileView(APIView):
         return Response({'error': 'User has no organization profile'}, status=404)
 
 class OrganizationAddCourseView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsOrganizationUser.with_message('Permission denied')]
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request):
-        profile = UserProfile.objects.filter(user=request.user).first()
-        if not profile or profile.role != "organization":
-            return Response({'error': 'Permission denied'}, status=403)
-
         serializer = CourseSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(created_by=request.user)
+            # Thumbnail and video are queued for the media worker, not uploaded here.
+            save_course_with_deferred_media(serializer, created_by=request.user)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_batches_with_users(request):
-    batches = Batch.objects.filter(organization=request.user.organizationprofile)
+    # Members of every batch are loaded in one prefetch query.
+    batches = Batch.objects.filter(organization=request.user.organizationprofile).only('id', 'name').prefetch_related(
+        Prefetch('users', queryset=User.objects.only('id', 'email', 'username'))
+    )
     data = []
     for batch in batches:
-        users = batch.users.all()
         data.append({
             'id': batch.id,
             'name': batch.name,
-            'users': UserSerializer(users, many=True).data
+            'users': UserSerializer(batch.users.all(), many=True).data
         })
     return Response(data)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_batches_with_courses(request):
-    batches = Batch.objects.all()
+    # One query for the batches and one for every BatchCourse row joined to
+    # its course, instead of one BatchCourse query per batch.
+    assigned = BatchCourse.objects.select_related('course').only(
+        'batch_id', 'course__id', 'course__title', 'course__description'
+    )
+    batches = Batch.objects.only('id', 'name').prefetch_related(
+        Prefetch('assigned_courses', queryset=assigned)
+    )
     data = []
 
     for batch in batches:
-        # Query the assigned courses via BatchCourse
-        assigned_courses = BatchCourse.objects.filter(batch=batch).select_related('course')
-
         course_data = [
             {
                 'id': bc.course.id,
                 'title': bc.course.title,
                 'description': bc.course.description,
             }
-            for bc in assigned_courses
+            for bc in batch.assigned_courses.all()
         ]
 
         data.append({
@@ -573,12 +750,8 @@ def list_batches_with_courses(request):
     return Response(data)
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsOrganizationUser.with_message('Only organization users can view batch courses')])
 def list_all_batch_courses(request):
-    profile = UserProfile.objects.filter(user=request.user).first()
-    if not profile or profile.role.lower() != "organization":
-        return Response({'error': 'Only organization users can view batch courses'}, status=403)
-
     assignments = BatchCourse.objects.select_related('batch', 'course').all()
 
     data = [
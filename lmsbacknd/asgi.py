@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lmsbacknd.settings')
+# Route the read endpoints to the native async views (lms/async_views.py).
+os.environ.setdefault('LMS_ASYNC_READ_VIEWS', 'True')
 
 application = get_asgi_application()
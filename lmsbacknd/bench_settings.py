@@ -0,0 +1,16 @@
+"""
+Settings for the benchmark commands (bench_endpoints, generate_dataset):
+the project settings with a scratch SQLite database.
+
+    python manage.py migrate --settings=lmsbacknd.bench_settings
+    python manage.py bench_endpoints --settings=lmsbacknd.bench_settings --output bench.json
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'bench.sqlite3',
+    }
+}
@@ -53,7 +53,6 @@ INSTALLED_APPS = [
 
 ]
 
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': config('CLOUDINARY_CLOUD_NAME'),
     'API_KEY': config('CLOUDINARY_API_KEY'),
@@ -64,7 +63,11 @@ print("✅ Cloudinary Key:", config('CLOUDINARY_API_KEY'))
 
 
 MIDDLEWARE = [
+    # ✅ First, so its timings cover everything below (see lms/metrics.py)
+    'lms.metrics.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # ✅ Compresses responses for clients that send Accept-Encoding: gzip
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,8 +108,44 @@ REST_FRAMEWORK = {
     ,'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ]
+    ,'DEFAULT_RENDERER_CLASSES': [
+        'lms.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    # ✅ Token buckets for login/register/password reset (lms/throttling.py),
+    # per client IP and per email; None switches a bucket off.
+    ,'DEFAULT_THROTTLE_RATES': {
+        'login.ip': '60/min',
+        'login.email': '10/min',
+        'register.ip': '20/min',
+        'register.email': '5/min',
+        'password_reset.ip': '20/min',
+        'password_reset.email': '5/min',
+    }
+    # ✅ Proxies in front of the app that append to X-Forwarded-For. The
+    # throttles key on the address the last of them saw, or on REMOTE_ADDR
+    # when 0, so clients can't pick their own IP bucket with a spoofed header.
+    ,'NUM_PROXIES': config('LMS_NUM_PROXIES', default=0, cast=int)
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Course catalog response cache (see lms/cache.py). Point the alias at a
+# shared backend such as Redis or Memcached when running several workers.
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300
+
+# Cache holding the throttle buckets; use a shared one across workers.
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Serve the hot read endpoints from lms/async_views.py instead of the DRF
+# views. lmsbacknd/asgi.py turns this on; WSGI deployments keep the DRF views.
+ASYNC_READ_VIEWS = config('LMS_ASYNC_READ_VIEWS', default=False, cast=bool)
+
 ROOT_URLCONF = 'lmsbacknd.urls'
 
 TEMPLATES = [
@@ -183,6 +222,49 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Course.image: identical uploads are stored once, named by their SHA-256.
+    'course_images': {'BACKEND': 'lms.storage.ContentAddressedStorage'},
+    # Resized course thumbnail variants, named by the source image's SHA-256.
+    'course_thumbnails': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Course thumbnails/videos wait here until the media worker uploads them.
+    'media_staging': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'media_staging'},
+    },
+}
+
+# Background media uploads (lms/media.py, `manage.py process_media_uploads`).
+# Cloudinary needs chunks of at least 5 MB except the last one.
+MEDIA_UPLOAD_TARGET = {'BACKEND': 'lms.media.CloudinaryMediaTarget', 'OPTIONS': {}}
+MEDIA_UPLOAD_CHUNK_SIZE = 20 * 1024 * 1024
+MEDIA_UPLOAD_MAX_ATTEMPTS = 5
+MEDIA_UPLOAD_RETRY_DELAY = 30  # seconds, doubled after every failed attempt
+MEDIA_UPLOAD_LEASE_SECONDS = 15 * 60
+
+# Course card thumbnail variants (lms/thumbnails.py).
+THUMBNAIL_WIDTHS = [160, 320, 640]
+THUMBNAIL_FORMATS = ['webp', 'jpeg']
+THUMBNAIL_MAX_PIXELS = 50_000_000
+
+# Bulk student import (lms/student_import.py). Workers default to one per CPU.
+STUDENT_IMPORT_WORKERS = None
+STUDENT_IMPORT_CHUNK_SIZE = 500
+# Per request: each PBKDF2 hash is ~0.5 s of CPU, so bigger files belong to
+# `manage.py import_students`, which has no limit.
+STUDENT_IMPORT_MAX_ROWS = 500
+
+# Request instrumentation (lms/metrics.py): Server-Timing headers, the
+# slow-query log and the Prometheus scrape endpoint at /metrics. Both expose
+# query counts and timings, so they're off for anonymous clients in production.
+SERVER_TIMING = config('LMS_SERVER_TIMING', default=DEBUG, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('LMS_SLOW_QUERY_MS', default=200, cast=float)  # 0 disables the log
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+# Bearer token required by /metrics; without one it is only served with DEBUG on.
+METRICS_TOKEN = config('LMS_METRICS_TOKEN', default='')
+
 cloudinary.config(
     cloud_name=config('CLOUDINARY_CLOUD_NAME'),
     api_key=config('CLOUDINARY_API_KEY'),
@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from lms.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('lms.urls')),  # Include the LMS app URLs
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
 ]